@@ -0,0 +1,20 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library codec is used without it
+    orjson = None
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    Decodes JSON with orjson when it is installed, otherwise with the json module.
+
+    Raises:
+        ValueError: If `data` is not valid JSON (both codecs raise a ValueError subclass).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
@@ -4,32 +4,62 @@ from langchain_core.messages import SystemMessage, ToolMessage, HumanMessage, AI
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 import uuid
-import json
+import codec # orjson when installed, for tools without structured results
 
 # LangChain Imports
 from langchain_core.tools import BaseTool # The type you want to end up with
 
-# FastMCP Imports (still needed for the underlying client)
-from fastmcp import Client
 import asyncio
+import weakref
 
-# IMPORTANT: LangChain MCP Adapters import
-from langchain_mcp_adapters.client import MultiServerMCPClient # For connecting to servers and loading tools
-from langchain_mcp_adapters.tools import load_mcp_tools # The function to convert MCP tools to LangChain tools
+# Warm MCP sessions and cached tool schemas shared by all agent runs
+from session_pool import MCPSessionPool
+
+# Server-side tool running get_urls -> stack_overflow -> summarize_stack_overflow in one round trip
+PIPELINE_TOOL = "answer_query"
 
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
 
+def format_pipeline_result(result) -> str:
+    """
+    Renders the pipeline tool's {"summary", "sources"} result as the answer text with its source links.
+    """
+    if not isinstance(result, dict) or result.get("summary") is None:
+        return result
+    links = [source["link"] for source in result.get("sources", [])]
+    if not links:
+        return result["summary"]
+    return result["summary"] + "\n\nSources:\n" + "\n".join(f"- {link}" for link in links)
+
+def tool_result(message: ToolMessage):
+    """
+    Returns a tool's result as an object: the structured content when the tool returned one,
+    otherwise its text decoded as JSON (or the text itself if it is not JSON).
+    """
+    if isinstance(message.artifact, dict):
+        return message.artifact
+    try:
+        return codec.loads(message.content)
+    except ValueError:
+        return message.content
+
 class Agent:
-    def __init__(self, model, lc_tools: List[BaseTool], system=""): # Now expects List[BaseTool] directly
+    def __init__(self, model, lc_tools: List[BaseTool], system="", max_tool_calls=4, tool_timeout=None): # Now expects List[BaseTool] directly
         self.model = model
         self.system = system
-        self.tries = 0
         self.max_tries = 3
-
-        self.lc_tools = lc_tools # Directly use the LangChain-compatible tools
+        self.max_tool_calls = max_tool_calls # Tool calls from one LLM turn running at the same time
+        self.tool_timeout = tool_timeout # Seconds per tool call, None for no limit
+
+        self.tools = {t.name: t for t in lc_tools} # Store callable tools by name (LangChain BaseTool instances)
+        self.pipeline = PIPELINE_TOOL in self.tools
+        if self.pipeline:
+            # One round trip: the server runs the whole pipeline and returns only the summary and sources
+            self.lc_tools = [self.tools[PIPELINE_TOOL]]
+        else:
+            self.lc_tools = list(lc_tools) # Directly use the LangChain-compatible tools
         self.llm = model.bind_tools(self.lc_tools)
-        self.tools = {t.name: t for t in self.lc_tools} # Store callable tools by name (LangChain BaseTool instances)
         self.tool_names = [t.name for t in self.lc_tools] # Ordered list of tool names
 
         # Initialize state graph
@@ -96,19 +126,27 @@ class Agent:
         return {"messages": [AIMessage(content=response.content)]}
 
     def relevent_answer(self, state: AgentState) -> str:
-        last_msg = state["messages"][-1].content
-        if last_msg == "No relevant Stack Overflow questions found for the query.":
+        last_msg = state["messages"][-1]
+        # The last message is the model's own answer when it did not call the pipeline tool
+        artifact = last_msg.artifact if isinstance(last_msg, ToolMessage) else None
+        if self.pipeline and isinstance(artifact, dict) and "summary" in artifact and not artifact.get("sources"):
+            return "no"  # The server's search found nothing relevant
+        if last_msg.content == "No relevant Stack Overflow questions found for the query.":
             return "no"
         else:
             return "yes"
 
     async def results_found(self, state: AgentState) -> str:
         print("Checking if results are found...")
-        if self.tries >= self.max_tries:
-            self.tries = 0
+        # Tries are counted from this run's messages (the question plus one per refinement),
+        # so one Agent can serve many concurrent runs.
+        tries = sum(isinstance(m, HumanMessage) for m in state["messages"]) - 1
+        if tries >= self.max_tries:
             print("Max tries exceeded")
             return "limit exceeded"
-        self.tries += 1
+        if self.pipeline:
+            # answer_query runs the search itself; relevent_answer decides from its (empty) sources
+            return "yes"
         query = state["messages"][0].content
         # try:
             # Use the LangChain tool directly here
@@ -131,62 +169,88 @@ class Agent:
         Returns:
             function: A state handler function for the tool.
         """
+        async def _call(state: AgentState, t: dict, semaphore: asyncio.Semaphore) -> list:
+            async with semaphore:
+                if self.tool_timeout is not None:
+                    return await asyncio.wait_for(_run(state, t), self.tool_timeout)
+                return await _run(state, t)
+
+        async def _run(state: AgentState, t: dict) -> list:
+            messages = []
+            # Invoke with the tool call itself to get the ToolMessage: its content is the text the
+            # server sent and its artifact the structured result (see session_pool.py), which is
+            # handed to the next tool as is instead of being decoded and re-encoded.
+            tool_message = await self.tools[t['name']].ainvoke({**t, "type": "tool_call"})
+            result = tool_result(tool_message)
+            content = tool_message.content
+            if tool_name == PIPELINE_TOOL:
+                formatted = format_pipeline_result(result)
+                if isinstance(formatted, str): # error results keep the server's text
+                    content = formatted
+            messages.append(ToolMessage(
+                tool_call_id=t["id"],
+                name=t["name"],
+                content=content,
+                artifact=result
+            ))
+
+            # This logic for chaining tools needs to be robust.
+            # It should determine the next tool based on your graph's flow and
+            # correctly map the output of the current tool to the input of the next.
+            if tool_name in self.tool_names:
+                idx = self.tool_names.index(tool_name)
+                if idx + 1 < len(self.tool_names):
+                    next_tool_lc = self.lc_tools[idx + 1]
+                    next_tool_name = next_tool_lc.name
+                    
+                    args = {}
+                    # Example specific argument mapping based on your tool chain:
+                    if tool_name == 'get_urls' and next_tool_name == 'stack_overflow':
+                        # Assuming get_urls returns a list of URLs
+                        args['urls'] = result
+                    elif tool_name == 'stack_overflow' and next_tool_name == 'summarize_stack_overflow':
+                        # Assuming stack_overflow returns a dictionary of answers
+                        args['query'] = state['messages'][0].content
+                        args['answers'] = result
+                    # Add more elifs for other tool transitions if needed
+
+                    messages.append(AIMessage(
+                        content=f"Triggering next tool: {next_tool_name}",
+                        tool_calls=[{
+                            "name": next_tool_name,
+                            "args": args,
+                            "id": f"synthetic-{next_tool_name}-{uuid.uuid4()}"
+                        }]
+                    ))
+            return messages
+
         async def _handler(state: AgentState):
             last_msg = state['messages'][-1]
 
             if isinstance(last_msg, AIMessage) and last_msg.tool_calls:
+                tool_calls = [t for t in last_msg.tool_calls if t['name'] == tool_name]
+                if not tool_calls:
+                    return {}
+                print(f'Agent: Calling tool: {tool_name}' + (f' x{len(tool_calls)}' if len(tool_calls) > 1 else ''))
+
+                # Calls from one LLM turn are independent: run them together, at most max_tool_calls at a time
+                semaphore = asyncio.Semaphore(self.max_tool_calls)
+                outcomes = await asyncio.gather(*(_call(state, t, semaphore) for t in tool_calls),
+                                                return_exceptions=True)
+                errors = [o for o in outcomes if isinstance(o, BaseException)]
+                if len(errors) == len(outcomes):
+                    raise errors[0]  # Nothing to continue with, as when a single call fails
+
+                # Messages keep the order of the tool calls, whichever finished first
                 messages = []
-                tool_calls = last_msg.tool_calls
-
-                for t in tool_calls:
-                    if t['name'] == tool_name:
-                        print(f'Agent: Calling tool: {tool_name}')
-                        
-                        # Call the LangChain tool's invoke method (which MCP adapter provides)
-                        raw_tool_result = await self.tools[t['name']].ainvoke(t['args'])
-                        print("raw : ",raw_tool_result)
-                        if isinstance(raw_tool_result, str): # <-- This condition will be TRUE for get_urls's raw output
-                                try:
-                                    result = json.loads(raw_tool_result) # <-- This will parse the JSON string into a Python dict
-                                    print("modified    \n\n\n\n",result)
-                                    print(f"DEBUG: Parsed tool '{tool_name}' string result into object.")
-                                except Exception as e:
-                                    print(f"WARNING: Tool '{tool_name}' error : {e}")
-                                    result = raw_tool_result
-                        messages.append(ToolMessage(
-                            tool_call_id=t["id"],
-                            name=t["name"],
-                            content=result# Convert result to string for ToolMessage content
-                        ))
-
-                        # This logic for chaining tools needs to be robust.
-                        # It should determine the next tool based on your graph's flow and
-                        # correctly map the output of the current tool to the input of the next.
-                        if tool_name in self.tool_names:
-                            idx = self.tool_names.index(tool_name)
-                            if idx + 1 < len(self.tool_names):
-                                next_tool_lc = self.lc_tools[idx + 1]
-                                next_tool_name = next_tool_lc.name
-                                
-                                args = {}
-                                # Example specific argument mapping based on your tool chain:
-                                if tool_name == 'get_urls' and next_tool_name == 'stack_overflow':
-                                    # Assuming get_urls returns a list of URLs
-                                    args['urls'] = result
-                                elif tool_name == 'stack_overflow' and next_tool_name == 'summarize_stack_overflow':
-                                    # Assuming stack_overflow returns a dictionary of answers
-                                    args['query'] = state['messages'][0].content
-                                    args['answers'] = result
-                                # Add more elifs for other tool transitions if needed
-
-                                messages.append(AIMessage(
-                                    content=f"Triggering next tool: {next_tool_name}",
-                                    tool_calls=[{
-                                        "name": next_tool_name,
-                                        "args": args,
-                                        "id": f"synthetic-{next_tool_name}-{uuid.uuid4()}"
-                                    }]
-                                ))
+                for t, outcome in zip(tool_calls, outcomes):
+                    if isinstance(outcome, BaseException):
+                        error = "timed out" if isinstance(outcome, asyncio.TimeoutError) else outcome
+                        print(f"Agent: Tool call error: {error}")
+                        messages.append(ToolMessage(tool_call_id=t["id"], name=t["name"],
+                                                    content=f"Error: {error}", status="error"))
+                    else:
+                        messages.extend(outcome)
 
                 return {
                     "messages": messages
@@ -203,30 +267,51 @@ load_dotenv()
 # Initialize the language model
 model = ChatGroq(model="llama-3.3-70b-versatile") # Use the correct model name for Groq
 
-print("Connecting to MCP server and loading tools...")
+SYSTEM_PROMPT = "You are a helpful assistant that can search for information on Stack Overflow."
+
+# Agent per session pool, rebuilt only when the pool's tool list changes
+_agents = weakref.WeakKeyDictionary()
+
+async def get_agent(pool: MCPSessionPool, system: str = SYSTEM_PROMPT, chat_model=None) -> Agent:
+    """
+    Returns an Agent over the pool's tools, reusing the compiled graph across queries.
+    Args:
+        pool (MCPSessionPool): Started session pool.
+        system (str): System prompt of the agent.
+        chat_model: Chat model of the agent; defaults to the module's Groq model.
+    Returns:
+        Agent: The shared agent.
+    """
+    chat_model = chat_model or model
+    key = (pool.tools_version(), system, id(chat_model))
+    cached = _agents.get(pool)
+    if cached is None or cached[0] != key:
+        lc_tools = await pool.get_tools()
+        print(f"Loaded LangChain-compatible tools: {[t.name for t in lc_tools]}")
+        cached = _agents[pool] = (key, Agent(chat_model, lc_tools, system=system))
+    return cached[1]
+
+async def ask(pool: MCPSessionPool, question: str) -> str:
+    """
+    Answers one question with the shared agent; no per-query connection or tool loading.
+    """
+    abot = await get_agent(pool)
+    result = await abot.graph.ainvoke({"messages": [HumanMessage(content=question)]})
+    return result["messages"][-1].content
 
 async def main():
-    # Use MultiServerMCPClient to get the session and then load tools
     # The connections dict maps server names to their details (URL, transport etc.)
     # Replace "my_server" and the URL with your actual server configuration
-    mcp_client_adapter = MultiServerMCPClient(
+    print("Connecting to MCP server and loading tools...")
+    async with MCPSessionPool(
         connections={
             "my_server": {
                 "transport": "streamable_http",
                 "url": "http://localhost:8000/mcp", # Your FastMCP server URL
             }
         }
-    )
-
-    lc_tools: List[BaseTool] = []
-    async with mcp_client_adapter.session("my_server") as session:
-        # This is the magic line! It loads tools and converts them to LangChain's BaseTool format.
-        lc_tools = await load_mcp_tools(session)
-    
-        print(f"Loaded LangChain-compatible tools: {[t.name for t in lc_tools]}")
-
-        # Instantiate the Agent with the model and the LangChain-compatible tools
-        abot = Agent(model, lc_tools, system="You are a helpful assistant that can search for information on Stack Overflow.")
+    ) as pool:
+        abot = await get_agent(pool)
 
         # Start conversation with a user question wrapped in a HumanMessage
         messages = HumanMessage(content="How to reverse a string in Python?")
@@ -236,5 +321,13 @@ async def main():
         async for event in abot.graph.astream({"messages": messages}):
             print(event)
 
+        # Further questions reuse the same sessions, tool list and compiled graph, and may run concurrently
+        answers = await asyncio.gather(*(ask(pool, q) for q in [
+            "How to merge two dictionaries in Python?",
+            "How to read a file line by line in Python?",
+        ]))
+        for answer in answers:
+            print(answer)
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,14 +1,20 @@
+import asyncio
+import os
 import re
 from typing import List
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
-from langchain.tools import StructuredTool
+from langchain_core.tools import StructuredTool
 import requests
-from bs4 import BeautifulSoup
-from langchain_groq import ChatGroq
+import repo_path  # noqa: F401  (clients / llm_cache live at the repository root)
+from clients import get_async_http_client, get_parse_pool
+from metrics import upstream
 
-# Initialize the Groq model (LLaMA 3)
-model = ChatGroq(model='llama3-8b-8192')
+# Base URL of the Stack Exchange API (overridable to point at a local replay server)
+STACKEXCHANGE_API_URL = os.getenv("STACKEXCHANGE_API_URL", "https://api.stackexchange.com/2.3")
+
+# Seconds before a Stack Exchange request is abandoned
+HTTP_TIMEOUT = 10
 
 
 class StackOverFlowToolInput(BaseModel):
@@ -47,10 +53,81 @@ def beautify_html_body(body):
     Returns:
         str: Plain text content.
     """
+    from bs4 import BeautifulSoup  # Deferred: only needed once answers are fetched
     soup = BeautifulSoup(body, "html.parser")
     return soup.get_text()
 
 
+# Query parameters of the two Stack Exchange endpoints used per question
+QUESTION_PARAMS = {
+    'order': 'desc',
+    'sort': 'activity',
+    'site': 'stackoverflow',
+    'filter': 'withbody'
+}
+ANSWER_PARAMS = {
+    'order': 'desc',
+    'sort': 'votes',
+    'site': 'stackoverflow',
+    'filter': 'withbody'
+}
+
+
+def parse_answers(answers):
+    """
+    Converts Stack Exchange answer items into answers sorted by upvotes.
+
+    Args:
+        answers (list[dict]): Answer items from the Stack Exchange API.
+
+    Returns:
+        list[dict] | str: List of answers with upvotes, body, and link, or a message string if there are none.
+    """
+    if not answers:
+        return "No answers found."
+    result = []
+    for answer in answers:
+        body = beautify_html_body(answer['body'])
+        answer_info = {
+            'upvotes': answer['score'],
+            'body': body[:300] + "..." if len(body) > 300 else body,
+            'link': f"https://stackoverflow.com/a/{answer['answer_id']}"
+        }
+        result.append(answer_info)
+    # Sort answers by upvotes in descending order
+    result.sort(key=lambda x: x['upvotes'], reverse=True)
+    return result
+
+
+def format_question(title, url, ans_list):
+    """
+    Builds the tool's entry for one question from its title and parsed answers.
+
+    Args:
+        title (str): Question title.
+        url (str): Question URL.
+        ans_list (list[dict] | str): Result of `parse_answers`, or an error message.
+
+    Returns:
+        dict: {'question': title, 'link': url, 'answers': top answers}
+    """
+    if isinstance(ans_list, str):
+        formatted_answers = [ans_list]
+    else:
+        formatted_answers = []
+        for ans in ans_list:
+            formatted_answers.append({
+                'Upvotes': ans['upvotes'],
+                'Body': ans['body'],
+                'Link': ans['link']
+            })
+    return {
+        'question': title,
+        'link': url,
+        'answers': formatted_answers[:4]  # Limit to top 4 answers
+    }
+
+
 def get_answers_for_question(question_id):
     """
     Fetches top answers for a given Stack Overflow question using the Stack Exchange API.
@@ -62,33 +139,12 @@ def get_answers_for_question(question_id):
         list[dict] | str: List of top answers with upvotes, body, and link. 
                           Returns a message string if no answers or an error occurs.
     """
-    url = f"https://api.stackexchange.com/2.3/questions/{question_id}/answers"
-    params = {
-        'order': 'desc',
-        'sort': 'votes',
-        'site': 'stackoverflow',
-        'filter': 'withbody'
-    }
-
-    response = requests.get(url, params=params)
+    url = f"{STACKEXCHANGE_API_URL}/questions/{question_id}/answers"
+    with upstream("stackexchange"):
+        response = requests.get(url, params=ANSWER_PARAMS, timeout=HTTP_TIMEOUT)
 
     if response.status_code == 200:
-        answers = response.json().get('items', [])
-        if answers:
-            result = []
-            for answer in answers:
-                body = beautify_html_body(answer['body'])
-                answer_info = {
-                    'upvotes': answer['score'],
-                    'body': body[:300] + "..." if len(body) > 300 else body,
-                    'link': f"https://stackoverflow.com/a/{answer['answer_id']}"
-                }
-                result.append(answer_info)
-            # Sort answers by upvotes in descending order
-            result.sort(key=lambda x: x['upvotes'], reverse=True)
-            return result
-        else:
-            return "No answers found."
+        return parse_answers(response.json().get('items', []))
     else:
         return f"Error: {response.status_code}"
 
@@ -111,14 +167,9 @@ def tool_fn(urls: List[str]):
             continue
 
         # Fetch question details
-        question_url = f"https://api.stackexchange.com/2.3/questions/{question_id}"
-        params = {
-            'order': 'desc',
-            'sort': 'activity',
-            'site': 'stackoverflow',
-            'filter': 'withbody'
-        }
-        response = requests.get(question_url, params=params)
+        question_url = f"{STACKEXCHANGE_API_URL}/questions/{question_id}"
+        with upstream("stackexchange"):
+            response = requests.get(question_url, params=QUESTION_PARAMS, timeout=HTTP_TIMEOUT)
         if response.status_code != 200:
             continue
         items = response.json().get('items', [])
@@ -127,28 +178,87 @@ def tool_fn(urls: List[str]):
         title = items[0]['title']
 
         # Fetch and format answers
-        ans_list = get_answers_for_question(question_id)
-        if isinstance(ans_list, str):
-            formatted_answers = [ans_list]
-        else:
-            formatted_answers = []
-            for ans in ans_list:
-                formatted_answers.append({
-                    'Upvotes': ans['upvotes'],
-                    'Body': ans['body'],
-                    'Link': ans['link']
-                })
-
-        results.append({
-            'question': title,
-            'answers': formatted_answers[:4]  # Limit to top 4 answers
-        })
+        results.append(format_question(title, url, get_answers_for_question(question_id)))
     return results
 
 
+async def astack_exchange_get(url, params):
+    """
+    Performs a Stack Exchange API request over the shared async HTTP client, timing it as an upstream call.
+    """
+    with upstream("stackexchange"):
+        return await get_async_http_client().get(url, params=params, timeout=HTTP_TIMEOUT)
+
+
+async def afetch_question(url: str):
+    """
+    Async version of one `tool_fn` iteration: fetches a question and its answers concurrently
+    over the shared HTTP client, and parses the answer HTML off the event loop.
+
+    A failed request (timeout, connection or HTTP error) only affects this URL: the question is
+    skipped, or its answers are replaced by an error message, like a non-200 response.
+
+    Args:
+        url (str): A Stack Overflow question URL.
+
+    Returns:
+        dict | None: The question entry, or None if the question could not be fetched.
+    """
+    question_id = extract_question_id(url)
+    if question_id is None:
+        return None
+    question_response, answers_response = await asyncio.gather(
+        astack_exchange_get(f"{STACKEXCHANGE_API_URL}/questions/{question_id}", QUESTION_PARAMS),
+        astack_exchange_get(f"{STACKEXCHANGE_API_URL}/questions/{question_id}/answers", ANSWER_PARAMS),
+        return_exceptions=True,
+    )
+    for response in (question_response, answers_response):
+        if isinstance(response, BaseException) and not isinstance(response, Exception):
+            raise response  # Cancellation is not a per-URL failure
+    if isinstance(question_response, Exception):
+        print(f"Stack Exchange error for {url}: {question_response!r}")
+        return None
+    if question_response.status_code != 200:
+        return None
+    items = question_response.json().get('items', [])
+    if not items:
+        return None
+    title = items[0]['title']
+
+    if isinstance(answers_response, Exception):
+        print(f"Stack Exchange error for {url} answers: {answers_response!r}")
+        ans_list = f"Error: {type(answers_response).__name__}"
+    elif answers_response.status_code == 200:
+        # BeautifulSoup parsing is CPU-bound, so it runs in a worker process (see PARSE_PROCESSES) or thread
+        items = answers_response.json().get('items', [])
+        pool = get_parse_pool()
+        if pool is not None:
+            ans_list = await asyncio.get_running_loop().run_in_executor(pool, parse_answers, items)
+        else:
+            ans_list = await asyncio.to_thread(parse_answers, items)
+    else:
+        ans_list = f"Error: {answers_response.status_code}"
+    return format_question(title, url, ans_list)
+
+
+async def atool_fn(urls: List[str]):
+    """
+    Async version of `tool_fn`: fetches every URL concurrently, keeping the input order. A URL that
+    fails is left out instead of failing the whole call.
+    """
+    results = await asyncio.gather(*(afetch_question(url) for url in urls), return_exceptions=True)
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+        if isinstance(result, Exception):
+            print(f"Stack Overflow fetch error for {url}: {result!r}")
+    return [result for result in results if result is not None and not isinstance(result, Exception)]
+
+
 # ✅ Define the StructuredTool for LangChain with schema and description
 Stack_overflow_tool = StructuredTool.from_function(
     func=tool_fn,
+    coroutine=atool_fn,
     name="stack_overflow_tool",
     description="""Given a list of Stack Overflow URLs, returns the top answers (based on upvotes) 
                    with their content and links. Useful for debugging and resolving programming issues.""",
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+import metrics
+
+
+@dataclass
+class ToolLimit:
+    """
+    Admission settings of one tool.
+
+    Attributes:
+        max_concurrency (int): Calls allowed to run at the same time.
+        max_queue (int): Calls allowed to wait for a slot; further calls are rejected at once.
+        queue_timeout (float): Seconds a call may wait for a slot before it is rejected.
+        priority (int): 0 for cheap calls that are never shed early; higher values are shed first
+                        once the server's queues fill up (see AdmissionController.shed_at).
+    """
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float
+    priority: int = 0
+
+
+# Cheap URL lookups get the most room; LLM-backed tools the least and are shed first
+DEFAULT_LIMITS = {
+    "get_urls": ToolLimit(max_concurrency=64, max_queue=128, queue_timeout=2.0, priority=0),
+    "stack_overflow": ToolLimit(max_concurrency=32, max_queue=64, queue_timeout=3.0, priority=1),
+    "summarize_stack_overflow": ToolLimit(max_concurrency=16, max_queue=32, queue_timeout=5.0, priority=2),
+    "answer_query": ToolLimit(max_concurrency=16, max_queue=32, queue_timeout=5.0, priority=2),
+}
+
+# Share of the total queue capacity in use at which each priority starts being shed
+DEFAULT_SHED_AT = {1: 0.9, 2: 0.5}
+
+
+class Overloaded(Exception):
+    """
+    Raised when a call is not admitted; the client should retry after `retry_after` seconds.
+    """
+    def __init__(self, tool: str, reason: str, retry_after: float):
+        super().__init__(f"{tool} overloaded ({reason}), retry after {retry_after:.1f}s")
+        self.tool = tool
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_dict(self) -> dict:
+        return {"error": "overloaded", "reason": self.reason, "retry_after": self.retry_after}
+
+
+rejected = metrics.registry.add(metrics.Counter("mcp_admission_rejected_total",
+                                                "Calls rejected by admission control.", ["tool", "reason"]))
+queued = metrics.registry.add(metrics.Gauge("mcp_admission_queued", "Calls waiting for an admission slot.", ["tool"]))
+
+
+class AdmissionController:
+    """
+    Bounds how many calls of each tool run and wait at once, so that under overload excess
+    calls fail fast with a retry hint instead of every call slowing down until clients time out.
+
+    A call is rejected when its tool's queue is full, when it waited `queue_timeout` seconds
+    without getting a slot, or when it has a shed priority and the share of all queue capacity
+    in use has reached that priority's `shed_at` level.
+
+    Attributes:
+        limits (dict): ToolLimit per tool name; tools without an entry are admitted unconditionally.
+        shed_at (dict): Queue utilisation (0-1) per priority at which that priority is shed.
+        retry_after (float): Base retry hint in seconds, scaled by the queue length.
+        enabled (bool): When False every call is admitted.
+    """
+    def __init__(self, limits: Optional[Dict[str, ToolLimit]] = None, shed_at: Optional[Dict[int, float]] = None,
+                 retry_after: float = 1.0, enabled: bool = True):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.shed_at = dict(DEFAULT_SHED_AT if shed_at is None else shed_at)
+        self.retry_after = retry_after
+        self.enabled = enabled
+        self._slots = {name: asyncio.Semaphore(limit.max_concurrency) for name, limit in self.limits.items()}
+        self._waiting = {name: 0 for name in self.limits}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """
+        Builds a controller from the environment: ADMISSION_DISABLED=1 turns admission off and
+        ADMISSION_LIMITS holds JSON overrides, e.g. '{"answer_query": {"max_concurrency": 4}}'.
+
+        The limits are for the whole server. When it runs MCP_WORKERS worker processes (each with
+        its own controller), every worker gets 1/MCP_WORKERS of each concurrency and queue limit,
+        rounded up.
+        """
+        limits = dict(DEFAULT_LIMITS)
+        for name, overrides in json.loads(os.getenv("ADMISSION_LIMITS", "{}")).items():
+            base = limits.get(name, ToolLimit(max_concurrency=16, max_queue=32, queue_timeout=2.0))
+            limits[name] = replace(base, **overrides)
+        workers = max(1, int(os.getenv("MCP_WORKERS", "1")))
+        if workers > 1:
+            limits = {name: replace(limit, max_concurrency=-(-limit.max_concurrency // workers),
+                                    max_queue=-(-limit.max_queue // workers))
+                      for name, limit in limits.items()}
+        disabled = os.getenv("ADMISSION_DISABLED", "").lower() in ("1", "true", "yes")
+        return cls(limits=limits, enabled=not disabled)
+
+    def utilisation(self) -> float:
+        """
+        Returns the share of the total queue capacity currently in use.
+        """
+        capacity = sum(limit.max_queue for limit in self.limits.values())
+        return sum(self._waiting.values()) / capacity if capacity else 0.0
+
+    def _reject(self, tool: str, reason: str) -> Overloaded:
+        limit = self.limits[tool]
+        backlog = self._waiting[tool] / max(1, limit.max_concurrency)
+        rejected.inc(tool, reason)
+        return Overloaded(tool, reason, round(self.retry_after * (1 + backlog), 1))
+
+    @asynccontextmanager
+    async def admit(self, tool: str):
+        """
+        Holds one of `tool`'s slots for the enclosed block.
+
+        Raises:
+            Overloaded: If the call is not admitted.
+        """
+        if not self.enabled or tool not in self.limits:
+            yield
+            return
+        limit = self.limits[tool]
+        slots = self._slots[tool]
+        if slots.locked():
+            threshold = self.shed_at.get(limit.priority)
+            if self._waiting[tool] >= limit.max_queue:
+                raise self._reject(tool, "queue full")
+            if threshold is not None and self.utilisation() >= threshold:
+                raise self._reject(tool, "shed")
+        self._waiting[tool] += 1
+        queued.inc(tool)
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=limit.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(tool, "queue timeout") from None
+        finally:
+            self._waiting[tool] -= 1
+            queued.dec(tool)
+        try:
+            yield
+        finally:
+            slots.release()
@@ -1,10 +1,12 @@
 from typing import List
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain.tools import StructuredTool
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
+import repo_path  # noqa: F401  (clients / llm_cache live at the repository root)
+from clients import get_search_tool
+from metrics import upstream
 
-# Initialize the Tavily search tool with a maximum of 10 results
-search_tool = TavilySearchResults(max_results=10)
+# Tavily search tool; None uses the shared client created on the first search (see clients.py)
+search_tool = None
 
 class UrlsInput(BaseModel):
     """
@@ -27,8 +29,22 @@ def get_urls(query: str) -> List[str] | str:
         List[str]: A list of Stack Overflow URLs relevant to the query.
     """
     # Perform a web search prefixed with "stackoverflow.com" to bias results
-    results = search_tool.run("stackoverflow.com " + query)
+    with upstream("tavily"):
+        results = (search_tool or get_search_tool()).run("stackoverflow.com " + query)
+    return filter_urls(results)
 
+async def aget_urls(query: str) -> List[str] | str:
+    """
+    Async version of `get_urls`, using the search tool's async client.
+    """
+    with upstream("tavily"):
+        results = await (search_tool or get_search_tool()).ainvoke("stackoverflow.com " + query)
+    return filter_urls(results)
+
+def filter_urls(results) -> List[str]:
+    """
+    Keeps the Stack Overflow question URLs of the search results.
+    """
     # Filter results to include only valid Stack Overflow question URLs
     urls = [result['url'] for result in results if "https://stackoverflow.com/questions/" in result['url']]
     print(urls)
@@ -37,6 +53,7 @@ def get_urls(query: str) -> List[str] | str:
 # Wrap the get_urls function as a LangChain StructuredTool
 get_url_tool = StructuredTool.from_function(
     func=get_urls,
+    coroutine=aget_urls,
     name="get_url_tool",
     description=(
         "Given any coding-related user query, it finds the most relevant URLs from Stack Overflow. "
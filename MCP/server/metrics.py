@@ -0,0 +1,328 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from cache hits (~ms) to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        return self.render_values(self.snapshot())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def set(self, *labels, value: float):
+        """
+        Sets the value directly, e.g. to mirror a total kept by another component.
+        """
+        with self._lock:
+            self._values[labels] = value
+
+    def snapshot(self) -> List[Tuple[Tuple, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def merge(self, snapshots: List[Tuple[int, bool, list]]) -> List[Tuple[Tuple, float]]:
+        """
+        Combines the snapshots of several worker processes: counts add up, including those of
+        workers that have exited, so the merged counter never goes backwards.
+
+        Args:
+            snapshots (list): (pid, alive, values) per worker, values as returned by `snapshot`.
+        """
+        totals: Dict[Tuple, float] = {}
+        for _, _, values in snapshots:
+            for labels, value in values:
+                totals[tuple(labels)] = totals.get(tuple(labels), 0.0) + value
+        return sorted(totals.items())
+
+    def render_values(self, items: List[Tuple[Tuple, float]], label_names: Optional[Tuple] = None) -> List[str]:
+        names = self.label_names if label_names is None else label_names
+        return self.header() + [f"{self.name}{_labels(names, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down per label set (e.g. requests in flight).
+
+    Attributes:
+        multiprocess (str): How the values of several workers are merged: "sum" adds up the live
+                            workers' values (in-flight calls, queue lengths); "worker" keeps one series
+                            per live worker with a `worker` (pid) label, for values that do not add up (ratios).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), multiprocess: str = "sum"):
+        super().__init__(name, help, labels)
+        self.multiprocess = multiprocess
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def merge(self, snapshots: List[Tuple[int, bool, list]]) -> List[Tuple[Tuple, float]]:
+        live = [(pid, alive, values) for pid, alive, values in snapshots if alive]
+        if self.multiprocess == "worker":
+            return sorted((tuple(labels) + (str(pid),), value) for pid, _, values in live for labels, value in values)
+        return super().merge(live)
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram per label set, as Prometheus expects.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, value: float, *labels):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[idx] += 1
+            self._sums[labels] += value
+
+    def snapshot(self) -> List[Tuple[Tuple, List[int], float]]:
+        with self._lock:
+            return sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+
+    def merge(self, snapshots: List[Tuple[int, bool, list]]) -> List[Tuple[Tuple, List[int], float]]:
+        """
+        Combines the snapshots of several worker processes by adding up bucket counts and sums.
+        """
+        counts: Dict[Tuple, List[int]] = {}
+        sums: Dict[Tuple, float] = {}
+        for _, _, values in snapshots:
+            for labels, bucket_counts, total in values:
+                labels = tuple(labels)
+                merged = counts.setdefault(labels, [0] * (len(self.buckets) + 1))
+                for i, count in enumerate(bucket_counts):
+                    merged[i] += count
+                sums[labels] = sums.get(labels, 0.0) + total
+        return sorted((k, v, sums[k]) for k, v in counts.items())
+
+    def render_values(self, items: List[Tuple[Tuple, List[int], float]], label_names: Optional[Tuple] = None) -> List[str]:
+        lines = self.header()
+        names = self.label_names + ("le",)
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Holds the server's metrics and renders them in the Prometheus text format.
+
+    Recording is a dict update under a lock, so it is cheap enough for every tool call and
+    upstream request. Values owned by other components (cache counters, coalescing stats) are
+    read only when /metrics is scraped, through collectors.
+
+    Every metric lives in the memory of one process. When the server runs several worker
+    processes (server.py --workers N), each worker calls `share(directory)`: it then writes a
+    snapshot of its metrics to `<directory>/<pid>.json` every `interval` seconds and whenever it
+    is scraped, and renders the merge of all workers' snapshots (see each metric's `merge`). So a
+    scrape reaching any worker returns server-wide values, with the other workers' values up to
+    `interval` seconds old. Counters and histograms of workers that have exited are kept, so
+    totals never go backwards; their gauges are dropped.
+
+    Attributes:
+        directory (str | None): Directory shared by the workers' snapshot files; None in a single process.
+        interval (float): Seconds between snapshots when sharing.
+    """
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+        self.directory: Optional[str] = None
+        self.interval = 1.0
+        self._write_lock = threading.Lock()
+
+    def add(self, metric):
+        # A module registering metrics can run twice in one process (uvicorn's spawned workers
+        # re-run server.py as __mp_main__ before importing it as `server`); the last definition wins.
+        self.metrics = [m for m in self.metrics if m.name != metric.name] + [metric]
+        return metric
+
+    def share(self, directory: str, interval: float = 1.0):
+        """
+        Starts sharing this process's metrics with the other workers through `directory`.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.interval = interval
+        self.write_snapshot()
+        threading.Thread(target=self._write_periodically, name="metrics-snapshot", daemon=True).start()
+
+    def _collect(self):
+        for collect in self.collectors:
+            collect()
+
+    def write_snapshot(self):
+        """
+        Writes this process's current metrics to its snapshot file (atomically).
+        """
+        self._collect()
+        data = {metric.name: metric.snapshot() for metric in self.metrics}
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with self._write_lock:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(path + ".tmp", path)
+
+    def _write_periodically(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                print("Metrics snapshot error:", e)
+
+    def _read_snapshots(self) -> List[Tuple[int, bool, dict]]:
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                pid = int(name[:-len(".json")])
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    snapshots.append((pid, _pid_alive(pid), json.load(f)))
+            except (ValueError, OSError) as e:
+                print("Skipping metrics snapshot", name, e)
+        return snapshots
+
+    def render(self) -> str:
+        if self.directory is None:
+            self._collect()
+            lines = []
+            for metric in self.metrics:
+                lines.extend(metric.render())
+            return "\n".join(lines) + "\n"
+        self.write_snapshot()
+        snapshots = self._read_snapshots()
+        lines = []
+        for metric in self.metrics:
+            values = metric.merge([(pid, alive, data.get(metric.name, [])) for pid, alive, data in snapshots])
+            label_names = None
+            if isinstance(metric, Gauge) and metric.multiprocess == "worker":
+                label_names = metric.label_names + ("worker",)
+            lines.extend(metric.render_values(values, label_names))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+tool_requests = registry.add(Counter("mcp_tool_requests_total", "Tool calls received.", ["tool"]))
+tool_errors = registry.add(Counter("mcp_tool_errors_total", "Tool calls that failed.", ["tool"]))
+tool_latency = registry.add(Histogram("mcp_tool_latency_seconds", "Tool call latency.", ["tool"]))
+tool_in_flight = registry.add(Gauge("mcp_tool_in_flight", "Tool calls currently running.", ["tool"]))
+upstream_requests = registry.add(Counter("mcp_upstream_requests_total",
+                                         "Requests to upstream services by outcome.", ["service", "outcome"]))
+upstream_latency = registry.add(Histogram("mcp_upstream_latency_seconds", "Upstream request latency.", ["service"]))
+
+
+@contextmanager
+def track_tool(tool: str):
+    """
+    Records a tool call: request count, in-flight gauge, latency and errors.
+
+    Usable around awaits: `with track_tool("get_urls"): return await ...`.
+    """
+    tool_requests.inc(tool)
+    tool_in_flight.inc(tool)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        tool_errors.inc(tool)
+        raise
+    finally:
+        tool_in_flight.dec(tool)
+        tool_latency.observe(time.perf_counter() - start, tool)
+
+
+def record_tool_error(tool: str):
+    """
+    Counts a tool call that reported an error in its result instead of raising.
+    """
+    tool_errors.inc(tool)
+
+
+@contextmanager
+def upstream(service: str):
+    """
+    Times one request to an upstream service ("tavily", "stackexchange", "groq").
+
+    Works around both sync and async calls: `with upstream("groq"): await model.ainvoke(...)`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        upstream_requests.inc(service, "error")
+        raise
+    else:
+        upstream_requests.inc(service, "ok")
+    finally:
+        upstream_latency.observe(time.perf_counter() - start, service)
@@ -1,8 +1,16 @@
+import argparse
 import json
+import os
 from mcp.server.fastmcp import FastMCP
 from get_urls import get_url_tool
 from StackOverflow import Stack_overflow_tool
-from summarizer import StackOverflowSummarizer 
+from summarizer import StackOverflowSummarizer, asummarize_with_sources
+from llm_cache import enable_llm_cache
+from singleflight import SingleFlight
+from admission import AdmissionController, Overloaded
+import metrics
+from starlette.requests import Request
+from starlette.responses import Response
 import logging  # Add logging
 import traceback  # For error details
 
@@ -10,6 +18,9 @@ import traceback  # For error details
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Every tool's LLM calls go through the shared SQLite response cache (see llm_cache.py)
+llm_cache = enable_llm_cache()
+
 SERVER_HOST = "0.0.0.0"  # Changed to allow external access
 SERVER_PORT = 8000
 
@@ -19,39 +30,204 @@ mcp = FastMCP(
     port=SERVER_PORT,
 )
 
-# Add robust error handling to all tools
+# Per-tool concurrency limits and queues; excess calls get a fast "overloaded, retry after" reply
+# instead of slowing every call down, and LLM-backed tools are shed before URL lookups (see admission.py)
+admission = AdmissionController.from_env()
+
+# Identical concurrent tool calls (e.g. many users asking the same question during an incident)
+# share one execution and all receive its result (see singleflight.py)
+coalescer = SingleFlight()
+
+async def search_urls(query: str) -> list:
+    return await coalescer.do("get_urls", {"query": query}, lambda: get_url_tool.ainvoke({"query": query}))
+
+async def fetch_answers(urls: dict) -> list:
+    return await coalescer.do("stack_overflow", urls, lambda: Stack_overflow_tool.ainvoke(urls))
+
+async def summarize(query: str, answers: list) -> str:
+    args = {"query": query, "stackoverflow_data": answers}
+    return await coalescer.do("summarize_stack_overflow", args, lambda: StackOverflowSummarizer.ainvoke(args))
+
+async def run_pipeline(query: str) -> dict:
+    urls = await search_urls(query)
+    answers = await fetch_answers({"urls": urls})
+    summary, relevant = await asummarize_with_sources(query, answers)
+    sources = [{"question": item["question"], "link": item["link"],
+                "answers": [ans["Link"] for ans in item["answers"] if isinstance(ans, dict)]}
+               for item in relevant]
+    return {"summary": summary, "sources": sources}
+
+# Add robust error handling to all tools.
+# Tools are async so one slow search / Stack Exchange / Groq call never blocks the event loop serving
+# the other sessions: HTTP goes through a shared pooled httpx.AsyncClient (see clients.py), LLM calls use
+# the async Groq client and HTML parsing runs in worker threads.
+@mcp.tool()
+async def get_urls(query: str) -> dict:
+    with metrics.track_tool("get_urls"):
+        try:
+            async with admission.admit("get_urls"):
+                logger.info(f"get_urls called with query: {query}")
+                result = await search_urls(query)
+                logger.info(f"Returning {len(result)} URLs")
+                return {"urls": result}
+        except Overloaded as e:
+            logger.warning(str(e))
+            return e.to_dict()
+        except Exception as e:
+            logger.error(f"get_urls failed: {str(e)}\n{traceback.format_exc()}")
+            metrics.record_tool_error("get_urls")
+            return {"error": str(e)}
+
 @mcp.tool()
-def get_urls(query: str) -> dict:
-    try:
-        logger.info(f"get_urls called with query: {query}")
-        result = get_url_tool(query)
-        logger.info(f"Returning {len(result)} URLs")
-        return {"urls": result}
-    except Exception as e:
-        logger.error(f"get_urls failed: {str(e)}\n{traceback.format_exc()}")
-        return {"error": str(e)}
+async def stack_overflow(urls: dict) -> dict:
+    with metrics.track_tool("stack_overflow"):
+        try:
+            async with admission.admit("stack_overflow"):
+                logger.info(f"stack_overflow called with {len(urls)} URLs")
+                result = await fetch_answers(urls)
+                return {"result":result}  # Assuming this already returns a dict
+        except Overloaded as e:
+            logger.warning(str(e))
+            return e.to_dict()
+        except Exception as e:
+            logger.error(f"stack_overflow failed: {str(e)}\n{traceback.format_exc()}")
+            metrics.record_tool_error("stack_overflow")
+            return {"error": str(e)}
 
 @mcp.tool()
-def stack_overflow(urls: dict) -> dict:
-    try:
-        logger.info(f"stack_overflow called with {len(urls)} URLs")
-        result = Stack_overflow_tool(urls)
-        return {"result":result}  # Assuming this already returns a dict
-    except Exception as e:
-        logger.error(f"stack_overflow failed: {str(e)}\n{traceback.format_exc()}")
-        return {"error": str(e)}
+async def summarize_stack_overflow(query: str, answers: dict) -> dict:
+    with metrics.track_tool("summarize_stack_overflow"):
+        try:
+            async with admission.admit("summarize_stack_overflow"):
+                logger.info("summarize_stack_overflow called")
+                result = await summarize(query, answers['result'])
+                return {"summary": result}
+        except Overloaded as e:
+            logger.warning(str(e))
+            return e.to_dict()
+        except Exception as e:
+            logger.error(f"summarize_stack_overflow failed: {str(e)}\n{traceback.format_exc()}")
+            metrics.record_tool_error("summarize_stack_overflow")
+            return {"error": str(e)}
 
 @mcp.tool()
-def summarize_stack_overflow(query: str, answers: dict) -> dict:
-    try:
-        logger.info("summarize_stack_overflow called")
-        result = StackOverflowSummarizer.invoke({"query": query, "stackoverflow_data": answers['result']})
-        return {"summary": result}
-    except Exception as e:
-        logger.error(f"summarize_stack_overflow failed: {str(e)}\n{traceback.format_exc()}")
-        return {"error": str(e)}
+async def answer_query(query: str) -> dict:
+    """
+    Answers a coding question from Stack Overflow in one call: searches for questions, fetches
+    their answers and summarizes them on the server, returning only the summary and its sources.
+    """
+    with metrics.track_tool("answer_query"):
+        try:
+            async with admission.admit("answer_query"):
+                logger.info(f"answer_query called with query: {query}")
+                return await coalescer.do("answer_query", {"query": query}, lambda: run_pipeline(query))
+        except Overloaded as e:
+            logger.warning(str(e))
+            return e.to_dict()
+        except Exception as e:
+            logger.error(f"answer_query failed: {str(e)}\n{traceback.format_exc()}")
+            metrics.record_tool_error("answer_query")
+            return {"error": str(e)}
+
+def collect_cache_metrics():
+    # Mirrors the LLM cache and coalescing counters into the registry when /metrics is scraped
+    if llm_cache is not None:
+        cache_lookups.set("hit", value=llm_cache.hits)
+        cache_lookups.set("miss", value=llm_cache.misses)
+        cache_hit_ratio.set(value=llm_cache.hit_ratio())
+    for tool, counts in list(coalescer.stats.items()):  # Also called from the metrics snapshot thread
+        coalesced_calls.set(tool, value=counts["coalesced"])
+    coalesced_ratio.set(value=coalescer.coalesced_ratio())
+
+cache_lookups = metrics.registry.add(metrics.Counter("mcp_llm_cache_lookups_total", "LLM cache lookups.", ["result"]))
+cache_hit_ratio = metrics.registry.add(metrics.Gauge("mcp_llm_cache_hit_ratio", "Share of LLM cache lookups that hit.",
+                                                     multiprocess="worker"))
+coalesced_calls = metrics.registry.add(metrics.Counter("mcp_coalesced_calls_total",
+                                                       "Tool calls that joined an identical call in flight.", ["tool"]))
+coalesced_ratio = metrics.registry.add(metrics.Gauge("mcp_coalesced_ratio", "Share of tool calls that were coalesced.",
+                                                     multiprocess="worker"))
+metrics.registry.collectors.append(collect_cache_metrics)
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """
+    Prometheus scrape endpoint: per-tool requests, errors, latency and in-flight calls,
+    upstream (Tavily, Stack Exchange, Groq) latency, LLM cache and coalescing ratios.
+
+    With several workers (--workers N) a scrape reaches one of them; it returns the merge of every
+    worker's snapshot (see metrics.Registry), with the other workers' values up to a second old.
+    The two ratios are reported per worker, with a `worker` (pid) label.
+    """
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@mcp.resource("metrics://coalescing")
+def coalescing_metrics() -> str:
+    """
+    Per-tool counts of calls, executions, coalesced calls and errors, as JSON, for the worker
+    process that serves the read (coalescing happens within one worker).
+    """
+    return json.dumps({"tools": coalescer.stats, "in_flight": coalescer.in_flight(),
+                       "coalesced_ratio": coalescer.coalesced_ratio()})
+
+def create_app():
+    """
+    Returns the streamable-HTTP ASGI app. Used as the uvicorn app factory in each worker process.
+
+    The app runs stateless: consecutive requests of one client may reach different workers,
+    so no MCP session state is kept in a worker. Only the LLM cache (a shared SQLite file) is
+    shared by the workers; the rest of the server's state is per worker (see run_workers).
+    When MCP_METRICS_DIR is set, the worker shares its metrics through that directory.
+    """
+    mcp.settings.stateless_http = True
+    if os.getenv("MCP_METRICS_DIR"):
+        metrics.registry.share(os.environ["MCP_METRICS_DIR"])
+    return mcp.streamable_http_app()
+
+
+def run_workers(workers: int, host: str = SERVER_HOST, port: int = SERVER_PORT, app: str = "server:create_app"):
+    """
+    Serves the streamable-HTTP endpoint from `workers` processes sharing one listening socket.
+
+    Each worker is a separate process with its own in-memory state:
+        - coalescing (SingleFlight) only joins identical calls that reach the same worker;
+        - admission control runs per worker. MCP_WORKERS is set so that each worker takes its share
+          of the configured ADMISSION_LIMITS (see AdmissionController.from_env). The limits stay
+          server-wide totals, but a worker may reject a call while another one still has room;
+        - metrics are recorded per worker and merged on scrape through the snapshot files in
+          MCP_METRICS_DIR (a new temporary directory unless set; use an empty one). The values of
+          the other workers are up to a second old.
+    Only the LLM cache (a shared SQLite file) is consistent across workers.
+
+    Args:
+        workers (int): Number of worker processes (e.g. one per core).
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        app (str): Import string of the app factory each worker calls.
+    """
+    import tempfile
+    import uvicorn
+    # Read by every worker process, which inherits the environment
+    os.environ["MCP_WORKERS"] = str(workers)
+    if not os.getenv("MCP_METRICS_DIR"):
+        os.environ["MCP_METRICS_DIR"] = tempfile.mkdtemp(prefix="mcp_metrics_")
+    uvicorn.run(app, factory=True, workers=workers, host=host, port=port,
+                app_dir=os.path.dirname(os.path.abspath(__file__)), log_level=mcp.settings.log_level.lower())
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stack Overflow MCP server (streamable HTTP).")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", "1")),
+                        help="Worker processes; more than 1 serves the endpoint statelessly from several processes.")
+    parser.add_argument("--parse-processes", type=int,
+                        help="Worker processes per server process for HTML parsing (default: PARSE_PROCESSES or 0).")
+    args = parser.parse_args()
+    if args.parse_processes is not None:
+        # Read by clients.py when each worker imports it
+        os.environ["PARSE_PROCESSES"] = str(args.parse_processes)
+
     print(f"Starting MCP HTTP server on http://{SERVER_HOST}:{SERVER_PORT}")
     print(f"Access docs at: http://localhost:{SERVER_PORT}/docs")
-    mcp.run(transport="streamable-http")
\ No newline at end of file
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        mcp.run(transport="streamable-http")
\ No newline at end of file
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+
+def normalize(value: Any) -> Any:
+    """
+    Normalizes tool arguments so calls that only differ in whitespace or key order match.
+
+    Args:
+        value: Tool argument (str, list, dict or scalar).
+
+    Returns:
+        The normalized value.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+def make_key(name: str, args: Dict[str, Any]) -> str:
+    """
+    Returns the coalescing key of a tool call: the tool name plus a hash of its normalized arguments.
+    """
+    payload = json.dumps(normalize(args), sort_keys=True, separators=(",", ":"), default=str)
+    return f"{name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent async calls: while a call with a given key is running, further
+    calls with the same key wait for it and receive its result (or exception) instead of running again.
+
+    The shared call runs as its own task, so a caller that is cancelled (e.g. its client disconnected)
+    does not cancel the work the other callers are waiting for.
+
+    Attributes:
+        stats (dict): Per tool name, counts of "calls", "executions" (calls that actually ran),
+                      "coalesced" (calls that joined one in flight) and "errors".
+    """
+    def __init__(self):
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, key: str, n: int = 1):
+        counters = self.stats.setdefault(name, {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0})
+        counters[key] += n
+
+    async def do(self, name: str, args: Dict[str, Any], fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs `fn()` unless an identical call (same `name` and normalized `args`) is already running,
+        in which case its result is awaited instead.
+
+        Args:
+            name (str): Tool name.
+            args (dict): Tool arguments used to build the key.
+            fn (Callable): Zero-argument coroutine function performing the call.
+
+        Returns:
+            The call's result.
+        """
+        # Tasks belong to one event loop, so in-flight calls are tracked per loop.
+        key = (id(asyncio.get_running_loop()), make_key(name, args))
+        self._count(name, "calls")
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count(name, "coalesced")
+        else:
+            self._count(name, "executions")
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finished(name, key, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, name: str, key: tuple, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._count(name, "errors")
+
+    def in_flight(self) -> int:
+        """
+        Returns the number of distinct calls currently running.
+        """
+        return len(self._in_flight)
+
+    def coalesced_ratio(self) -> float:
+        """
+        Returns the fraction of all calls that were served by another call's execution.
+        """
+        calls = sum(c["calls"] for c in self.stats.values())
+        return sum(c["coalesced"] for c in self.stats.values()) / calls if calls else 0.0
@@ -1,11 +1,38 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from pydantic import BaseModel, Field
-from langchain_groq import ChatGroq
 from langchain_core.tools import StructuredTool
 from langchain_core.messages import HumanMessage
+import repo_path  # noqa: F401  (clients / llm_cache live at the repository root)
+from clients import get_chat_model
+from metrics import upstream
+
+# Language model for the summarizer; None uses the shared Groq LLaMA 3 8B client (see clients.py)
+model = None
+
+
+def chat_model():
+    """
+    Returns the summarizer's language model, creating the shared Groq client on first use.
+    """
+    return model if model is not None else get_chat_model()
+
+
+def call_llm(prompt: str) -> str:
+    """
+    Sends one prompt to the summarizer's model and returns the response text.
+    """
+    with upstream("groq"):
+        return chat_model().invoke([HumanMessage(content=prompt)]).content
+
+
+async def acall_llm(prompt: str) -> str:
+    """
+    Async version of `call_llm`.
+    """
+    with upstream("groq"):
+        response = await chat_model().ainvoke([HumanMessage(content=prompt)])
+    return response.content
 
-# Initialize the language model from Groq's LLaMA 3 8B 8192 model
-model = ChatGroq(model="llama3-8b-8192")
 
 class StackOverflowSummaryInput(BaseModel):
     """
@@ -29,20 +56,11 @@ class StackOverflowSummaryInput(BaseModel):
         )
     )
 
-def similarity_filter(query: str, questions: List[Dict]) -> List[Dict]:
+def similarity_prompt(query: str, questions: List[Dict]) -> str:
     """
-    Uses the language model to filter and return the most relevant Stack Overflow questions 
-    that are semantically similar to the user's query.
-    
-    Args:
-        query (str): The user's coding question or query.
-        questions (List[Dict]): List of question dicts from Stack Overflow.
-        
-    Returns:
-        List[Dict]: Filtered list of question dicts deemed relevant by the LLM.
+    Builds the prompt asking the LLM which questions are relevant to the query.
     """
-    # Construct a prompt to ask the LLM which questions are relevant
-    prompt = f"""
+    return f"""
 Given the user query: "{query}", identify which of the following questions are relevant.
 Respond with a list of the most relevant questions (1-5) that are semantically similar.
 
@@ -52,15 +70,60 @@ Questions:
 Just return the relevant questions as a new line character separated list.
 If no questions are relevant, return an empty string.
 """
-    # Invoke the LLM with the prompt
-    response = model.invoke([HumanMessage(content=prompt)]).content
-    
+
+def filter_relevant(questions: List[Dict], response: str) -> List[Dict]:
+    """
+    Keeps the questions the LLM listed in its (newline separated) response.
+    """
     # Parse the response into a list of question strings
     relevant_questions = response.strip().split('\n')
     
     # Filter the original questions list to only include those returned by the LLM
     return [q for q in questions if q['question'] in relevant_questions]
 
+def summary_prompt(query: str, relevant_data: List[Dict]) -> str:
+    """
+    Builds the prompt asking the LLM to summarize the answers of the relevant questions.
+    """
+    # Aggregate the context of relevant questions and answers
+    context = ""
+    for item in relevant_data:
+        context += f"\n\nQuestion: {item['question']}\n"
+        for ans in item['answers']:
+            context += f"Upvotes: {ans['Upvotes']}\nAnswer: {ans['Body']}\n"
+
+    return f"""
+You are a coding assistant. Summarize the most helpful and highly upvoted answers for the following user query:
+"{query}"
+
+Here are the relevant Stack Overflow answers:
+{context}
+
+Only include the most insightful and concise information. Mention if multiple solutions exist.
+"""
+
+def similarity_filter(query: str, questions: List[Dict]) -> List[Dict]:
+    """
+    Uses the language model to filter and return the most relevant Stack Overflow questions 
+    that are semantically similar to the user's query.
+    
+    Args:
+        query (str): The user's coding question or query.
+        questions (List[Dict]): List of question dicts from Stack Overflow.
+        
+    Returns:
+        List[Dict]: Filtered list of question dicts deemed relevant by the LLM.
+    """
+    response = call_llm(similarity_prompt(query, questions))
+    return filter_relevant(questions, response)
+
+async def asimilarity_filter(query: str, questions: List[Dict]) -> List[Dict]:
+    """
+    Async version of `similarity_filter`.
+    """
+    response = await acall_llm(similarity_prompt(query, questions))
+    return filter_relevant(questions, response)
+
 def summarize_answers(query: str, stackoverflow_data: List[Dict]) -> str:
     """
     Summarizes the most helpful and highly upvoted answers from relevant Stack Overflow questions 
@@ -79,30 +142,39 @@ def summarize_answers(query: str, stackoverflow_data: List[Dict]) -> str:
     if not relevant_data:
         return "No relevant Stack Overflow questions found for the query."
 
-    # Aggregate the context of relevant questions and answers
-    context = ""
-    for item in relevant_data:
-        context += f"\n\nQuestion: {item['question']}\n"
-        for ans in item['answers']:
-            context += f"Upvotes: {ans['Upvotes']}\nAnswer: {ans['Body']}\n"
+    # Call the LLM to get the summary
+    return call_llm(summary_prompt(query, relevant_data))
 
-    # Prepare a prompt to the LLM to summarize the relevant answers
-    prompt = f"""
-You are a coding assistant. Summarize the most helpful and highly upvoted answers for the following user query:
-"{query}"
+async def asummarize_answers(query: str, stackoverflow_data: List[Dict]) -> str:
+    """
+    Async version of `summarize_answers`, so the MCP server's event loop keeps serving
+    other sessions while the LLM calls are in flight.
+    """
+    summary, _ = await asummarize_with_sources(query, stackoverflow_data)
+    return summary
 
-Here are the relevant Stack Overflow answers:
-{context}
+async def asummarize_with_sources(query: str, stackoverflow_data: List[Dict]) -> Tuple[str, List[Dict]]:
+    """
+    Summarizes the relevant answers and also returns the questions the summary is based on.
 
-Only include the most insightful and concise information. Mention if multiple solutions exist.
-"""
-    # Call the LLM to get the summary
-    response = model.invoke([HumanMessage(content=prompt)])
-    return response.content
+    Args:
+        query (str): The user's coding query.
+        stackoverflow_data (List[Dict]): List of Stack Overflow questions and their answers.
+
+    Returns:
+        tuple: (summary text, relevant question dicts)
+    """
+    relevant_data = await asimilarity_filter(query, stackoverflow_data)
+
+    if not relevant_data:
+        return "No relevant Stack Overflow questions found for the query.", []
+
+    return await acall_llm(summary_prompt(query, relevant_data)), relevant_data
 
 # Create a StructuredTool instance for integration with LangChain workflows
 StackOverflowSummarizer = StructuredTool.from_function(
     func=summarize_answers,
+    coroutine=asummarize_answers,
     name="StackOverflowSummarizer",
     description=(
         "Summarizes relevant and highly upvoted Stack Overflow answers based on a user's coding query. "
@@ -0,0 +1,281 @@
+import asyncio
+import itertools
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from langchain_mcp_adapters.sessions import create_session
+from mcp import types
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+
+class _Slot:
+    """
+    One pooled session, the task that keeps it open, and the calls running on it.
+
+    Calls are tracked so that they can be failed when the session is lost instead of
+    waiting for a response that will never arrive.
+    """
+    def __init__(self):
+        self.session = None
+        self.broken = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.calls: Dict[asyncio.Future, bool] = {}
+
+    def drop_calls(self):
+        for call in self.calls:
+            self.calls[call] = True
+            call.cancel()
+
+
+class MCPSessionPool:
+    """
+    Keeps warm sessions to one or more MCP servers so agent runs do not pay for connecting,
+    initializing and listing tools on every query.
+
+    Each session is owned by a background task that opens it, keeps it open until the pool is
+    closed, and reopens it (with exponential backoff) when it fails. MCP sessions multiplex
+    requests, so many concurrent agent runs can share a small number of sessions; calls are spread
+    over them round-robin. Tool schemas are listed once per server and cached until the server
+    sends a tools/list_changed notification.
+
+    The LangChain tools return their result as a ToolMessage whose content is the text the server
+    sent and whose artifact is the tool's structured content, so chained tools can pass results on
+    without decoding the text (invoke them with a tool call to get the ToolMessage).
+
+    Usage:
+        async with MCPSessionPool({"my_server": {"transport": "streamable_http", "url": ...}}) as pool:
+            tools = await pool.get_tools()
+
+    Attributes:
+        connections (dict): langchain_mcp_adapters connection config per server name.
+        size (int): Sessions kept open per server.
+        call_timeout (float): Seconds a tool call may take before it fails.
+        connect_timeout (float): Seconds a call waits for a session when none is connected.
+        retries (int): Times a call is retried after a connection failure; a retry waits for a
+                       live session, so after a server restart it lands on a reconnected one.
+        validate_results (bool): Check structured content against the tool's output schema with
+                                 jsonschema, as ClientSession.call_tool does. Off by default: the
+                                 server already validates its output and the check costs
+                                 milliseconds per call on large results.
+    """
+    def __init__(self, connections: Dict[str, dict], size: int = 2, call_timeout: float = 120.0,
+                 connect_timeout: float = 10.0, retries: int = 2, validate_results: bool = False,
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 10.0):
+        self.connections = connections
+        self.size = size
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.validate_results = validate_results
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._slots: Dict[str, List[_Slot]] = {}
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._next: Dict[str, itertools.count] = {}
+        self._tools: Dict[str, Optional[List[BaseTool]]] = {}
+        self._tools_version: Dict[str, int] = {}
+        self._tools_lock: Optional[asyncio.Lock] = None
+        self._closing: Optional[asyncio.Event] = None
+
+    async def __aenter__(self) -> "MCPSessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """
+        Opens `size` sessions per server and waits until each server has at least one.
+        """
+        self._closing = asyncio.Event()
+        self._tools_lock = asyncio.Lock()
+        for server in self.connections:
+            self._ready[server] = asyncio.Event()
+            self._next[server] = itertools.count()
+            self._tools[server] = None
+            self._tools_version[server] = 0
+            self._slots[server] = [_Slot() for _ in range(self.size)]
+            for slot in self._slots[server]:
+                slot.task = asyncio.create_task(self._keep_open(server, slot))
+        await asyncio.gather(*(self._wait_ready(server) for server in self.connections))
+
+    async def close(self):
+        """
+        Closes every session; each is closed by the task that opened it.
+        """
+        if self._closing is None:
+            return
+        self._closing.set()
+        tasks = [slot.task for slots in self._slots.values() for slot in slots if slot.task]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._slots.clear()
+
+    def _connection(self, server: str) -> dict:
+        async def message_handler(message):
+            if isinstance(message, types.ServerNotification) and isinstance(message.root,
+                                                                            types.ToolListChangedNotification):
+                self.invalidate_tools(server)
+
+        connection = dict(self.connections[server])
+        connection["session_kwargs"] = {**connection.get("session_kwargs", {}), "message_handler": message_handler}
+        return connection
+
+    async def _keep_open(self, server: str, slot: _Slot):
+        delay = self.reconnect_delay
+        while not self._closing.is_set():
+            try:
+                async with create_session(self._connection(server)) as session:
+                    await session.initialize()
+                    slot.broken.clear()
+                    slot.session = session
+                    self._update_ready(server)
+                    delay = self.reconnect_delay
+                    await self._wait_any(self._closing, slot.broken)
+                    if slot.broken.is_set() and not self._closing.is_set():
+                        logger.warning("Reconnecting a session to %s after a failed call", server)
+                    continue
+            except Exception as e:
+                logger.warning("Session to %s failed: %r; reconnecting in %.1fs", server, e, delay)
+            finally:
+                slot.session = None
+                slot.drop_calls()
+                self._update_ready(server)
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    @staticmethod
+    async def _wait_any(*events: asyncio.Event):
+        waiters = [asyncio.ensure_future(event.wait()) for event in events]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    def _update_ready(self, server: str):
+        if server not in self._ready:
+            return
+        if any(slot.session is not None for slot in self._slots.get(server, [])):
+            self._ready[server].set()
+        else:
+            self._ready[server].clear()
+
+    async def _wait_ready(self, server: str):
+        try:
+            await asyncio.wait_for(self._ready[server].wait(), timeout=self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"No session to MCP server '{server}' after {self.connect_timeout}s") from None
+
+    async def _acquire(self, server: str) -> _Slot:
+        if server not in self._slots:
+            raise KeyError(f"Unknown MCP server '{server}'")
+        while True:
+            ready = [slot for slot in self._slots[server] if slot.session is not None]
+            if ready:
+                return ready[next(self._next[server]) % len(ready)]
+            await self._wait_ready(server)
+
+    async def call_tool(self, server: str, name: str, arguments: Optional[dict] = None, **kwargs) -> Any:
+        """
+        Calls a tool on one of `server`'s sessions, retrying on another session if the connection fails.
+
+        Errors reported by the server itself (McpError) are raised without a retry.
+
+        Returns:
+            mcp.types.CallToolResult: The raw tool result.
+        """
+        kwargs.setdefault("read_timeout_seconds", timedelta(seconds=self.call_timeout))
+        for attempt in range(self.retries + 1):
+            slot = await self._acquire(server)
+            call = asyncio.ensure_future(self._send_call(slot.session, name, arguments, **kwargs))
+            slot.calls[call] = False
+            try:
+                try:
+                    return await call
+                except asyncio.CancelledError:
+                    if not slot.calls.get(call):
+                        raise
+                    raise ConnectionError(f"Session to MCP server '{server}' was lost") from None
+                finally:
+                    slot.calls.pop(call, None)
+            except McpError:
+                raise
+            except Exception as e:
+                slot.broken.set()
+                if attempt == self.retries:
+                    raise
+                logger.warning("Call to %s.%s failed: %r; retrying on another session", server, name, e)
+
+    async def _send_call(self, session, name: str, arguments: Optional[dict], read_timeout_seconds=None,
+                         progress_callback=None) -> types.CallToolResult:
+        if self.validate_results:
+            return await session.call_tool(name, arguments, read_timeout_seconds=read_timeout_seconds,
+                                           progress_callback=progress_callback)
+        # The request ClientSession.call_tool sends, without its jsonschema check of the result
+        request = types.ClientRequest(types.CallToolRequest(
+            method="tools/call", params=types.CallToolRequestParams(name=name, arguments=arguments)))
+        return await session.send_request(request, types.CallToolResult,
+                                          request_read_timeout_seconds=read_timeout_seconds,
+                                          progress_callback=progress_callback)
+
+    def _langchain_tool(self, server: str, tool: types.Tool) -> BaseTool:
+        async def call(**arguments):
+            result = await self.call_tool(server, tool.name, arguments)
+            text = "\n".join(c.text for c in result.content if isinstance(c, types.TextContent))
+            if result.isError:
+                raise ToolException(text)
+            return text, result.structuredContent
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call,
+            response_format="content_and_artifact",
+            metadata={"server": server, "output_schema": tool.outputSchema},
+        )
+
+    def invalidate_tools(self, server: str):
+        """
+        Drops the cached tool list of `server`; the next get_tools() lists the tools again.
+        """
+        self._tools[server] = None
+        self._tools_version[server] = self._tools_version.get(server, 0) + 1
+
+    def tools_version(self) -> tuple:
+        """
+        Returns a value that changes whenever any server's tool list is invalidated.
+        """
+        return tuple(sorted(self._tools_version.items()))
+
+    async def get_tools(self, server: Optional[str] = None) -> List[BaseTool]:
+        """
+        Returns LangChain tools for `server` (or for all servers) that call through the pool.
+
+        The list is cached per server, so after the first call this costs no round trip.
+        """
+        servers = [server] if server else list(self.connections)
+        tools: List[BaseTool] = []
+        for name in servers:
+            if self._tools[name] is None:
+                async with self._tools_lock:
+                    if self._tools[name] is None:
+                        version = self._tools_version[name]
+                        slot = await self._acquire(name)
+                        listed = await slot.session.list_tools()
+                        converted = [self._langchain_tool(name, tool) for tool in listed.tools]
+                        # A change notification that arrived while listing keeps the cache empty.
+                        if self._tools_version[name] == version:
+                            self._tools[name] = converted
+                        tools.extend(converted)
+                        continue
+            tools.extend(self._tools[name])
+        return tools
@@ -1,31 +1,199 @@
+import io
+import re
+import threading
 import requests
-from langchain.tools import StructuredTool
-from bs4 import BeautifulSoup
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+from urllib.parse import urlsplit
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage, AnyMessage, AIMessage, SystemMessage, ToolMessage
 class ResearchToolInput(BaseModel):
     url: str = Field(..., description="The URL of the web page to summarize")
     lang: str = Field(..., description="The target language for the summary (like 'hi' for Hindi)")
+    single_prompt: bool = Field(False, description="Summarize and translate in one LLM call")
 
-from langchain_groq import ChatGroq
-model=ChatGroq(model='llama3-8b-8192')
+class ResearchMultiLangInput(BaseModel):
+    url: str = Field(..., description="The URL of the web page to summarize")
+    langs: List[str] = Field(..., description="The target languages for the summary (like ['hi', 'fr'])")
+
+class ResearchBatchInput(BaseModel):
+    urls: List[str] = Field(..., description="The URLs of the web pages to summarize")
+    lang: str = Field(..., description="The target language for the summaries (like 'hi' for Hindi)")
+    single_prompt: bool = Field(False, description="Summarize and translate each page in one LLM call")
+    with_digest: bool = Field(False, description="Also combine the summaries into one digest")
+
+from clients import get_chat_model
+from content_extractor import extract_main_text, full_text
+from page_cache import get_page_cache, summary_key
+from translation_memory import get_translation_memory, is_translatable, split_segments
     
 
-def text_fetcher(url: str) -> str:
+# Fetch and summarization limits; they keep latency and memory bounded however large the page is
+MAX_FETCH_BYTES = 2_000_000   # bytes downloaded per page; the rest of the body is never read
+MAX_TEXT_CHARS = 120_000      # characters of extracted text that are summarized
+CHUNK_CHARS = 12_000          # characters per summarization prompt (~3k tokens)
+MAX_CONCURRENCY = 8           # chunk summaries requested at the same time
+HTTP_TIMEOUT = 20             # seconds to connect / between received bytes
+
+# Batch research limits (research_batch)
+MAX_FETCHES = 32              # pages downloaded at the same time
+MAX_FETCHES_PER_HOST = 4      # of which at most this many from one host
+MAX_LLM_CALLS = 8             # LLM requests in flight at the same time
+
+
+def fetch_capped(url: str, max_bytes: int = MAX_FETCH_BYTES, headers: dict = None):
+    """
+    Streams a page and stops reading after `max_bytes`, so a huge page or file costs no more
+    time and memory than its first `max_bytes`.
+
+    Args:
+        url (str): Page URL.
+        max_bytes (int): Maximum number of body bytes read.
+        headers (dict): Extra request headers, e.g. conditional-request validators.
+
+    Returns:
+        tuple[int, bytes, dict]: The status (200, or 304 for a conditional request whose page
+                                 did not change), the (possibly truncated) body and the response headers.
     """
-    Fetches text from the given URL.
+    with requests.get(url, stream=True, timeout=HTTP_TIMEOUT, headers=headers) as response:
+        if response.status_code == 304:
+            return 304, b"", response.headers
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch text: {response.status_code}")
+        body = bytearray()
+        for block in response.iter_content(chunk_size=64 * 1024):
+            body += block
+            if len(body) >= max_bytes:
+                del body[max_bytes:]
+                break
+        return 200, bytes(body), response.headers
+
+
+def pdf_text(data: bytes) -> str:
+    """
+    Extracts the text of a PDF with pypdf, page by page until MAX_TEXT_CHARS.
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise Exception("Summarizing PDFs needs the pypdf package (pip install pypdf)") from None
+    pages, size = [], 0
+    # A PDF truncated by the byte cap may be unreadable; non-strict mode reads what it can
+    for page in PdfReader(io.BytesIO(data), strict=False).pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        size += len(text)
+        if size >= MAX_TEXT_CHARS:
+            break
+    return "\n\n".join(pages)
+
+
+def text_fetcher(url: str, max_bytes: int = MAX_FETCH_BYTES, main_content: bool = True) -> str:
+    """
+    Fetches text from the given URL, reading at most `max_bytes` of the page and keeping
+    at most MAX_TEXT_CHARS characters. Line breaks between blocks are kept so the text can
+    be split at paragraph boundaries.
+
+    With `main_content` only the page's article is kept (see content_extractor.py), so menus,
+    footers, cookie banners and sidebars are not sent to the LLM.
+
+    Pages are kept in the page cache (see page_cache.py) with their ETag / Last-Modified and
+    revalidated with a conditional request; an unchanged page is neither downloaded nor parsed again.
     """
-    response = requests.get(url)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        clean_text = soup.get_text()
-        return clean_text
+    cache = get_page_cache()
+    key = url if main_content else "full:" + url
+    cached = cache.get_page(key) if cache else None
+    status, data, headers = fetch_capped(url, max_bytes, cached.conditional_headers() if cached else None)
+    if status == 304 and cached:
+        cache.touch_page(key)
+        cache.count("not_modified")
+        return cached.text
 
+    content_type = headers.get("Content-Type", "")
+    if "pdf" in content_type.lower() or data.startswith(b"%PDF"):
+        clean_text = pdf_text(data)
     else:
-        raise Exception(f"Failed to fetch text: {response.status_code}")
-        
-def summarizer(text:str, model) -> str:
-    prompt=f'''
+        from bs4 import BeautifulSoup  # Deferred: only needed once a page is fetched
+        soup = BeautifulSoup(data, 'html.parser')
+        clean_text = extract_main_text(soup) if main_content else full_text(soup)
+    clean_text = clean_text[:MAX_TEXT_CHARS]
+    if cache:
+        cache.count("downloaded")
+        cache.put_page(key, clean_text, headers.get("ETag"), headers.get("Last-Modified"))
+    return clean_text
+
+
+def model_label(model) -> str:
+    # Part of the summary cache key, so switching models does not return another model's summaries
+    return getattr(model, "model_name", None) or type(model).__name__
+
+
+def cached_llm_result(kind: str, text: str, model, compute) -> str:
+    """
+    Returns compute() through the page cache's summary table, keyed by `kind`, the model and the
+    hash of `text`, so an unchanged page is not summarized (or translated) again.
+    """
+    cache = get_page_cache()
+    if cache is None:
+        return compute()
+    return cache.cached_summary(kind, text, model_label(model), compute)
+
+
+def split_long(paragraph: str, max_chars: int) -> list:
+    """
+    Splits a paragraph longer than `max_chars` at sentence ends, or hard at `max_chars` when a
+    single sentence is longer.
+    """
+    pieces, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS) -> list:
+    """
+    Packs consecutive paragraphs (lines) into chunks of at most `max_chars` characters,
+    so that no paragraph is cut unless it is longer than a chunk on its own.
+
+    Args:
+        text (str): Text with one paragraph per line.
+        max_chars (int): Maximum chunk size.
+
+    Returns:
+        list[str]: The chunks, in document order.
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in text.splitlines():
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in (split_long(paragraph, max_chars) if len(paragraph) > max_chars else [paragraph]):
+            if current and size + 1 + len(piece) > max_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            size += len(piece) + (1 if current else 0)
+            current.append(piece)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def summary_prompt(text: str) -> str:
+    return f'''
         You are a summarization model. I will provide you with a text, and your task is to summarize the main points concisely. While summarizing, please ensure to:
 
         1. Focus only on the core information, such as key arguments, facts, and findings.
@@ -37,11 +205,75 @@ def summarizer(text:str, model) -> str:
 
         {text}
     '''.strip()
-    response = model.invoke([HumanMessage(content=prompt)])
-    return response.content
 
-def translater(text:str, lang:str, model) -> str:
-    prompt=f'''
+
+def merge_prompt(summaries: str) -> str:
+    return f'''
+        You are a summarization model. Below are summaries of consecutive parts of one long article or paper, separated by blank lines. Merge them into one clear, coherent summary of the whole document:
+
+        1. Keep the core information: key arguments, facts, and findings.
+        2. Remove repetition between the parts.
+        3. Follow the order of the document.
+
+        Here are the partial summaries:
+
+        {summaries}
+    '''.strip()
+
+
+def summarizer(text:str, model, chunk_chars: int = CHUNK_CHARS, max_concurrency: int = MAX_CONCURRENCY) -> str:
+    """
+    Summarizes `text` with map-reduce: the text is split into paragraph-aligned chunks, the chunks
+    are summarized concurrently, and the partial summaries are merged (in rounds, if they do not
+    fit in one prompt). Text that fits in one chunk takes a single call, as before.
+
+    Args:
+        text (str): Text to summarize.
+        model: Chat model.
+        chunk_chars (int): Maximum characters per prompt.
+        max_concurrency (int): Maximum concurrent LLM calls.
+
+    Returns:
+        str: The summary.
+    """
+    chunks = chunk_text(text, chunk_chars)
+    if len(chunks) <= 1:
+        response = model.invoke([HumanMessage(content=summary_prompt(text))])
+        return response.content
+
+    config = {"max_concurrency": max_concurrency}
+    responses = model.batch([[HumanMessage(content=summary_prompt(chunk))] for chunk in chunks], config=config)
+    return merge_summaries([response.content for response in responses], model, chunk_chars, max_concurrency)
+
+
+def merge_summaries(summaries: list, model, chunk_chars: int = CHUNK_CHARS, max_concurrency: int = MAX_CONCURRENCY,
+                    prompt=merge_prompt) -> str:
+    """
+    Merges summaries into one with `prompt`, in rounds of prompts that fit `chunk_chars`, so any
+    number of summaries can be merged.
+    """
+    config = {"max_concurrency": max_concurrency}
+    while True:
+        # Group partial summaries into prompts that fit a chunk; each round shrinks the list
+        groups, current = [], []
+        for summary in summaries:
+            if current and sum(len(s) + 2 for s in current) + len(summary) > chunk_chars:
+                groups.append(current)
+                current = []
+            current.append(summary)
+        groups.append(current)
+        if len(groups) == len(summaries):
+            # Summaries too long to share a prompt: merge them pairwise so the rounds still converge
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        responses = model.batch([[HumanMessage(content=prompt("\n\n".join(group)))] for group in groups],
+                                config=config)
+        summaries = [response.content for response in responses]
+        if len(summaries) == 1:
+            return summaries[0]
+
+
+def translation_prompt(text: str, lang: str) -> str:
+    return f'''
         You are a translation model. I will provide you with a text, and your task is to translate it into {lang}. While translating, please ensure to:
 
         1. Maintain the original meaning and context of the text.
@@ -55,25 +287,330 @@ def translater(text:str, lang:str, model) -> str:
 
         {text}
     '''.strip()
-    response = model.invoke([HumanMessage(content=prompt)])
+
+
+def summary_translation_prompt(text: str, lang: str) -> str:
+    return f'''
+        You are a summarization and translation model. I will provide you with a text, and your task is to summarize its main points concisely and write the summary in {lang}. While doing so, please ensure to:
+
+        1. Focus only on the core information, such as key arguments, facts, and findings.
+        2. Ignore any irrelevant content such as advertisements, navigation menus, and any promotional material.
+        3. Use appropriate terminology and phrasing for the target language and ensure grammatical correctness.
+        4. Return only the summary in {lang}, without any commentary like "Here is the summary" or "Here is the translation".
+
+        Here is the text you need to summarize:
+
+        {text}
+    '''.strip()
+
+
+def segments_prompt(segments: list, lang: str) -> str:
+    numbered = "\n".join(f"<{i}> {segment}" for i, segment in enumerate(segments, 1))
+    return f'''
+        You are a translation model. I will provide you with numbered text segments, one per line, and your task is to translate each of them into {lang}. While translating, please ensure to:
+
+        1. Maintain the original meaning and context of each segment; the segments are consecutive parts of one text.
+        2. Use appropriate terminology and phrasing for the target language and ensure grammatical correctness.
+        3. If a segment is already in the target language, simply return it as is.
+        4. Answer with exactly one line per segment, in the same order, starting with the segment's number in angle brackets, like "<1> translation".
+        5. Please strictly avoid adding any commentary, explanations or extra lines.
+
+        Here are the segments you need to translate:
+
+        {numbered}
+    '''.strip()
+
+
+def parse_segments(content: str, count: int) -> dict:
+    """
+    Returns {index: translation} for the numbered lines of a reply to segments_prompt.
+    """
+    translations = {}
+    for match in re.finditer(r"^\s*<(\d+)>[ \t]?(.*\S)", content, re.M):
+        index = int(match.group(1)) - 1
+        if 0 <= index < count and index not in translations:
+            translations[index] = match.group(2).strip()
+    return translations
+
+
+def segment_groups(segments: list, max_chars: int) -> list:
+    # Consecutive segments per prompt, each prompt within max_chars
+    groups, current, size = [], [], 0
+    for segment in segments:
+        if current and size + len(segment) > max_chars:
+            groups.append(current)
+            current, size = [], 0
+        current.append(segment)
+        size += len(segment) + 8
+    if current:
+        groups.append(current)
+    return groups
+
+
+def translate_segments(text: str, langs: list, model, max_concurrency: int = MAX_CONCURRENCY,
+                       chunk_chars: int = CHUNK_CHARS) -> dict:
+    """
+    Translates `text` into every language of `langs` through the translation memory
+    (see translation_memory.py).
+
+    The text is split into sentence / line segments. Segments already translated into a language are
+    looked up, only the missing ones are sent to the LLM (numbered, in one prompt per language, or a
+    few when they do not fit one chunk), and the translation is reassembled with the original line
+    breaks. A language whose reply cannot be matched to its segments is translated as a whole text
+    instead. Without the translation memory every text is translated whole, as before.
+
+    Returns:
+        dict: Translation per language, in the order of `langs`.
+    """
+    langs = list(dict.fromkeys(langs))
+    config = {"max_concurrency": max_concurrency}
+    memory = get_translation_memory()
+    parts = split_segments(text)
+    sources = list(dict.fromkeys(part.strip() for part in parts[::2] if is_translatable(part)))
+    known = {lang: memory.lookup(lang, sources) if memory else {} for lang in langs}
+
+    jobs = [(lang, group) for lang in langs if memory
+            for group in segment_groups([source for source in sources if source not in known[lang]], chunk_chars)]
+    responses = model.batch([[HumanMessage(content=segments_prompt(group, lang))] for lang, group in jobs],
+                            config=config) if jobs else []
+    for (lang, group), response in zip(jobs, responses):
+        parsed = parse_segments(response.content, len(group))
+        translated = {group[i]: translation for i, translation in parsed.items()}
+        known[lang].update(translated)
+        memory.store(lang, translated)
+
+    translations = {}
+    for lang in langs:
+        if memory and all(source in known[lang] for source in sources):
+            # Segments keep their surrounding whitespace; separators are copied as they are
+            translations[lang] = "".join(
+                part if i % 2 or not is_translatable(part) else
+                part[:len(part) - len(part.lstrip())] + known[lang][part.strip()] + part[len(part.rstrip()):]
+                for i, part in enumerate(parts))
+    whole = [lang for lang in langs if lang not in translations]
+    if whole:
+        responses = model.batch([[HumanMessage(content=translation_prompt(text, lang))] for lang in whole],
+                                config=config)
+        translations.update((lang, response.content) for lang, response in zip(whole, responses))
+    return {lang: translations[lang] for lang in langs}
+
+
+def translater(text:str, lang:str, model, max_concurrency: int = MAX_CONCURRENCY) -> str:
+    return translate_segments(text, [lang], model, max_concurrency)[lang]
+
+
+def translate_all(text: str, langs: list, model, max_concurrency: int = MAX_CONCURRENCY) -> dict:
+    """
+    Translates `text` into every language of `langs` concurrently. Translations already in the
+    page cache are reused and only the missing ones are requested, segment by segment through the
+    translation memory.
+
+    Args:
+        text (str): Text to translate (the summary).
+        langs (list[str]): Target languages; duplicates are translated once.
+        model: Chat model.
+        max_concurrency (int): Maximum concurrent LLM calls.
+
+    Returns:
+        dict: Translation per language, in the order of `langs`.
+    """
+    langs = list(dict.fromkeys(langs))
+    cache = get_page_cache()
+    keys = {lang: summary_key(f"translation:{lang}", text, model_label(model)) for lang in langs}
+    translations = {lang: cache.get_summary(keys[lang]) for lang in langs} if cache else {}
+    missing = [lang for lang in langs if translations.get(lang) is None]
+    if missing:
+        for lang, translation in translate_segments(text, missing, model, max_concurrency).items():
+            translations[lang] = translation
+            if cache:
+                cache.put_summary(keys[lang], translation)
+    return {lang: translations[lang] for lang in langs}
+
+
+def summarize_and_translate(text: str, lang: str, model, chunk_chars: int = CHUNK_CHARS,
+                            max_concurrency: int = MAX_CONCURRENCY) -> str:
+    """
+    Summarizes `text` directly in `lang` with one LLM call instead of a summary call followed by a
+    translation call. Text longer than one chunk is summarized with map-reduce and then translated.
+    """
+    if len(chunk_text(text, chunk_chars)) > 1:
+        summary = summarizer(text, model, chunk_chars, max_concurrency)
+        return translater(summary, lang, model, max_concurrency)
+    response = model.invoke([HumanMessage(content=summary_translation_prompt(text, lang))])
     return response.content
 
-def tool_fn(url,lang) -> str:
+
+def summarize_page(text: str, lang: str, model, single_prompt: bool = False,
+                   max_concurrency: int = MAX_CONCURRENCY) -> str:
+    """
+    Summarizes a fetched page's text in `lang`. Unchanged pages hit the page cache's summary table
+    instead of the LLM.
+
+    With `single_prompt` the summary is written in `lang` by one LLM call (see summarize_and_translate).
+    Every LLM call of the page (chunk summaries, merges, translation prompts) runs at most
+    `max_concurrency` at a time.
+    """
+    if single_prompt:
+        return cached_llm_result(f"summary:{lang}", text, model,
+                                 lambda: summarize_and_translate(text, lang, model, max_concurrency=max_concurrency))
+    summary = cached_llm_result("summary", text, model,
+                                lambda: summarizer(text, model, max_concurrency=max_concurrency))
+    return cached_llm_result(f"translation:{lang}", summary, model,
+                             lambda: translater(summary, lang, model, max_concurrency))
+
+
+def tool_fn(url, lang, single_prompt: bool = False) -> str:
     """
     Main function to fetch, summarize, and translate text from a given URL.
+
+    With `single_prompt` the summary is written in `lang` by one LLM call (see summarize_and_translate).
     """
     
+    model = get_chat_model()
     text = text_fetcher(url)
-    summary = summarizer(text, model)
-    translated=translater(summary,lang, model)
+    translated = summarize_page(text, lang, model, single_prompt)
     
     return [{'Answer': translated}]
 
 
+def multi_lang_tool_fn(url: str, langs: list) -> list:
+    """
+    Fetches and summarizes the page once and translates the summary into every language concurrently.
+    A single language uses the one-call summarize+translate prompt.
+    """
+    model = get_chat_model()
+    text = text_fetcher(url)
+    langs = list(dict.fromkeys(langs))
+    if len(langs) == 1:
+        answer = cached_llm_result(f"summary:{langs[0]}", text, model,
+                                   lambda: summarize_and_translate(text, langs[0], model))
+        return [{'Language': langs[0], 'Answer': answer}]
+    summary = cached_llm_result("summary", text, model, lambda: summarizer(text, model))
+    translations = translate_all(summary, langs, model)
+    return [{'Language': lang, 'Answer': answer} for lang, answer in translations.items()]
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def interleave_hosts(urls: list) -> list:
+    """
+    Reorders `urls` round-robin over their hosts (a, b, c, a, b, c, ...), so workers waiting for a
+    busy host's connection slots do not hold up the URLs of other hosts queued behind them.
+    """
+    by_host = defaultdict(list)
+    for url in urls:
+        by_host[host_of(url)].append(url)
+    queues = list(by_host.values())
+    return [queue[i] for i in range(max(map(len, queues), default=0)) for queue in queues if i < len(queue)]
+
+
+def research_batch(urls: list, lang: str, single_prompt: bool = False, max_fetches: int = MAX_FETCHES,
+                   max_fetches_per_host: int = MAX_FETCHES_PER_HOST, max_llm_calls: int = MAX_LLM_CALLS):
+    """
+    Fetches and summarizes many pages concurrently, yielding each result as soon as it is ready.
+
+    Pages are downloaded `max_fetches` at a time, at most `max_fetches_per_host` from one host, and
+    summarized `max_llm_calls` at a time. A page holds one LLM slot for all of its calls (chunk
+    summaries, merges and translation prompts), which it makes one after the other, so at most
+    `max_llm_calls` LLM requests are in flight. Downloads keep going while the LLM
+    slots are busy, so a batch takes about as long as its LLM work (or its slowest pages) rather than
+    the sum of all fetches. A page that cannot be fetched or summarized yields an error entry and
+    does not stop the batch.
+
+    Args:
+        urls (list): Page URLs; duplicates are researched once.
+        lang (str): Target language of the summaries.
+        single_prompt (bool): Summarize and translate each page with one LLM call.
+        max_fetches (int): Maximum concurrent downloads.
+        max_fetches_per_host (int): Maximum concurrent downloads from one host.
+        max_llm_calls (int): Maximum concurrent LLM calls.
+
+    Yields:
+        dict: {'URL': url, 'Answer': summary} or {'URL': url, 'Error': message}, in completion order.
+    """
+    model = get_chat_model()
+    urls = interleave_hosts(list(dict.fromkeys(urls)))
+    fetch_slots = threading.BoundedSemaphore(max_fetches)
+    host_slots = {host: threading.BoundedSemaphore(max_fetches_per_host) for host in map(host_of, urls)}
+    llm_slots = threading.BoundedSemaphore(max_llm_calls)
+
+    def research(url: str) -> dict:
+        try:
+            with fetch_slots, host_slots[host_of(url)]:
+                text = text_fetcher(url)
+            with llm_slots:
+                return {'URL': url, 'Answer': summarize_page(text, lang, model, single_prompt, max_concurrency=1)}
+        except Exception as e:
+            return {'URL': url, 'Error': str(e)}
+
+    # Workers waiting for an LLM slot hold a fetched page, so the extra workers bound memory too
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(urls), max_fetches + max_llm_calls)))
+    try:
+        for future in as_completed([pool.submit(research, url) for url in urls]):
+            yield future.result()
+    finally:
+        # A consumer that stops early cancels the pages not started yet
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def digest_prompt(summaries: str, lang: str) -> str:
+    return f'''
+        You are a research assistant. Below are summaries of several web pages, each preceded by its URL and separated by blank lines. Write one digest of them in {lang}:
+
+        1. Group related findings across pages and point out where the pages agree or disagree.
+        2. Remove repetition between the pages.
+        3. Mention the URLs the main points come from.
+        4. Return only the digest, without any commentary like "Here is the digest".
+
+        Here are the summaries:
+
+        {summaries}
+    '''.strip()
+
+
+def digest(results: list, lang: str, model) -> str:
+    """
+    Combines the successful results of research_batch into one digest in `lang`, merging in rounds
+    when the summaries do not fit in one prompt.
+    """
+    summaries = [f"{result['URL']}\n{result['Answer']}" for result in results if 'Answer' in result]
+    if not summaries:
+        return ""
+    return merge_summaries(summaries, model, prompt=lambda text: digest_prompt(text, lang))
+
+
+def batch_tool_fn(urls: list, lang: str, single_prompt: bool = False, with_digest: bool = False) -> dict:
+    """
+    Researches every URL with research_batch and returns the results in the order of `urls`, plus a
+    combined digest when `with_digest` is set.
+    """
+    order = {url: i for i, url in enumerate(dict.fromkeys(urls))}
+    results = sorted(research_batch(urls, lang, single_prompt), key=lambda result: order[result['URL']])
+    output = {'Results': results}
+    if with_digest:
+        output['Digest'] = digest(results, lang, get_chat_model())
+    return output
+
+
 tool = StructuredTool.from_function(
     func=tool_fn,
     name="Research Summarizer",
     description="Fetches text from a URL, summarizes it, and translates it into the specified language.",
     args_schema=ResearchToolInput
 )
-    
+
+multi_lang_tool = StructuredTool.from_function(
+    func=multi_lang_tool_fn,
+    name="Multi-language Research Summarizer",
+    description="Fetches text from a URL, summarizes it once, and translates the summary into each of the given languages.",
+    args_schema=ResearchMultiLangInput
+)
+
+batch_tool = StructuredTool.from_function(
+    func=batch_tool_fn,
+    name="Batch Research Summarizer",
+    description="Fetches and summarizes many URLs concurrently in the specified language, optionally with a combined digest.",
+    args_schema=ResearchBatchInput
+)
@@ -0,0 +1,110 @@
+"""
+Measures the cold-start (import) time of the MCP server and the complex_sot tool modules.
+
+Every sample imports the module in a fresh interpreter with GROQ_API_KEY and TAVILY_API_KEY
+unset and the LLM cache disabled, so the number only covers import-time work and the import
+fails if a module builds a network client on import.
+
+Example:
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --target server --top 15   # also list the slowest imports
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+# name -> (directory put on sys.path, module imported)
+TARGETS = {
+    "server": (os.path.join(ROOT, "MCP", "server"), "server"),
+    "complex_sot": (os.path.join(ROOT, "complex_sot"), "final"),
+}
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "sys.path.insert(0, {path!r})\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def clean_env() -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k not in ("GROQ_API_KEY", "TAVILY_API_KEY")}
+    env["LLM_CACHE_DISABLED"] = "1"
+    return env
+
+
+def sample(path: str, module: str) -> float:
+    """
+    Imports `module` in a new interpreter and returns the import time in seconds.
+    """
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(path=path, module=module)],
+        cwd=path, env=clean_env(), capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{out.stderr}")
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(path: str, module: str, top: int) -> List[tuple]:
+    """
+    Returns the `top` slowest imports (cumulative microseconds, module) from `python -X importtime`.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {path!r}); import {module}"],
+        cwd=path, env=clean_env(), capture_output=True, text=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=list(TARGETS) + ["all"], default="all")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target.")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports per target.")
+    parser.add_argument("--json", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    names = list(TARGETS) if args.target == "all" else [args.target]
+    results = []
+    for name in names:
+        path, module = TARGETS[name]
+        times = sorted(sample(path, module) for _ in range(args.runs))
+        results.append({
+            "target": name,
+            "runs": len(times),
+            "min_ms": times[0] * 1000,
+            "median_ms": statistics.median(times) * 1000,
+            "max_ms": times[-1] * 1000,
+        })
+
+    print(f"{'target':<14}{'runs':>6}{'min ms':>10}{'median ms':>12}{'max ms':>10}")
+    for r in results:
+        print(f"{r['target']:<14}{r['runs']:>6}{r['min_ms']:>10.1f}{r['median_ms']:>12.1f}{r['max_ms']:>10.1f}")
+    if args.top:
+        for name in names:
+            print(f"\nSlowest imports for {name}:")
+            for cumulative, module in slowest_imports(*TARGETS[name], args.top):
+                print(f"{cumulative / 1000:>10.1f} ms  {module}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
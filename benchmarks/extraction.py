@@ -0,0 +1,168 @@
+"""
+Benchmarks the main-content extractor used by ResearchTool (content_extractor.py).
+
+For every page it reports the prompt tokens of the whole page text (what text_fetcher sent before)
+and of the extracted article, and the extraction time. Tokens are estimated as characters / 4.
+
+Without --corpus it runs on a built-in synthetic corpus: pages in a few common layouts (blog,
+news site, documentation, forum thread, table layout, page without article markup) made of known
+article paragraphs and known boilerplate (menus, cookie banner, related links, footer). For these
+it also reports how much of the article was kept (recall) and how much boilerplate got through.
+
+Example:
+    python benchmarks/extraction.py
+    python benchmarks/extraction.py --corpus saved_pages/ --save-corpus /tmp/corpus   # .html files
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from content_extractor import extract_main_text, full_text
+
+WORDS = ("the model uses a cache so that repeated requests are served locally while new requests go to "
+         "the upstream service which adds latency and cost for every call made by the agent").split()
+
+BOILERPLATE = {
+    "menu": '<nav class="top-menu"><ul>{}</ul></nav>',
+    "cookie": '<div id="cookie-consent"><p>We use cookies to improve your experience, personalise content and ads, '
+              'and analyse our traffic. By continuing you accept our cookie policy.</p><button>Accept all</button></div>',
+    "related": '<aside class="related"><h3>Related articles</h3><ul>{}</ul></aside>',
+    "footer": '<footer><p>Copyright 2024 Example Media Group, all rights reserved. Terms of use, privacy policy, '
+              'contact, careers, advertise with us.</p><ul>{}</ul></footer>',
+    "newsletter": '<div class="newsletter-signup"><p>Subscribe to our newsletter for weekly updates, tips, '
+                  'offers and news from our partners.</p><input type="email"></div>',
+}
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return (" ".join(words)).capitalize() + ", " + " ".join(rng.choice(WORDS) for _ in range(8)) + "."
+
+
+def links(rng: random.Random, n: int) -> str:
+    return "".join(f'<li><a href="/p/{rng.randint(1, 9999)}">{sentence(rng, 4)[:40]}</a></li>' for _ in range(n))
+
+
+def boilerplate(rng: random.Random) -> Dict[str, str]:
+    return {
+        "menu": BOILERPLATE["menu"].format(links(rng, 12)),
+        "cookie": BOILERPLATE["cookie"],
+        "related": BOILERPLATE["related"].format(links(rng, 8)),
+        "footer": BOILERPLATE["footer"].format(links(rng, 15)),
+        "newsletter": BOILERPLATE["newsletter"],
+    }
+
+
+def make_page(layout: str, rng: random.Random) -> Dict:
+    """
+    Returns {"name", "html", "paragraphs": article paragraphs, "noise": boilerplate snippets}.
+    """
+    paragraphs = [" ".join(sentence(rng, rng.randint(10, 25)) for _ in range(rng.randint(2, 5)))
+                  for _ in range(rng.randint(6, 14))]
+    junk = boilerplate(rng)
+    script = "<script>window.dataLayer=[];function track(e){dataLayer.push(e)}</script>"
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    if layout == "blog":
+        main = f'<div class="post-content"><h1>Post title</h1>{body}</div>'
+    elif layout == "news":
+        main = f'<article><header><h1>Headline</h1></header>{body}</article>'
+    elif layout == "docs":
+        half = len(paragraphs) // 2
+        main = "".join(f"<p>{p}</p>" for p in paragraphs[:half]) + "<pre><code>cache.get(key)</code></pre>" + \
+            "".join(f"<p>{p}</p>" for p in paragraphs[half:])
+        main = f'<main><h1>Guide</h1>{main}</main>'
+    elif layout == "forum":
+        main = "".join(f'<div class="message"><div class="message-body"><p>{p}</p></div></div>' for p in paragraphs)
+        main = f'<div id="thread">{main}</div>'
+    elif layout == "table":
+        main = f'<table><tr><td class="left">{links(rng, 10)}</td><td>{body}</td></tr></table>'
+    else:  # "bare": no article markup at all
+        main = f"<div><div>{body}</div></div>"
+    sidebar = f'<div class="sidebar">{junk["related"]}{junk["newsletter"]}</div>'
+    html = (f"<html><head><title>t</title>{script}</head><body>{junk['cookie']}{junk['menu']}"
+            f"<div class='wrapper'>{main}{sidebar}</div>{junk['footer']}{script}</body></html>")
+    noise = ["We use cookies", "Related articles", "Copyright 2024", "Subscribe to our newsletter", "dataLayer"]
+    return {"name": layout, "html": html, "paragraphs": paragraphs, "noise": noise}
+
+
+def synthetic_corpus(pages: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    layouts = ["blog", "news", "docs", "forum", "table", "bare"]
+    return [dict(make_page(layouts[i % len(layouts)], rng), name=f"{layouts[i % len(layouts)]}-{i}")
+            for i in range(pages)]
+
+
+def load_corpus(path: str) -> List[Dict]:
+    pages = []
+    for file in sorted(glob.glob(os.path.join(path, "*.htm*"))):
+        with open(file, "rb") as f:
+            pages.append({"name": os.path.basename(file), "html": f.read()})
+    return pages
+
+
+def measure(page: Dict, repeat: int) -> Dict:
+    from bs4 import BeautifulSoup
+    whole = full_text(BeautifulSoup(page["html"], "html.parser"))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract_main_text(page["html"])
+        times.append(time.perf_counter() - start)
+    row = {"page": page["name"], "tokens_before": len(whole) // 4, "tokens_after": len(text) // 4,
+           "extract_ms": statistics.median(times) * 1000}
+    if "paragraphs" in page:
+        row["recall"] = sum(p in text for p in page["paragraphs"]) / len(page["paragraphs"])
+        row["noise_kept"] = sum(n in text for n in page["noise"]) / len(page["noise"])
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved .html pages (default: synthetic corpus).")
+    parser.add_argument("--pages", type=int, default=24, help="Pages in the synthetic corpus.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5, help="Extractions per page; the median time is reported.")
+    parser.add_argument("--save-corpus", help="Write the synthetic pages as .html files to this directory.")
+    parser.add_argument("--json", help="Write the per-page results as JSON to this path.")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.pages, args.seed)
+    if args.save_corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        for page in pages:
+            with open(os.path.join(args.save_corpus, page["name"] + ".html"), "w") as f:
+                f.write(page["html"] if isinstance(page["html"], str) else page["html"].decode("utf-8", "replace"))
+    rows = [measure(page, args.repeat) for page in pages]
+
+    quality = "recall" in rows[0]
+    print(f"{'page':<24}{'tokens before':>14}{'after':>8}{'cut':>7}{'ms':>8}" + (f"{'recall':>8}{'noise':>7}" if quality else ""))
+    for r in rows:
+        cut = 1 - r["tokens_after"] / r["tokens_before"] if r["tokens_before"] else 0.0
+        line = f"{r['page'][:23]:<24}{r['tokens_before']:>14}{r['tokens_after']:>8}{cut:>7.0%}{r['extract_ms']:>8.1f}"
+        if quality:
+            line += f"{r['recall']:>8.0%}{r['noise_kept']:>7.0%}"
+        print(line)
+    before = sum(r["tokens_before"] for r in rows)
+    after = sum(r["tokens_after"] for r in rows)
+    print(f"\n{len(rows)} pages: {before} -> {after} tokens ({1 - after / before:.0%} fewer), "
+          f"median extraction {statistics.median(r['extract_ms'] for r in rows):.1f} ms")
+    if quality:
+        print(f"article kept {statistics.mean(r['recall'] for r in rows):.1%}, "
+              f"boilerplate kept {statistics.mean(r['noise_kept'] for r in rows):.1%}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Offline throughput / latency benchmark for the Stack Overflow pipeline.
+
+Scenarios:
+    agent         - the complex_sot Agent graph, end to end.
+    server_tools  - the three async MCP server tools awaited in process (get_urls -> stack_overflow -> summarize).
+    mcp_client    - the MCP/final.py Agent talking to a stubbed MCP server over streamable HTTP.
+    all           - every scenario above, each in its own process.
+
+Groq, Tavily and Stack Exchange are replaced by the stand-ins in stubs.py, so the
+benchmark runs on a laptop without network access or API keys.
+
+Example:
+    python benchmarks/run_benchmark.py --scenario all --requests 100 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SCENARIOS = ["agent", "server_tools", "mcp_client"]
+
+QUESTIONS = [
+    "How to reverse a string in Python?",
+    "How do I reverse a list in Python?",
+    "Reverse a string without using slicing",
+    "Why does my string reversal skip the first letter?",
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    idx = max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[idx]
+
+
+def peak_rss_mb(pid: int = None) -> float:
+    """
+    Peak resident set size of this process (or of `pid`, on Linux) in MiB.
+    """
+    if pid is not None:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS.
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def report(name: str, latencies: List[float], wall: float, errors: int) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    result = {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "qps": len(latencies) / wall if wall else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if tracemalloc.is_tracing():
+        result["heap_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    return result
+
+
+def with_cache_stats(result: Dict[str, float], llm_cache) -> Dict[str, float]:
+    if llm_cache is not None:
+        result["llm_cache_hit_ratio"] = llm_cache.hit_ratio()
+    return result
+
+
+def run_load(call: Callable[[int], None], requests: int, concurrency: int):
+    """
+    Runs `call(i)` for i in range(requests) on a thread pool and times every call.
+
+    Returns:
+        tuple: (latencies in seconds, wall time in seconds, number of failed calls)
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    if errors:
+        print(f"{len(errors)} request(s) failed, first error: {errors[0]!r}", file=sys.stderr)
+    return latencies, wall, len(errors)
+
+
+def run_async_load(call: Callable[[int], Awaitable[None]], requests: int, concurrency: int):
+    """
+    Awaits `call(i)` for i in range(requests) from `concurrency` tasks on one event loop and times every call.
+
+    Returns:
+        tuple: (latencies in seconds, wall time in seconds, number of failed calls)
+    """
+    latencies, errors = [], []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception as e:
+                errors.append(e)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    async def run_all():
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    wall = asyncio.run(run_all())
+    if errors:
+        print(f"{len(errors)} request(s) failed, first error: {errors[0]!r}", file=sys.stderr)
+    return latencies, wall, len(errors)
+
+
+def prepare_environment(se_url: str):
+    # Clients are created lazily and replaced by stubs below; dummy keys guard any stray client creation.
+    os.environ["STACKEXCHANGE_API_URL"] = se_url
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "offline-benchmark")
+    # Entry points install the shared LLM cache; only keep it when asked to measure it.
+    if not os.getenv("LLM_CACHE_PATH"):
+        os.environ["LLM_CACHE_DISABLED"] = "1"
+
+
+def bench_agent(args, se_url: str) -> Dict[str, float]:
+    from stubs import FakeChatModel, FakeTavily
+    prepare_environment(se_url)
+    sys.path.insert(0, os.path.join(ROOT, "complex_sot"))
+    import get_urls
+    import summarizer
+    from StackOverflow import Stack_overflow_tool
+    from final import Agent
+    from answer_quality import QualityGate
+    from llm_cache import enable_llm_cache
+    llm_cache = enable_llm_cache()
+
+    get_urls.search_tool = FakeTavily(latency=args.search_latency)
+    search_cache = get_urls.SearchCache() if args.search_cache else None  # Shared by the worker threads' agents
+    summarizer.model = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+    model = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+    tools = [get_urls.get_url_tool, Stack_overflow_tool, summarizer.StackOverflowSummarizer]
+
+    # One Agent per worker thread, so the requests do not share its tool, branch and prefetch pools.
+    local = threading.local()
+    quality_gate = QualityGate(enabled=not args.always_refine)
+
+    def one(i):
+        if not hasattr(local, "agent"):
+            local.agent = Agent(model, tools, system="You are a helpful assistant", fan_out=args.fan_out,
+                                quality_gate=quality_gate, prefetch=not args.no_prefetch,
+                                search_cache=search_cache)
+        local.agent.run(QUESTIONS[i % len(QUESTIONS)])  # Each run gets (and cancels) its own prefetcher
+
+    result = with_cache_stats(report("agent", *run_load(one, args.requests, args.concurrency)), llm_cache)
+    if quality_gate.enabled:
+        result["refine_skip_ratio"] = quality_gate.skip_ratio()
+    return result
+
+
+def bench_server_tools(args, se_url: str) -> Dict[str, float]:
+    from stubs import FakeChatModel, FakeTavily
+    prepare_environment(se_url)
+    sys.path.insert(0, os.path.join(ROOT, "MCP", "server"))
+    import get_urls
+    import summarizer
+    import server
+
+    server.logger.setLevel("WARNING")
+    get_urls.search_tool = FakeTavily(latency=args.search_latency)
+    summarizer.model = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+
+    async def one(i):
+        query = QUESTIONS[i % len(QUESTIONS)]
+        urls = await server.get_urls(query)
+        answers = await server.stack_overflow(urls)
+        summary = await server.summarize_stack_overflow(query, answers)
+        if "error" in summary:
+            raise RuntimeError(summary["error"])
+
+    result = with_cache_stats(report("server_tools", *run_async_load(one, args.requests, args.concurrency)),
+                              server.llm_cache)
+    result["coalesced_ratio"] = server.coalescer.coalesced_ratio()
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"MCP server did not start on port {port}")
+
+
+def bench_mcp_client(args, se_url: str) -> Dict[str, float]:
+    from stubs import FakeChatModel
+    prepare_environment(se_url)
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "stub_mcp_server.py"), "--port", str(port), "--se-url", se_url,
+         "--llm-latency", str(args.llm_latency), "--tokens-per-second", str(args.tokens_per_second),
+         "--search-latency", str(args.search_latency), "--workers", str(args.server_workers),
+         "--parse-processes", str(args.parse_processes)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(port)
+        sys.path.insert(0, os.path.join(ROOT, "MCP"))
+        from langchain_core.messages import HumanMessage
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+        from langchain_mcp_adapters.tools import load_mcp_tools
+        import final
+        from session_pool import MCPSessionPool
+
+        model = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+        connections = {"bench": {"transport": "streamable_http", "url": f"http://127.0.0.1:{port}/mcp"}}
+        counter = iter(range(args.requests))
+        latencies, errors = [], []
+
+        def select(lc_tools):
+            if args.no_pipeline_tool:
+                return [t for t in lc_tools if t.name != final.PIPELINE_TOOL]
+            return lc_tools
+
+        async def timed(answer, question):
+            start = time.perf_counter()
+            try:
+                await answer(question)
+            except Exception as e:
+                errors.append(e)
+                return
+            latencies.append(time.perf_counter() - start)
+
+        async def pooled_worker(agent):
+            async def answer(question):
+                await agent.graph.ainvoke({"messages": [HumanMessage(content=question)]})
+            for i in counter:
+                await timed(answer, QUESTIONS[i % len(QUESTIONS)])
+
+        async def per_query_worker():
+            # What MCP/final.py used to do for every question: connect, list tools, build the agent.
+            client = MultiServerMCPClient(connections=connections)
+
+            async def answer(question):
+                async with client.session("bench") as session:
+                    agent = final.Agent(model, select(await load_mcp_tools(session)), system="You are a helpful assistant.")
+                    await agent.graph.ainvoke({"messages": [HumanMessage(content=question)]})
+            for i in counter:
+                await timed(answer, QUESTIONS[i % len(QUESTIONS)])
+
+        async def run_workers():
+            if args.no_session_pool:
+                await asyncio.gather(*(per_query_worker() for _ in range(args.concurrency)))
+                return
+            async with MCPSessionPool(connections, size=args.sessions) as pool:
+                agent = final.Agent(model, select(await pool.get_tools()), system="You are a helpful assistant.")
+                await asyncio.gather(*(pooled_worker(agent) for _ in range(args.concurrency)))
+
+        async def run_all():
+            start = time.perf_counter()
+            await run_workers()
+            return time.perf_counter() - start
+
+        wall = asyncio.run(run_all())
+        if errors:
+            print(f"{len(errors)} request(s) failed, first error: {errors[0]!r}", file=sys.stderr)
+        result = report("mcp_client", latencies, wall, len(errors))
+        result["server_peak_rss_mb"] = peak_rss_mb(proc.pid)
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+BENCHMARKS = {"agent": bench_agent, "server_tools": bench_server_tools, "mcp_client": bench_mcp_client}
+
+
+def run_in_subprocess(scenario: str, argv: List[str]) -> Dict[str, float]:
+    # The complex_sot and MCP/server tool modules share names, so each scenario gets its own interpreter.
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), *argv, "--scenario", scenario, "--json", out],
+                       check=True, stdout=subprocess.DEVNULL)
+        with open(out) as f:
+            return json.load(f)[0]
+    finally:
+        os.unlink(out)
+
+
+def print_table(results: List[Dict[str, float]]):
+    print(f"{'scenario':<14}{'requests':>9}{'errors':>8}{'qps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MiB':>10}")
+    for r in results:
+        print(f"{r['scenario']:<14}{r['requests']:>9}{r['errors']:>8}{r['qps']:>9.2f}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['peak_rss_mb']:>10.1f}")
+    for r in results:
+        if "llm_cache_hit_ratio" in r:
+            print(f"{r['scenario']}: LLM cache hit ratio {r['llm_cache_hit_ratio']:.2f}")
+        if "coalesced_ratio" in r:
+            print(f"{r['scenario']}: {r['coalesced_ratio']:.0%} of tool calls joined an identical call in flight")
+        if "refine_skip_ratio" in r:
+            print(f"{r['scenario']}: refine_answer skipped for {r['refine_skip_ratio']:.0%} of answers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--requests", type=int, default=50, help="Total requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests in flight.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM time-to-first-token (s).")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Fake LLM generation speed.")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Fake Tavily latency (s).")
+    parser.add_argument("--se-latency", type=float, default=0.05, help="Stack Exchange replay latency (s).")
+    parser.add_argument("--se-fixtures", help="Recorded Stack Exchange JSON ({'questions': ..., 'answers': ...}).")
+    parser.add_argument("--fan-out", action="store_true", help="Fetch URLs as parallel branches in the agent scenario.")
+    parser.add_argument("--always-refine", action="store_true",
+                        help="Disable the agent's quality gate so every answer goes through refine_answer.")
+    parser.add_argument("--no-prefetch", action="store_true",
+                        help="Fetch Stack Overflow questions only in the stack_overflow step, not speculatively.")
+    parser.add_argument("--search-cache", action="store_true",
+                        help="Give the agents an in-process search cache (repeated questions skip the search).")
+    parser.add_argument("--llm-cache", action="store_true",
+                        help="Serve repeated LLM prompts from a fresh SQLite cache shared by all scenarios.")
+    parser.add_argument("--no-pipeline-tool", action="store_true",
+                        help="Make the MCP client call the three tools separately instead of answer_query.")
+    parser.add_argument("--no-session-pool", action="store_true",
+                        help="Open a session, list tools and build the agent per query in the mcp_client scenario.")
+    parser.add_argument("--sessions", type=int, default=2, help="Pooled MCP sessions in the mcp_client scenario.")
+    parser.add_argument("--server-workers", type=int, default=1,
+                        help="MCP server worker processes in the mcp_client scenario.")
+    parser.add_argument("--parse-processes", type=int, default=0,
+                        help="HTML parsing processes per MCP server worker in the mcp_client scenario.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak (slower).")
+    parser.add_argument("--json", help="Write the results as JSON to this path.")
+    args, _ = parser.parse_known_args()
+    if args.llm_cache and not os.getenv("LLM_CACHE_PATH"):
+        os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="llm_cache_"), "cache.sqlite")
+
+    if args.scenario == "all":
+        argv = [a for a in sys.argv[1:]]
+        # Drop the outer --scenario/--json so the children get their own.
+        for flag in ("--scenario", "--json"):
+            while flag in argv:
+                i = argv.index(flag)
+                del argv[i:i + 2]
+        results = [run_in_subprocess(s, argv) for s in SCENARIOS]
+    else:
+        from stubs import StackExchangeReplayServer
+        if args.tracemalloc:
+            tracemalloc.start()
+        if args.se_fixtures:
+            replay = StackExchangeReplayServer.from_file(args.se_fixtures, latency=args.se_latency)
+        else:
+            replay = StackExchangeReplayServer(latency=args.se_latency)
+        with replay:
+            results = [BENCHMARKS[args.scenario](args, replay.url)]
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
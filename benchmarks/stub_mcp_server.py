@@ -0,0 +1,75 @@
+"""
+Runs MCP/server/server.py with the offline stand-ins from stubs.py installed.
+
+Started as a subprocess by run_benchmark.py for the `mcp_client` scenario.
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+
+def install_stubs():
+    """
+    Imports the MCP server with the fake search tool and chat model installed.
+
+    Settings come from environment variables so that worker processes started by uvicorn,
+    which import this module afresh, get the same stubs.
+
+    Returns:
+        module: The imported `server` module.
+    """
+    sys.path.insert(0, os.path.join(ROOT, "MCP", "server"))
+    from stubs import FakeChatModel, FakeTavily
+    import get_urls
+    import summarizer
+    import server
+
+    get_urls.search_tool = FakeTavily(latency=float(os.environ["BENCH_SEARCH_LATENCY"]))
+    summarizer.model = FakeChatModel(latency=float(os.environ["BENCH_LLM_LATENCY"]),
+                                     tokens_per_second=float(os.environ["BENCH_TOKENS_PER_SECOND"]))
+    server.mcp.settings.log_level = "WARNING"
+    server.logger.setLevel("WARNING")
+    return server
+
+
+def create_app():
+    """
+    App factory run by every worker process in `--workers` mode.
+    """
+    return install_stubs().create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--se-url", required=True, help="Base URL of the Stack Exchange replay server.")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--search-latency", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes.")
+    parser.add_argument("--parse-processes", type=int, default=0, help="HTML parsing processes per worker.")
+    args = parser.parse_args()
+
+    # The Stack Exchange URL is read at import time; dummy keys guard any stray client creation.
+    os.environ["STACKEXCHANGE_API_URL"] = args.se_url
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "offline-benchmark")
+    os.environ["BENCH_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ["BENCH_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["BENCH_SEARCH_LATENCY"] = str(args.search_latency)
+    os.environ["PARSE_PROCESSES"] = str(args.parse_processes)
+
+    server = install_stubs()
+    if args.workers > 1:
+        server.run_workers(args.workers, host="127.0.0.1", port=args.port, app="stub_mcp_server:create_app")
+    else:
+        server.mcp.settings.host = "127.0.0.1"
+        server.mcp.settings.port = args.port
+        server.mcp.run(transport="streamable-http")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Offline stand-ins for the external services used by the Stack Overflow pipeline.
+
+* FakeChatModel              - a LangChain chat model with configurable latency and token rate.
+* FakeTavily                 - a drop-in for TavilySearchResults returning fixed Stack Overflow URLs.
+* StackExchangeReplayServer  - a local HTTP server replaying Stack Exchange API JSON.
+
+Nothing in this module touches the network beyond 127.0.0.1.
+"""
+import ast
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Question ids served by the replay server and returned by FakeTavily.
+DEFAULT_QUESTION_IDS = [931092, 53381080, 65429384, 75410298, 68493773, 71972556, 40572550]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that sleeps instead of calling an API.
+
+    The simulated latency of a call is `latency + output_tokens / tokens_per_second`.
+    When tools are bound, the model asks for the first tool with the user's question,
+    mirroring how the agent's LLM node behaves. For the summarizer's similarity prompt
+    it echoes back every candidate question so the pipeline keeps going.
+
+    Attributes:
+        model_name (str): Name reported in the LLM cache key and response metadata.
+        latency (float): Fixed time-to-first-token in seconds.
+        tokens_per_second (float): Simulated generation speed.
+        output_tokens (int): Number of tokens in every canned answer.
+    """
+    model_name: str = "fake-chat"
+    latency: float = 0.05
+    tokens_per_second: float = 500.0
+    output_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _delay(self) -> float:
+        return self.latency + self.output_tokens / self.tokens_per_second
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[list]) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        usage = {
+            "input_tokens": len(prompt) // 4,
+            "output_tokens": self.output_tokens,
+            "total_tokens": len(prompt) // 4 + self.output_tokens,
+        }
+        humans = [m for m in messages if isinstance(m, HumanMessage)]
+        if tools and humans:
+            name = tools[0]["function"]["name"]
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": name, "args": {"query": humans[-1].content}, "id": f"call_{random.getrandbits(32):08x}"}],
+                usage_metadata=usage,
+            )
+
+        match = re.search(r"Questions:\n(\[.*\])", prompt)
+        if match:
+            try:
+                return AIMessage(content="\n".join(ast.literal_eval(match.group(1))), usage_metadata=usage)
+            except (ValueError, SyntaxError):
+                pass
+
+        body = " ".join(["token"] * self.output_tokens)
+        content = (
+            "Use slicing with a negative step:\n\n```python\ns[::-1]\n```\n\n"
+            f"{body}\n\nSource: https://stackoverflow.com/a/931095"
+        )
+        return AIMessage(content=content, usage_metadata=usage)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+
+class FakeTavily:
+    """
+    Replacement for TavilySearchResults returning a fixed list of Stack Overflow results.
+
+    Attributes:
+        question_ids (list[int]): Question ids to build result URLs from.
+        latency (float): Simulated search latency in seconds.
+    """
+    name = "tavily_search_results_json"
+
+    def __init__(self, question_ids: Optional[List[int]] = None, latency: float = 0.1):
+        self.question_ids = question_ids or DEFAULT_QUESTION_IDS
+        self.latency = latency
+
+    def _results(self, query: str) -> List[Dict[str, str]]:
+        return [
+            {
+                "url": f"https://stackoverflow.com/questions/{qid}/question-{qid}",
+                "title": f"Question {qid}",
+                "content": query,
+            }
+            for qid in self.question_ids
+        ]
+
+    def run(self, query: str, **kwargs) -> List[Dict[str, str]]:
+        time.sleep(self.latency)
+        return self._results(query)
+
+    def invoke(self, query, config=None, **kwargs) -> List[Dict[str, str]]:
+        return self.run(query if isinstance(query, str) else query.get("query", ""))
+
+    async def ainvoke(self, query, config=None, **kwargs) -> List[Dict[str, str]]:
+        await asyncio.sleep(self.latency)
+        return self._results(query if isinstance(query, str) else query.get("query", ""))
+
+
+def build_fixtures(question_ids: Optional[List[int]] = None, answers_per_question: int = 6,
+                   body_bytes: int = 2000) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds deterministic Stack Exchange API payloads for the given question ids.
+
+    Args:
+        question_ids (list[int] | None): Question ids to generate payloads for.
+        answers_per_question (int): Number of answers per question.
+        body_bytes (int): Approximate size of every answer's HTML body.
+
+    Returns:
+        dict: {"questions": {id: payload}, "answers": {id: payload}} in the API's JSON shape.
+    """
+    questions, answers = {}, {}
+    for qid in question_ids or DEFAULT_QUESTION_IDS:
+        questions[str(qid)] = {"items": [{"question_id": qid, "title": f"Question {qid}", "body": "<p>?</p>"}]}
+        items = []
+        for i in range(answers_per_question):
+            paragraph = f"<p>Answer {i} for question {qid}: use <code>s[::-1]</code>.</p>"
+            items.append({
+                "answer_id": qid * 100 + i,
+                "score": answers_per_question * 10 - i,
+                "body": paragraph * max(1, body_bytes // len(paragraph)),
+            })
+        answers[str(qid)] = {"items": items}
+    return {"questions": questions, "answers": answers}
+
+
+class StackExchangeReplayServer:
+    """
+    Serves `/2.3/questions/{id}` and `/2.3/questions/{id}/answers` from fixtures on 127.0.0.1.
+
+    Point the tools at it by setting STACKEXCHANGE_API_URL to `server.url`.
+
+    Attributes:
+        fixtures (dict): Payloads as returned by `build_fixtures` or loaded from a recording.
+        latency (float): Simulated upstream latency per request in seconds.
+        url (str): Base API URL once the server has started.
+    """
+    def __init__(self, fixtures: Optional[Dict[str, Dict[str, Any]]] = None, latency: float = 0.05, port: int = 0):
+        self.fixtures = fixtures or build_fixtures()
+        self.latency = latency
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/2.3"
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "StackExchangeReplayServer":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(replay.latency)
+                match = re.fullmatch(r"/2\.3/questions/(\d+)(/answers)?", urlparse(self.path).path)
+                table = "answers" if match and match.group(2) else "questions"
+                payload = replay.fixtures[table].get(match.group(1)) if match else None
+                body = json.dumps(payload or {"items": []}).encode()
+                self.send_response(200 if match else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StackExchangeReplayServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
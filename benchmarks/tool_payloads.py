@@ -0,0 +1,164 @@
+"""
+Microbenchmark of passing one tool result from the MCP server to the next tool in MCP/final.py.
+
+For a synthetic stack_overflow result (questions with their top answers) it times, per call:
+    server  - FastMCP turning the tool's return value into a CallToolResult and the SDK's output
+              validation, plus encoding the JSON-RPC response.
+    client  - decoding the JSON-RPC response into a CallToolResult.
+    agent   - what Agent.take_action_for does with it: getting an object to hand to the next tool
+              and building the ToolMessage.
+
+Variants:
+    before         - the server's `-> dict` tools send text; the agent json.loads it and puts the
+                     object in the ToolMessage, whose content becomes str() of the dict.
+    after          - the same server output; the agent decodes it once with codec.py (orjson) and
+                     keeps the text as the ToolMessage content and the object as its artifact.
+    typed          - Pydantic return types: the SDK adds structured content and validates it against
+                     the output schema with jsonschema on the server and, with ClientSession.call_tool,
+                     on the client (`typed_validated`).
+    open_schema    - `-> dict[str, Any]` tools: structured content with an open output schema.
+
+No network or MCP server is involved; everything runs in process.
+
+Example:
+    python benchmarks/tool_payloads.py --questions 7 --answer-bytes 1500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "MCP"))
+
+import jsonschema
+from langchain_core.messages import ToolMessage
+from mcp import types
+from mcp.server.fastmcp.utilities.func_metadata import func_metadata
+from pydantic import BaseModel
+
+import codec
+
+
+# The stack_overflow result as Pydantic return types, for the structured-content variants
+class Answer(BaseModel):
+    Upvotes: int
+    Body: str
+    Link: str
+
+
+class Question(BaseModel):
+    question: str
+    link: str
+    answers: List[Union[Answer, str]]
+
+
+class QuestionsResult(BaseModel):
+    result: List[Question] = []
+    error: Optional[str] = None
+
+
+def make_result(questions: int, answer_bytes: int) -> dict:
+    body = "<p>" + "word " * (answer_bytes // 5) + "</p><pre><code>s[::-1]</code></pre>"
+    return {"result": [
+        {"question": f"Question {q}", "link": f"https://stackoverflow.com/questions/{q}/question-{q}",
+         "answers": [{"Upvotes": 100 - a, "Body": body, "Link": f"https://stackoverflow.com/a/{q}{a}"}
+                     for a in range(4)]}
+        for q in range(questions)
+    ]}
+
+
+async def dict_tool(urls: dict) -> dict: ...
+async def typed_tool(urls: dict) -> QuestionsResult: ...
+async def open_tool(urls: dict) -> Dict[str, Any]: ...
+
+
+def server_encode(metadata, result: dict) -> str:
+    # FuncMetadata.convert_result, then the low-level server's output validation and response encoding
+    converted = metadata.convert_result(result)
+    if metadata.output_schema is None:
+        content, structured = converted, None
+    else:
+        content, structured = converted
+        jsonschema.validate(instance=structured, schema=metadata.output_schema)
+    response = types.JSONRPCResponse(jsonrpc="2.0", id=1, result=types.CallToolResult(
+        content=list(content), structuredContent=structured).model_dump(by_alias=True, mode="json", exclude_none=True))
+    return response.model_dump_json(by_alias=True, exclude_none=True)
+
+
+def client_decode(wire: str) -> types.CallToolResult:
+    message = types.JSONRPCMessage.model_validate_json(wire)
+    return types.CallToolResult.model_validate(message.root.result)
+
+
+def agent_before(result: types.CallToolResult) -> ToolMessage:
+    obj = json.loads(result.content[0].text)
+    return ToolMessage(tool_call_id="1", name="stack_overflow", content=obj)
+
+
+def agent_after(result: types.CallToolResult) -> ToolMessage:
+    text = result.content[0].text
+    return ToolMessage(tool_call_id="1", name="stack_overflow", content=text, artifact=codec.loads(text))
+
+
+def agent_structured(result: types.CallToolResult) -> ToolMessage:
+    return ToolMessage(tool_call_id="1", name="stack_overflow", content=result.content[0].text,
+                       artifact=result.structuredContent)
+
+
+def timeit(fn: Callable, seconds: float) -> float:
+    """
+    Returns the mean time of `fn()` in microseconds, running it for about `seconds`.
+    """
+    fn()
+    runs, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        runs += 1
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=7)
+    parser.add_argument("--answer-bytes", type=int, default=1500, help="Approximate size of one answer body.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time spent per measurement.")
+    parser.add_argument("--json", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    result = make_result(args.questions, args.answer_bytes)
+    schema = func_metadata(typed_tool).output_schema
+    variants = {
+        "before": (func_metadata(dict_tool), agent_before),
+        "after": (func_metadata(dict_tool), agent_after),
+        "typed": (func_metadata(typed_tool), agent_structured),
+        "typed_validated": (func_metadata(typed_tool),
+                            lambda r: (jsonschema.validate(r.structuredContent, schema), agent_structured(r))),
+        "open_schema": (func_metadata(open_tool), agent_structured),
+    }
+
+    rows = []
+    for name, (metadata, agent) in variants.items():
+        wire = server_encode(metadata, result)
+        decoded = client_decode(wire)
+        server_us = timeit(lambda: server_encode(metadata, result), args.seconds)
+        client_us = timeit(lambda: client_decode(wire), args.seconds)
+        agent_us = timeit(lambda: agent(decoded), args.seconds)
+        rows.append({"variant": name, "wire_kb": len(wire) / 1024, "server_us": server_us, "client_us": client_us,
+                     "agent_us": agent_us, "total_us": server_us + client_us + agent_us})
+
+    print(f"payload: {len(json.dumps(result)) / 1024:.1f} KiB of JSON, orjson {'on' if codec.orjson else 'off'}")
+    print(f"{'variant':<17}{'wire KiB':>10}{'server us':>11}{'client us':>11}{'agent us':>10}{'total us':>10}")
+    for r in rows:
+        print(f"{r['variant']:<17}{r['wire_kb']:>10.1f}{r['server_us']:>11.0f}{r['client_us']:>11.0f}"
+              f"{r['agent_us']:>10.0f}{r['total_us']:>10.0f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Groq model used by the tool modules unless told otherwise
+DEFAULT_CHAT_MODEL = "llama3-8b-8192"
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model_name: str = DEFAULT_CHAT_MODEL):
+    """
+    Returns the process-wide ChatGroq client for a model, creating it on first use.
+
+    The langchain_groq import and the client (which needs GROQ_API_KEY) are deferred until
+    the first LLM call, so importing the tool modules stays fast and works offline.
+
+    Args:
+        model_name (str): Groq model name.
+
+    Returns:
+        ChatGroq: Shared client for `model_name`.
+    """
+    from langchain_groq import ChatGroq
+    return ChatGroq(model=model_name)
+
+
+@lru_cache(maxsize=None)
+def get_search_tool(max_results: int = 10):
+    """
+    Returns the process-wide Tavily search tool, creating it on first use.
+
+    Args:
+        max_results (int): Maximum number of search results.
+
+    Returns:
+        TavilySearchResults: Shared search tool (needs TAVILY_API_KEY).
+    """
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    return TavilySearchResults(max_results=max_results)
+
+
+# Shared async HTTP clients, one per event loop (an httpx.AsyncClient must stay on the loop that opened it)
+_async_http_clients = weakref.WeakKeyDictionary()
+
+# Connection pool limits of the shared async HTTP client
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 20
+
+
+def get_async_http_client():
+    """
+    Returns the pooled httpx.AsyncClient shared by every request served on the running event loop.
+
+    Returns:
+        httpx.AsyncClient: Shared client with keep-alive connections.
+    """
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+            headers={"Accept-Encoding": "gzip"},
+        )
+        _async_http_clients[loop] = client
+    return client
+
+
+async def aclose_http_client():
+    """
+    Closes the shared async HTTP client of the running event loop, if one was created.
+    """
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_parse_pool():
+    """
+    Returns the process pool used for HTML parsing, sized by the PARSE_PROCESSES environment
+    variable, or None when it is unset or 0 (parsing then runs in threads of the serving process).
+
+    Parsing in separate processes sidesteps the GIL, so one busy request's BeautifulSoup
+    work does not slow down the event loop's other requests.
+
+    Returns:
+        ProcessPoolExecutor | None: Shared pool with PARSE_PROCESSES workers.
+    """
+    processes = int(os.getenv("PARSE_PROCESSES", "0"))
+    if processes <= 0:
+        return None
+    return ProcessPoolExecutor(max_workers=processes)
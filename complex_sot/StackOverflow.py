@@ -1,14 +1,18 @@
+import os
 import re
 from typing import List
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
-from langchain.tools import StructuredTool
+from langchain_core.tools import StructuredTool
 import requests
-from bs4 import BeautifulSoup
-from langchain_groq import ChatGroq
+from instrumentation import record_http
+from deadline import check as check_deadline, http_timeout
 
-# Initialize the Groq model (LLaMA 3)
-model = ChatGroq(model='llama3-8b-8192')
+# Base URL of the Stack Exchange API (overridable to point at a local replay server)
+STACKEXCHANGE_API_URL = os.getenv("STACKEXCHANGE_API_URL", "https://api.stackexchange.com/2.3")
+
+# Seconds before a Stack Exchange request is abandoned (further capped by the run's deadline)
+HTTP_TIMEOUT = 10
 
 
 class StackOverFlowToolInput(BaseModel):
@@ -47,10 +51,31 @@ def beautify_html_body(body):
     Returns:
         str: Plain text content.
     """
+    from bs4 import BeautifulSoup  # Deferred: only needed once answers are fetched
     soup = BeautifulSoup(body, "html.parser")
     return soup.get_text()
 
 
+def stack_exchange_get(url, params):
+    """
+    Performs a Stack Exchange API request bounded by HTTP_TIMEOUT and the run's deadline.
+
+    Args:
+        url (str): API endpoint.
+        params (dict): Query parameters.
+
+    Returns:
+        requests.Response | None: The response, or None if the request timed out.
+    """
+    try:
+        response = requests.get(url, params=params, timeout=http_timeout(HTTP_TIMEOUT))
+    except requests.Timeout:
+        check_deadline()  # An expired run surfaces as DeadlineExceeded, not as a network error
+        return None
+    record_http(response)
+    return response
+
+
 def get_answers_for_question(question_id):
     """
     Fetches top answers for a given Stack Overflow question using the Stack Exchange API.
@@ -62,7 +87,7 @@ def get_answers_for_question(question_id):
         list[dict] | str: List of top answers with upvotes, body, and link. 
                           Returns a message string if no answers or an error occurs.
     """
-    url = f"https://api.stackexchange.com/2.3/questions/{question_id}/answers"
+    url = f"{STACKEXCHANGE_API_URL}/questions/{question_id}/answers"
     params = {
         'order': 'desc',
         'sort': 'votes',
@@ -70,7 +95,9 @@ def get_answers_for_question(question_id):
         'filter': 'withbody'
     }
 
-    response = requests.get(url, params=params)
+    response = stack_exchange_get(url, params)
+    if response is None:
+        return "Error: timed out"
 
     if response.status_code == 200:
         answers = response.json().get('items', [])
@@ -93,6 +120,56 @@ def get_answers_for_question(question_id):
         return f"Error: {response.status_code}"
 
 
+def fetch_question(url: str):
+    """
+    Retrieves one Stack Overflow question and its top answers.
+
+    Args:
+        url (str): A Stack Overflow question URL.
+
+    Returns:
+        dict | None: The question title with its top answers, or None if the
+                     URL is not a question or the question could not be fetched.
+    """
+    question_id = extract_question_id(url)
+    if question_id is None:
+        return None
+
+    # Fetch question details
+    question_url = f"{STACKEXCHANGE_API_URL}/questions/{question_id}"
+    params = {
+        'order': 'desc',
+        'sort': 'activity',
+        'site': 'stackoverflow',
+        'filter': 'withbody'
+    }
+    response = stack_exchange_get(question_url, params)
+    if response is None or response.status_code != 200:
+        return None
+    items = response.json().get('items', [])
+    if not items:
+        return None
+    title = items[0]['title']
+
+    # Fetch and format answers
+    ans_list = get_answers_for_question(question_id)
+    if isinstance(ans_list, str):
+        formatted_answers = [ans_list]
+    else:
+        formatted_answers = []
+        for ans in ans_list:
+            formatted_answers.append({
+                'Upvotes': ans['upvotes'],
+                'Body': ans['body'],
+                'Link': ans['link']
+            })
+
+    return {
+        'question': title,
+        'answers': formatted_answers[:4]  # Limit to top 4 answers
+    }
+
+
 def tool_fn(urls: List[str]):
     """
     Main function to retrieve questions and top answers from Stack Overflow given a list of URLs.
@@ -106,43 +183,10 @@ def tool_fn(urls: List[str]):
     results = []
 
     for url in urls:
-        question_id = extract_question_id(url)
-        if question_id is None:
-            continue
-
-        # Fetch question details
-        question_url = f"https://api.stackexchange.com/2.3/questions/{question_id}"
-        params = {
-            'order': 'desc',
-            'sort': 'activity',
-            'site': 'stackoverflow',
-            'filter': 'withbody'
-        }
-        response = requests.get(question_url, params=params)
-        if response.status_code != 200:
-            continue
-        items = response.json().get('items', [])
-        if not items:
-            continue
-        title = items[0]['title']
-
-        # Fetch and format answers
-        ans_list = get_answers_for_question(question_id)
-        if isinstance(ans_list, str):
-            formatted_answers = [ans_list]
-        else:
-            formatted_answers = []
-            for ans in ans_list:
-                formatted_answers.append({
-                    'Upvotes': ans['upvotes'],
-                    'Body': ans['body'],
-                    'Link': ans['link']
-                })
-
-        results.append({
-            'question': title,
-            'answers': formatted_answers[:4]  # Limit to top 4 answers
-        })
+        check_deadline()
+        question = fetch_question(url)
+        if question is not None:
+            results.append(question)
     return results
 
 
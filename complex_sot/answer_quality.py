@@ -0,0 +1,90 @@
+import re
+import threading
+from typing import Dict
+
+# Fenced (```), indented (4 spaces / tab) or inline (`code`) code
+CODE_PATTERN = re.compile(r"```|^(?: {4}|\t)\S|`[^`\n]+`", re.MULTILINE)
+
+# Links to Stack Overflow / Stack Exchange questions or answers
+CITATION_PATTERN = re.compile(r"https?://(?:[\w-]+\.)*(?:stackoverflow\.com|stackexchange\.com)/\S+")
+
+# Markdown headings, bullet and numbered list items
+SECTION_PATTERN = re.compile(r"^\s*(?:#{1,6}\s|[-*+]\s|\d+[.)]\s)", re.MULTILINE)
+
+
+class QualityGate:
+    """
+    Cheap local check deciding whether a summary is good enough to return as is,
+    so the agent can skip the extra `refine_answer` LLM pass.
+
+    A summary passes when every enabled check succeeds:
+        length    - between `min_chars` and `max_chars` characters
+        structure - at least `min_sections` paragraphs, list items or headings
+        code      - contains a code snippet (when `require_code`; off by default, since conceptual
+                    questions have good answers without code)
+        citation  - links to a Stack Overflow answer (when `require_citation`)
+
+    Attributes:
+        enabled (bool): When False every answer is sent to `refine_answer`.
+        min_chars (int): Minimum answer length.
+        max_chars (int): Maximum answer length; longer answers are refined into something shorter.
+        min_sections (int): Minimum number of paragraphs / list items / headings.
+        require_code (bool): Require a code snippet.
+        require_citation (bool): Require a Stack Overflow link.
+        stats (dict): Counts of "checked", "skipped" (refinement skipped) and "refined" answers,
+                      plus "failed:<check>" per failing check.
+    """
+    def __init__(self, enabled: bool = True, min_chars: int = 200, max_chars: int = 6000, min_sections: int = 2,
+                 require_code: bool = False, require_citation: bool = True):
+        self.enabled = enabled
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.min_sections = min_sections
+        self.require_code = require_code
+        self.require_citation = require_citation
+        self.stats: Dict[str, int] = {"checked": 0, "skipped": 0, "refined": 0}
+        self._lock = threading.Lock()
+
+    def evaluate(self, answer: str) -> Dict[str, bool]:
+        """
+        Runs every enabled check on an answer.
+
+        Args:
+            answer (str): The summary to check.
+
+        Returns:
+            dict: Mapping of check name to whether it passed.
+        """
+        text = answer.strip()
+        paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+        checks = {
+            "length": self.min_chars <= len(text) <= self.max_chars,
+            "structure": max(len(paragraphs), len(SECTION_PATTERN.findall(text))) >= self.min_sections,
+        }
+        if self.require_code:
+            checks["code"] = CODE_PATTERN.search(text) is not None
+        if self.require_citation:
+            checks["citation"] = CITATION_PATTERN.search(text) is not None
+        return checks
+
+    def passes(self, answer) -> bool:
+        """
+        Returns True if the answer can be returned without refinement, and records the outcome in `stats`.
+        """
+        if not self.enabled:
+            return False
+        checks = self.evaluate(answer if isinstance(answer, str) else str(answer))
+        passed = all(checks.values())
+        with self._lock:
+            self.stats["checked"] += 1
+            self.stats["skipped" if passed else "refined"] += 1
+            for name, ok in checks.items():
+                if not ok:
+                    self.stats[f"failed:{name}"] = self.stats.get(f"failed:{name}", 0) + 1
+        return passed
+
+    def skip_ratio(self) -> float:
+        """
+        Returns the fraction of checked answers that skipped refinement.
+        """
+        return self.stats["skipped"] / self.stats["checked"] if self.stats["checked"] else 0.0
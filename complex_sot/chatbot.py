@@ -1,6 +1,7 @@
 from StackOverflow import Stack_overflow_tool
 from get_urls import get_url_tool
 from summarizer import StackOverflowSummarizer
+from answer_quality import QualityGate
 
 from typing import Annotated, Dict, Any
 from typing_extensions import TypedDict
@@ -32,9 +33,10 @@ class Agent:
         tool_names (list): Ordered list of tool names.
         tries (int): Counter for the number of attempts.
         max_tries (int): Maximum allowed tries before stopping.
+        quality_gate (QualityGate): Decides when the summary is returned as is, skipping `refine_answer`.
         graph (StateGraph): Compiled graph managing the agent's conversational states and transitions.
     """
-    def __init__(self, model, tools, system=""):
+    def __init__(self, model, tools, system="", quality_gate=None):
         self.model = model
         self.llm = model.bind_tools(tools)  # Bind tools for tool usage during model calls
         self.system = system
@@ -42,6 +44,7 @@ class Agent:
         self.tool_names = [t.name for t in tools]
         self.tries = 0
         self.max_tries = 3
+        self.quality_gate = quality_gate or QualityGate()
 
         # Initialize state graph for conversation flow management
         graph = StateGraph(AgentState)
@@ -75,11 +78,12 @@ class Agent:
 
         graph.add_edge("refine_question", "llm")  # After refining question, try LLM again
 
-        # After last tool runs, decide whether to refine answer or refine question
+        # After last tool runs, decide whether to refine answer, return it as is or refine question
         graph.add_conditional_edges(self.tool_names[-1],
             self.relevent_answer,
             {
                 "yes": "refine_answer",
+                "skip": END,
                 "no": "refine_question"
             }
         )
@@ -141,17 +145,20 @@ class Agent:
     
     def relevent_answer(self, state: AgentState) -> str:
         """
-        Checks if the last answer message indicates relevant Stack Overflow answers found.
+        Checks if the last answer message indicates relevant Stack Overflow answers found, and
+        whether the answer still needs refining (see QualityGate).
 
         Args:
             state (AgentState): Current agent state with messages.
 
         Returns:
-            str: "yes" if relevant answers found, else "no".
+            str: "no" if no relevant answers found, "skip" if the answer passes the quality gate, else "yes".
         """
         last_msg = state["messages"][-1].content
         if last_msg == "No relevant Stack Overflow questions found for the query.":
             return "no"
+        elif self.quality_gate.passes(last_msg):
+            return "skip"
         else:
             return "yes"
 
@@ -243,13 +250,11 @@ class Agent:
         return _handler
 
 
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
+from clients import get_chat_model
+from llm_cache import enable_llm_cache
 load_dotenv()
 
-# Initialize the language model
-model = ChatGroq(model="llama3-8b-8192")
-
 prompt = """
 You are a helpful assistant that answers coding questions by searching Stack Overflow.
 You will be provided with a question, and you will use the tools available to find relevant answers.
@@ -258,14 +263,22 @@ Then you will be invoked with the result of the query.
 You will refine the question if needed, and you will refine the answer if needed.
 You will return the final answer to the user.
 """.strip()
-print(model.invoke("Hi how are you ?"))
 
-# Instantiate the Agent with the model, tools, and optional system prompt
-abot = Agent(model, [get_url_tool, Stack_overflow_tool, StackOverflowSummarizer], system=prompt)
 
-# Start conversation with a user question wrapped in a HumanMessage
-messages = HumanMessage(content="How to reverse a string in Python?")
+if __name__ == "__main__":
+    enable_llm_cache()  # Repeated prompts are answered from the shared on-disk cache
+
+    # Initialize the language model
+    model = get_chat_model()
+
+    # Instantiate the Agent with the model, tools, and optional system prompt
+    abot = Agent(model, [get_url_tool, Stack_overflow_tool, StackOverflowSummarizer], system=prompt)
+
+    # Start conversation with a user question wrapped in a HumanMessage
+    messages = HumanMessage(content="How to reverse a string in Python?")
+
+    # Stream through the graph events and print responses
+    for event in abot.graph.stream({"messages": messages}):
+        print(event)
 
-# Stream through the graph events and print responses
-for event in abot.graph.stream({"messages": messages}):
-    print(event)
+    print("Quality gate:", abot.quality_gate.stats)
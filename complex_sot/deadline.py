@@ -0,0 +1,194 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# The deadline of the agent run executing in the current thread / asyncio task.
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("current_deadline", default=None)
+
+
+class RunAborted(Exception):
+    """
+    Raised inside the graph when a run must stop before it has finished.
+    """
+
+
+class DeadlineExceeded(RunAborted):
+    """
+    Raised when the run's time budget is used up.
+    """
+
+
+class Cancelled(RunAborted):
+    """
+    Raised when the run was cancelled, e.g. because the client disconnected.
+    """
+
+
+class Deadline:
+    """
+    Time budget and cancellation flag shared by every node, tool, HTTP and LLM call of one run.
+
+    Pass it to the graph through the run config:
+        graph.stream(inputs, {"configurable": {"deadline": Deadline(30)}})
+
+    Attributes:
+        expires_at (float | None): Expiry time on the `time.monotonic()` clock, or None for no limit.
+    """
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Returns the seconds left before expiry (never negative), or None if there is no time limit.
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cancel(self):
+        """
+        Marks the run as cancelled; work in flight stops at its next check.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        """
+        Raises if the run was cancelled or its deadline has passed.
+
+        Raises:
+            Cancelled: If `cancel()` was called.
+            DeadlineExceeded: If the time budget is used up.
+        """
+        if self.cancelled:
+            raise Cancelled("Run cancelled")
+        if self.expired():
+            raise DeadlineExceeded("Run deadline exceeded")
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Returns a timeout for a blocking call that does not outlive the deadline.
+
+        Args:
+            default (float | None): The call's own timeout when no tighter deadline applies.
+
+        Returns:
+            float | None: The smaller of `default` and the remaining budget.
+
+        Raises:
+            RunAborted: If the run is already cancelled or out of time.
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+
+def current() -> Optional[Deadline]:
+    """
+    Returns the deadline of the run executing in the current context, if any.
+    """
+    return _current_deadline.get()
+
+
+@contextmanager
+def activate(deadline: Optional[Deadline]):
+    """
+    Makes `deadline` the current deadline for the enclosed block.
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def from_config(config) -> Optional[Deadline]:
+    """
+    Extracts the Deadline passed as `configurable.deadline` in a run config.
+    """
+    deadline = ((config or {}).get("configurable") or {}).get("deadline")
+    return deadline if isinstance(deadline, Deadline) else None
+
+
+def check():
+    """
+    Raises if the current run was cancelled or is out of time; no-op outside a run with a deadline.
+    """
+    deadline = current()
+    if deadline is not None:
+        deadline.check()
+
+
+def http_timeout(default: float) -> float:
+    """
+    Returns the timeout to use for an HTTP request: `default`, capped by the current deadline.
+    """
+    deadline = current()
+    if deadline is None:
+        return default
+    return deadline.timeout(default)
+
+
+def llm_kwargs() -> dict:
+    """
+    Returns extra keyword arguments for a chat model call so it cannot outlive the current deadline.
+    """
+    deadline = current()
+    if deadline is None or deadline.remaining() is None:
+        return {}
+    return {"timeout": deadline.timeout()}
+
+
+def invoke_llm(model, messages):
+    """
+    Invokes a chat model with a timeout bounded by the current deadline.
+
+    A failure caused by the deadline (e.g. the client's timeout firing) is reported as
+    DeadlineExceeded rather than as a provider error.
+
+    Args:
+        model: Chat model or runnable to invoke.
+        messages: Input for the model.
+
+    Returns:
+        The model's response message.
+    """
+    try:
+        return model.invoke(messages, **llm_kwargs())
+    except Exception:
+        check()
+        raise
+
+
+def with_deadline(fn):
+    """
+    Wraps a graph node or routing function so it runs with the deadline from its run config.
+
+    The deadline is checked before the node starts, so no new work begins once the run is
+    out of time or cancelled.
+
+    Args:
+        fn (Callable): Function taking the graph state.
+
+    Returns:
+        Callable: Function taking (state, config) as LangGraph expects.
+    """
+    def _node(state, config):
+        deadline = from_config(config)
+        if deadline is not None:
+            deadline.check()
+        with activate(deadline):
+            return fn(state)
+    _node.__name__ = getattr(fn, "__name__", "node")
+    return _node
@@ -1,13 +1,40 @@
-from StackOverflow import Stack_overflow_tool
+from StackOverflow import Stack_overflow_tool, fetch_question
 from get_urls import get_url_tool
 from summarizer import StackOverflowSummarizer
+from instrumentation import Instrumentation, JsonlSpanExporter, current_run, tool_span
+from deadline import Deadline, RunAborted, check as check_deadline, current as current_deadline, with_deadline
+from model_router import ModelRouter, set_router
+from answer_quality import QualityGate
+from tool_calls import run_tool_calls
+from query_rewriter import QueryRewriter
+from prefetch import Prefetcher, current as current_prefetcher, with_prefetcher
 
 from typing import Annotated, Dict, Any
 from typing_extensions import TypedDict
 from langchain_core.messages import SystemMessage, ToolMessage, HumanMessage, AIMessage, AnyMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
+from langgraph.types import Send
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import asyncio
+import contextvars
 import uuid
+from contextlib import nullcontext
+
+def merge_branch_results(left: list, right: list | None) -> list:
+    """
+    Reducer collecting the results of parallel fetch branches.
+
+    Args:
+        left (list): Results gathered so far.
+        right (list | None): New results from a branch, or None to clear the list.
+
+    Returns:
+        list: The combined results.
+    """
+    if right is None:
+        return []
+    return (left or []) + right
 
 class AgentState(TypedDict):
     """
@@ -16,8 +43,11 @@ class AgentState(TypedDict):
     Attributes:
         messages (list[AnyMessage]): List of messages exchanged so far, annotated to use 'add_messages' for
                                     graph state management.
+        branch_results (list[tuple[int, Any]]): (url index, result) pairs written by parallel fetch
+                                                branches when fan-out is enabled.
     """
     messages: Annotated[list[AnyMessage], add_messages]
+    branch_results: Annotated[list, merge_branch_results]
     
 class Agent:
     """
@@ -25,38 +55,81 @@ class Agent:
     sequential and conditional message processing.
 
     Attributes:
-        model: The language model instance (e.g., ChatGroq).
-        llm: The language model bound with tools for invocation.
+        model: The language model instance (e.g., ChatGroq), used for every step when no router is given.
+        router (ModelRouter): Chooses the model for each LLM step (tool routing, refinements).
         system (str): Optional system prompt context.
         tools (dict): Mapping of tool names to tool instances.
         tool_names (list): Ordered list of tool names.
-        tries (int): Counter for the number of attempts.
-        max_tries (int): Maximum allowed tries before stopping.
+        max_tries (int): Maximum allowed refinements of the question before stopping. Tries are counted
+                         from each run's messages, so one Agent can serve concurrent runs.
+        instrumentation (Instrumentation | None): Optional span recorder wrapping every node.
+        fan_out (bool): Fetch every URL returned by the first tool as a parallel graph branch
+                        of the second tool instead of one sequential call.
+        max_branches (int): Maximum number of URLs fetched when fanning out.
+        max_concurrency (int | None): Maximum number of branches running at the same time.
+        branch_timeout (float | None): Seconds after which a slow branch is dropped from the results.
+        max_tool_calls (int): Maximum number of tool calls from one LLM turn running at the same time.
+        tool_timeout (float | None): Seconds after which a tool call is given up.
+        query_rewriter (QueryRewriter): Local rewrites tried by `refine_question` before the LLM.
+        search_cache (SearchCache | None): Results of the first (search) tool reused by this Agent's
+                                           searches and rewrites; None searches every time.
+        prefetch (bool): Fetch the questions found by `results_found` in the background for the
+                         Stack Overflow step. `run` / `arun` give each run its own Prefetcher (see
+                         `new_prefetcher`); the graph used directly only prefetches with one in its config.
+        quality_gate (QualityGate): Decides when the summary is returned as is, skipping `refine_answer`.
         graph (StateGraph): Compiled graph managing the agent's conversational states and transitions.
     """
-    def __init__(self, model, tools, system=""):
+    def __init__(self, model, tools, system="", instrumentation=None,
+                 fan_out=False, max_branches=10, max_concurrency=None, branch_timeout=None, router=None,
+                 quality_gate=None, max_tool_calls=4, tool_timeout=None, query_rewriter=None, prefetch=True,
+                 search_cache=None):
         self.model = model
-        self.llm = model.bind_tools(tools)  # Bind tools for tool usage during model calls
+        self.router = router or ModelRouter(small=model, large=model)
+        self.tool_list = list(tools)  # Bound to the routing model during LLM calls
         self.system = system
         self.tools = {t.name: t for t in tools}
         self.tool_names = [t.name for t in tools]
-        self.tries = 0
         self.max_tries = 3
+        self.instrumentation = instrumentation
+        self.fan_out = fan_out and len(self.tool_names) > 1
+        self.max_branches = max_branches
+        self.max_concurrency = max_concurrency
+        self.branch_timeout = branch_timeout
+        self.quality_gate = quality_gate or QualityGate()
+        self.query_rewriter = query_rewriter or QueryRewriter()
+        self.search_cache = search_cache
+        self.prefetch = prefetch and len(self.tool_names) > 1 and self.tool_names[1] == Stack_overflow_tool.name
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=8) if self.prefetch else None  # Shared by the runs
+        self._branch_pool = ThreadPoolExecutor(max_workers=max_concurrency or max_branches) if self.fan_out else None
+        self.tool_timeout = tool_timeout
+        self._tool_pool = ThreadPoolExecutor(max_workers=max_tool_calls)  # Threads start on first use
 
         # Initialize state graph for conversation flow management
         graph = StateGraph(AgentState)
-        graph.add_node("llm", self.call_groq)
+        self.add_node(graph, "llm", self.call_groq)
 
         # Add a node for each tool to handle invoking the tool action
         for tool in tools:
-            graph.add_node(tool.name, self.take_action_for(tool.name))
+            if self.fan_out and tool.name == self.tool_names[1]:
+                continue  # Added below as the per-URL branch node
+            self.add_node(graph, tool.name, self.take_action_for(tool.name))
 
         # Add nodes to refine questions and answers if needed
-        graph.add_node("refine_question", self.refine_question)
-        graph.add_node("refine_answer", self.refine_answer)
+        self.add_node(graph, "refine_question", self.refine_question)
+        self.add_node(graph, "refine_answer", self.refine_answer)
 
         # Chain tools sequentially (tool_1 -> tool_2 -> tool_3 ...)
-        for x, y in zip(self.tool_names, self.tool_names[1:]):
+        chain = list(self.tool_names)
+        if self.fan_out:
+            # tool_1 -(one Send per URL)-> tool_2 branches -> merge_branches -> tool_3 ...
+            fan_out_tool = self.tool_names[1]
+            self.add_node(graph, fan_out_tool, self.fetch_branch)
+            self.add_node(graph, "merge_branches", self.merge_branches)
+            graph.add_conditional_edges(self.tool_names[0], with_prefetcher(with_deadline(self.dispatch_branches)),
+                                        [fan_out_tool, "refine_question"])
+            graph.add_edge(fan_out_tool, "merge_branches")
+            chain = ["merge_branches"] + self.tool_names[2:]
+        for x, y in zip(chain, chain[1:]):
             graph.add_edge(x, y)
 
         # Conditional branching after LLM step:
@@ -65,7 +138,7 @@ class Agent:
         # - If max tries exceeded: end conversation
         graph.add_conditional_edges(
             "llm",
-            self.results_found,
+            with_prefetcher(with_deadline(self.results_found)),
             {
                 "yes": self.tool_names[0],
                 "no": "refine_question",
@@ -73,13 +146,15 @@ class Agent:
             }
         )
 
-        graph.add_edge("refine_question", "llm")  # After refining question, try LLM again
+        # After refining the question, search with it right away if a local rewrite found results, else try LLM again
+        graph.add_conditional_edges("refine_question", self.after_refine, {"search": self.tool_names[0], "llm": "llm"})
 
-        # After last tool runs, decide whether to refine answer or refine question
-        graph.add_conditional_edges(self.tool_names[-1],
+        # After last tool runs, decide whether to refine answer, return it as is or refine question
+        graph.add_conditional_edges(chain[-1],
             self.relevent_answer,
             {
                 "yes": "refine_answer",
+                "skip": END,
                 "no": "refine_question"
             }
         )
@@ -88,6 +163,132 @@ class Agent:
 
         graph.set_entry_point("llm")  # Start from the LLM node
         self.graph = graph.compile()
+        if self.max_concurrency:
+            self.graph = self.graph.with_config(max_concurrency=self.max_concurrency)
+
+    def add_node(self, graph: StateGraph, name: str, fn):
+        """
+        Adds a node to the graph, wrapping it with instrumentation when enabled and
+        with the run's deadline (see `run`).
+
+        Args:
+            graph (StateGraph): Graph under construction.
+            name (str): Node name.
+            fn (Callable): Node function.
+        """
+        if self.instrumentation is not None:
+            fn = self.instrumentation.wrap_node(name, fn)
+        graph.add_node(name, with_prefetcher(with_deadline(fn)))
+
+    def run(self, question: str, timeout: float | None = None, deadline: Deadline | None = None) -> dict:
+        """
+        Answers a question within a time budget, returning the best partial answer if the
+        run is cancelled or runs out of time.
+
+        Args:
+            question (str): The user's coding question.
+            timeout (float | None): Time budget in seconds (ignored when `deadline` is given).
+            deadline (Deadline | None): Deadline to use, e.g. one the caller cancels on client disconnect.
+
+        Returns:
+            dict: {"answer": str | None, "complete": bool, "error": str | None}
+        """
+        deadline = deadline or Deadline(timeout)
+        prefetcher = self.new_prefetcher()
+        config = {"configurable": {"deadline": deadline, "prefetcher": prefetcher}}
+        state = {"messages": [HumanMessage(content=question)]}
+        try:
+            with self.instrumented_run():
+                for state in self.graph.stream(state, config, stream_mode="values"):
+                    pass
+        except RunAborted as e:
+            return {"answer": self.best_answer(state["messages"]), "complete": False, "error": str(e)}
+        finally:
+            if prefetcher is not None:
+                prefetcher.cancel()
+        return {"answer": self.best_answer(state["messages"]), "complete": True, "error": None}
+
+    async def arun(self, question: str, timeout: float | None = None, deadline: Deadline | None = None) -> dict:
+        """
+        Async version of `run`. Cancelling the calling task (e.g. on client disconnect) also
+        cancels the deadline, so nodes still running in worker threads stop at their next check.
+        """
+        deadline = deadline or Deadline(timeout)
+        prefetcher = self.new_prefetcher()
+        config = {"configurable": {"deadline": deadline, "prefetcher": prefetcher}}
+        state = {"messages": [HumanMessage(content=question)]}
+        try:
+            with self.instrumented_run():
+                async for state in self.graph.astream(state, config, stream_mode="values"):
+                    pass
+        except RunAborted as e:
+            return {"answer": self.best_answer(state["messages"]), "complete": False, "error": str(e)}
+        except asyncio.CancelledError:
+            deadline.cancel()
+            raise
+        finally:
+            if prefetcher is not None:
+                prefetcher.cancel()
+        return {"answer": self.best_answer(state["messages"]), "complete": True, "error": None}
+
+    def instrumented_run(self):
+        """
+        Returns a context manager grouping the spans of one question into one instrumentation run,
+        or a no-op when instrumentation is off or the caller already opened a run.
+        """
+        if self.instrumentation is None or current_run() is not None:
+            return nullcontext()
+        return self.instrumentation.run()
+
+    def new_prefetcher(self) -> Prefetcher | None:
+        """
+        Returns a Prefetcher for one run, or None when `prefetch` is off. To prefetch when using
+        `graph` directly, pass it as `configurable.prefetcher` and cancel it when the run ends.
+        """
+        if not self.prefetch:
+            return None
+        return Prefetcher(fetch_question, Stack_overflow_tool.name, max_urls=self.max_branches, pool=self._prefetch_pool)
+
+    def cancel_prefetch(self):
+        """
+        Cancels the current run's speculative Stack Overflow fetches nobody took (see Prefetcher).
+        """
+        prefetcher = current_prefetcher()
+        if prefetcher is not None:
+            prefetcher.cancel()
+
+    def search(self, query: str):
+        """
+        Runs the first (search) tool for `query`, answering from `search_cache` when the Agent has one.
+        """
+        if self.search_cache is not None:
+            cached = self.search_cache.get(query)
+            if cached is not None:
+                return list(cached)
+        results = self.tools[self.tool_names[0]].invoke({"query": query})
+        if self.search_cache is not None and isinstance(results, list) and results:
+            self.search_cache.put(query, results)
+        return results
+
+    def best_answer(self, messages: list) -> str | None:
+        """
+        Picks the most finished answer available in the message history: the refined answer,
+        else the summary, else the raw Stack Overflow answers.
+
+        Args:
+            messages (list[AnyMessage]): Messages of the (possibly interrupted) run.
+
+        Returns:
+            str | None: The best answer text, or None if no tool produced anything yet.
+        """
+        final = [m for m in messages[1:] if isinstance(m, AIMessage) and not m.tool_calls and m.content]
+        if final:
+            return final[-1].content
+        for tool_name in reversed(self.tool_names[1:]):
+            outputs = [m for m in messages if isinstance(m, ToolMessage) and m.name == tool_name]
+            if outputs:
+                return outputs[-1].content
+        return None
 
     def call_groq(self, state: AgentState) -> AgentState:
         """
@@ -102,25 +303,65 @@ class Agent:
         messages = state["messages"]
         if self.system:
             messages = [SystemMessage(content=self.system)] + messages
-        response = self.llm.invoke(messages)
+        response = self.router.invoke("route", messages, tools=self.tool_list)
         return {"messages": [response]}
 
     def refine_question(self, state: AgentState) -> AgentState:
         """
         Refines the last question in the conversation to be clearer or more specific.
 
+        Local rewrites of the user's question (see QueryRewriter) are tried first against the Agent's
+        search cache, if any, and with a live search bounded by the run's deadline and `tool_timeout`;
+        the first one with results is searched directly, skipping both the refinement and the routing
+        LLM calls. Otherwise the LLM refines the question.
+
         Args:
             state (AgentState): Current agent state with messages.
 
         Returns:
-            AgentState: New state with the refined question as a HumanMessage.
+            AgentState: New state with the refined question as a HumanMessage, followed by a call of
+                        the first tool when a local rewrite found results.
         """
+        # Tries so far, from this run's messages: the question plus one per refinement (rewrites included)
+        tries = sum(isinstance(m, HumanMessage) for m in state["messages"])
+        if tries < self.max_tries:
+            tried = {m.content for m in state["messages"] if isinstance(m, HumanMessage)}
+            search_tool = self.tools[self.tool_names[0]]
+
+            def _search(query: str):
+                deadline = current_deadline()
+                timeout = deadline.timeout(self.tool_timeout) if deadline is not None else self.tool_timeout
+                with tool_span(search_tool.name, caller="refine_question"):
+                    [(result, error)] = run_tool_calls(self._tool_pool, [lambda: self.search(query)], timeout)
+                if error is not None:
+                    raise error
+                return result
+
+            lookup = self.search_cache.lookup if self.search_cache is not None else None
+            found = self.query_rewriter.find(state["messages"][0].content, lookup, _search, tried)
+            if found is not None:
+                if self.search_cache is not None:
+                    self.search_cache.put(found["query"], found["results"])  # The tool node reuses them
+                prefetcher = current_prefetcher()
+                if prefetcher is not None:
+                    prefetcher.start(found["results"])
+                print(f"Rewrote question locally: {found['query']}")
+                call = {"name": search_tool.name, "args": {"query": found["query"]}, "id": f"rewrite-{uuid.uuid4()}"}
+                return {"messages": [HumanMessage(content=found["query"]), AIMessage(content="", tool_calls=[call])]}
+
         last_msg = state["messages"][-1].content
         prompt = f"Refine the question: {last_msg} to be more specific and clear."
         messages = [SystemMessage(content=self.system), HumanMessage(content=prompt)]
-        response = self.model.invoke(messages)
+        response = self.router.invoke("refine_question", messages)
         return {"messages": [HumanMessage(content=response.content)]}
 
+    def after_refine(self, state: AgentState) -> str:
+        """
+        Returns "search" when `refine_question` already called the first tool with a local rewrite, else "llm".
+        """
+        last_msg = state["messages"][-1]
+        return "search" if isinstance(last_msg, AIMessage) and last_msg.tool_calls else "llm"
+
     def refine_answer(self, state: AgentState) -> AgentState:
         """
         Refines the last answer given by the model to be more specific and clear.
@@ -134,22 +375,25 @@ class Agent:
         last_msg = state["messages"][-1].content
         prompt = f"Refine the answer: {last_msg} to be more specific and clear."
         messages = [SystemMessage(content=self.system), HumanMessage(content=prompt)]
-        response = self.model.invoke(messages)
+        response = self.router.invoke("refine_answer", messages)
         return {"messages": [AIMessage(content=response.content)]}
     
     def relevent_answer(self, state: AgentState) -> str:
         """
-        Checks if the last answer message indicates relevant Stack Overflow answers found.
+        Checks if the last answer message indicates relevant Stack Overflow answers found, and
+        whether the answer still needs refining (see QualityGate).
 
         Args:
             state (AgentState): Current agent state with messages.
 
         Returns:
-            str: "yes" if relevant answers found, else "no".
+            str: "no" if no relevant answers found, "skip" if the answer passes the quality gate, else "yes".
         """
         last_msg = state["messages"][-1].content
         if last_msg == "No relevant Stack Overflow questions found for the query.":
             return "no"
+        elif self.quality_gate.passes(last_msg):
+            return "skip"
         else:
             return "yes"
 
@@ -163,20 +407,29 @@ class Agent:
         Returns:
             str: One of "yes", "no", or "limit exceeded" based on conditions.
         """
-        if self.tries >= self.max_tries:
-            self.tries = 0
+        # Tries are counted from this run's messages (the question plus one per refinement),
+        # so one Agent can serve many concurrent runs.
+        tries = sum(isinstance(m, HumanMessage) for m in state["messages"]) - 1
+        if tries >= self.max_tries:
             print("Max tries exceeded")
+            self.cancel_prefetch()
             return "limit exceeded"
-        self.tries += 1
         query = state["messages"][0].content
         try:
-            tool_response = self.tools["get_url_tool"].invoke({"query": query})
+            with tool_span(self.tool_names[0], caller="results_found"):
+                tool_response = self.search(query)
             if tool_response:
+                # The URLs are known now: start fetching them while the graph moves on to the tools
+                prefetcher = current_prefetcher()
+                if prefetcher is not None and isinstance(tool_response, list):
+                    prefetcher.start(tool_response)
                 return "yes"
             else:
+                self.cancel_prefetch()
                 return "no"
         except Exception as e:
             print("Tool call error:", e)
+            self.cancel_prefetch()
             return "limit exceeded"
 
     def take_action_for(self, tool_name):
@@ -189,71 +442,242 @@ class Agent:
         Returns:
             function: A state handler function for the tool.
         """
+        leaves_branch = tool_name in self.tool_names[1:2]  # The Stack Overflow step ends the prefetch
+
         def _handler(state: AgentState):
             last_msg = state['messages'][-1]
 
             # Process tool calls only if the last message is from AI and has tool calls
             if isinstance(last_msg, AIMessage) and last_msg.tool_calls:
                 messages = []
-                tool_calls = last_msg.tool_calls
-
-                for t in tool_calls:
-                    if t['name'] == tool_name:
-                        
-                        print(f'Calling tool: {tool_name}')
-                        results = []
-                        result = self.tools[t['name']].invoke(t['args'])
-                        results.append(result)
-                        messages.append(ToolMessage(
-                            tool_call_id=t["id"],
-                            name=t["name"],
-                            content=str(result)
-                        ))
-
-                        # If there is a next tool, prepare its arguments and trigger it
-                        if tool_name in self.tool_names:
-                            idx = self.tool_names.index(tool_name)
-                            if idx + 1 < len(self.tool_names):
-                                next_tool = self.tool_names[idx + 1]
-                                arg = list(self.tools[next_tool].args_schema.model_json_schema()['properties'].keys())
-                                args = {}
-                                if "query" in arg:
-                                    args["query"] = state['messages'][0].content
-                                    arg.remove("query")
-                                for x, y in zip(arg, results):
-                                    args[x] = y
-                                messages.append(AIMessage(
-                                    content=f"Triggering next tool: {next_tool}",
-                                    tool_calls=[{
-                                        "name": next_tool,
-                                        "args": args,
-                                        "id": f"synthetic-{next_tool}-{t['id']}"
-                                    }]
-                                ))
+                tool_calls = [t for t in last_msg.tool_calls if t['name'] == tool_name]
+                if not tool_calls:
+                    if leaves_branch:
+                        self.cancel_prefetch()
+                    return {}
+
+                check_deadline()
+                print(f'Calling tool: {tool_name}' + (f' x{len(tool_calls)}' if len(tool_calls) > 1 else ''))
+
+                prefetcher = current_prefetcher()
+
+                def _call(t):
+                    with tool_span(t['name']):
+                        if prefetcher is not None and t['name'] == prefetcher.tool_name \
+                                and isinstance(t['args'].get('urls'), list):
+                            return prefetcher.run(t['args']['urls'], cancel_rest=False)
+                        if t['name'] == self.tool_names[0] and set(t['args']) == {"query"}:
+                            return self.search(t['args']['query'])
+                        return self.tools[t['name']].invoke(t['args'])
+
+                if len(tool_calls) == 1 and self.tool_timeout is None:
+                    try:
+                        outcomes = [(_call(tool_calls[0]), None)]
+                    finally:
+                        if leaves_branch:
+                            self.cancel_prefetch()  # Fetches of URLs this step did not ask for
+                else:
+                    # Calls from one LLM turn are independent: run them together, bounded by the pool
+                    deadline = current_deadline()
+                    timeout = deadline.timeout(self.tool_timeout) if deadline is not None else self.tool_timeout
+                    outcomes = run_tool_calls(self._tool_pool, [lambda t=t: _call(t) for t in tool_calls], timeout)
+                    if leaves_branch:
+                        self.cancel_prefetch()
+                    errors = [error for _, error in outcomes if error is not None]
+                    for error in errors:
+                        if isinstance(error, RunAborted):
+                            raise error
+                    if len(errors) == len(outcomes):
+                        raise errors[0]  # Nothing to continue with, as when a single call fails
+
+                # Messages keep the order of the tool calls, whichever finished first
+                for t, (result, error) in zip(tool_calls, outcomes):
+                    if error is not None:
+                        print("Tool call error:", error)
+                        messages.append(ToolMessage(tool_call_id=t["id"], name=t["name"],
+                                                    content=f"Error: {error}", status="error"))
+                        continue
+                    messages.append(ToolMessage(
+                        tool_call_id=t["id"],
+                        name=t["name"],
+                        content=str(result)
+                    ))
+
+                    # If there is a next tool, prepare its arguments and trigger it
+                    next_call = self.next_tool_call(tool_name, state, [result], t['id'])
+                    if next_call is not None:
+                        messages.append(next_call)
 
                 return {
                     "messages": messages
                 }
 
-            # Return empty dict if no applicable tool calls found
+            # Return empty dict if no applicable tool calls found (the LLM turn did not take the branch)
+            if leaves_branch:
+                self.cancel_prefetch()
             return {}
 
         return _handler
 
+    def next_tool_call(self, tool_name, state: AgentState, results: list, call_id: str):
+        """
+        Builds the synthetic AIMessage that triggers the tool following `tool_name` in the chain.
+
+        Args:
+            tool_name (str): Name of the tool that just ran.
+            state (AgentState): Current agent state.
+            results (list): Results of `tool_name`, mapped onto the next tool's non-query arguments.
+            call_id (str): Id of the tool call that produced the results.
+
+        Returns:
+            AIMessage | None: The message calling the next tool, or None if `tool_name` is the last tool.
+        """
+        if tool_name not in self.tool_names:
+            return None
+        idx = self.tool_names.index(tool_name)
+        if idx + 1 >= len(self.tool_names):
+            return None
+        next_tool = self.tool_names[idx + 1]
+        arg = list(self.tools[next_tool].args_schema.model_json_schema()['properties'].keys())
+        args = {}
+        if "query" in arg:
+            args["query"] = state['messages'][0].content
+            arg.remove("query")
+        for x, y in zip(arg, results):
+            args[x] = y
+        return AIMessage(
+            content=f"Triggering next tool: {next_tool}",
+            tool_calls=[{
+                "name": next_tool,
+                "args": args,
+                "id": f"synthetic-{next_tool}-{call_id}"
+            }]
+        )
+
+    def dispatch_branches(self, state: AgentState):
+        """
+        Fans the URLs requested from the second tool out into one graph branch per URL.
+
+        Args:
+            state (AgentState): Current agent state; its last message triggers the second tool.
+
+        Returns:
+            list[Send] | str: One Send per URL, or "refine_question" if there is nothing to fetch.
+        """
+        last_msg = state['messages'][-1]
+        fan_out_tool = self.tool_names[1]
+        calls = [t for t in getattr(last_msg, "tool_calls", []) if t['name'] == fan_out_tool]
+        if not calls:
+            self.cancel_prefetch()
+            return "refine_question"
+        # The URL list is the tool's (only) list-valued argument
+        arg, urls = next(((k, v) for k, v in calls[0]['args'].items() if isinstance(v, list)), (None, []))
+        sends = [
+            Send(fan_out_tool, {"url": url, "index": i, "arg": arg})
+            for i, url in enumerate(urls[:self.max_branches])
+        ]
+        if not sends:
+            self.cancel_prefetch()
+        return sends or "refine_question"
+
+    def fetch_branch(self, branch: dict) -> dict:
+        """
+        Runs the second tool for a single URL, giving up after `branch_timeout` seconds.
+
+        Args:
+            branch (dict): The Send payload with the URL, its index and the tool argument name.
+
+        Returns:
+            dict: State update adding the (index, result) pair to `branch_results`.
+        """
+        tool_name = self.tool_names[1]
+        print(f'Calling tool: {tool_name} for {branch["url"]}')
+        prefetcher = current_prefetcher()
+
+        def _invoke():
+            with tool_span(tool_name, url=branch["url"]):
+                if prefetcher is not None:
+                    # Other branches take their own URLs; merge_branches cancels the rest
+                    return prefetcher.run([branch["url"]], cancel_rest=False)
+                return self.tools[tool_name].invoke({branch["arg"]: [branch["url"]]})
+
+        # Never wait past the run's deadline, even without a branch timeout
+        deadline = current_deadline()
+        timeout = deadline.timeout(self.branch_timeout) if deadline is not None else self.branch_timeout
+
+        # Run in the agent's pool so a timed-out fetch does not block the branch.
+        future = self._branch_pool.submit(contextvars.copy_context().run, _invoke)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            print(f"Branch timed out after {timeout}s: {branch['url']}")
+            return {"branch_results": []}
+        except RunAborted:
+            raise
+        except Exception as e:
+            print("Branch error:", e)
+            return {"branch_results": []}
+        return {"branch_results": [(branch["index"], result)]}
+
+    def merge_branches(self, state: AgentState) -> AgentState:
+        """
+        Merges the per-URL branch results in URL order and triggers the next tool with them.
+
+        Args:
+            state (AgentState): Current agent state with the collected `branch_results`.
+
+        Returns:
+            AgentState: The merged ToolMessage, the call to the next tool and a cleared `branch_results`.
+        """
+        tool_name = self.tool_names[1]
+        self.cancel_prefetch()
+        last_call = next(t for t in state['messages'][-1].tool_calls if t['name'] == tool_name)
+        merged = []
+        for _, result in sorted(state.get("branch_results", []), key=lambda item: item[0]):
+            merged.extend(result)
+        messages = [ToolMessage(tool_call_id=last_call["id"], name=tool_name, content=str(merged))]
+        next_call = self.next_tool_call(tool_name, state, [merged], last_call["id"])
+        if next_call is not None:
+            messages.append(next_call)
+        return {"messages": messages, "branch_results": None}
+
 
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
+from clients import get_chat_model
+from llm_cache import enable_llm_cache
 load_dotenv()
 
-# Initialize the language model
-model = ChatGroq(model="llama-3.3-70b-versatile")
 
-# Instantiate the Agent with the model, tools, and optional system prompt
-abot = Agent(model, [get_url_tool, Stack_overflow_tool, StackOverflowSummarizer], system="You are a helpful assistant")
+if __name__ == "__main__":
+    llm_cache = enable_llm_cache()  # Shared by the agent, summarizer and router models
 
-# Start conversation with a user question wrapped in a HumanMessage
-messages = HumanMessage(content="How to reverse a string in Python?")
+    # Small model for tool routing / rewrites / filtering, large model for the summary and final answer
+    router = ModelRouter(small=get_chat_model("llama3-8b-8192"), large=get_chat_model("llama-3.3-70b-versatile"))
+    set_router(router)  # Also used by the summarizer tool
 
-# Stream through the graph events and print responses
-for event in abot.graph.stream({"messages": messages}):
-    print(event)
+    # Record per-node spans to a local JSONL file
+    instrumentation = Instrumentation(exporters=[JsonlSpanExporter("spans.jsonl")])
+
+    # Instantiate the Agent with the model, tools, and optional system prompt
+    abot = Agent(None, [get_url_tool, Stack_overflow_tool, StackOverflowSummarizer], system="You are a helpful assistant",
+                 instrumentation=instrumentation, router=router)
+
+    # Start conversation with a user question wrapped in a HumanMessage
+    messages = HumanMessage(content="How to reverse a string in Python?")
+
+    # Stream through the graph events and print responses; the run owns its prefetcher
+    prefetcher = abot.new_prefetcher()
+    with instrumentation.run() as run:
+        try:
+            for event in abot.graph.stream({"messages": messages}, {"configurable": {"prefetcher": prefetcher}}):
+                print(event)
+        finally:
+            if prefetcher is not None:
+                prefetcher.cancel()
+
+    print(run.to_dict())
+    print(instrumentation.histograms.report())
+    print("Model routing:", router.stats)
+    print("Quality gate:", abot.quality_gate.stats)
+    if llm_cache is not None:
+        print(f"LLM cache: {llm_cache.hits} hits, {llm_cache.misses} misses")
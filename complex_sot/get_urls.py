@@ -1,10 +1,99 @@
-from typing import List
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain.tools import StructuredTool
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import List, Optional
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
+from deadline import check as check_deadline
+import repo_path  # noqa: F401  (clients / llm_cache live at the repository root)
+from clients import get_search_tool
+from query_rewriter import key_terms
+
+# Tavily search tool; None uses the shared client created on the first search (see clients.py)
+search_tool = None
+
+
+class SearchCache:
+    """
+    In-process LRU cache of search results, with an index of the queries' key terms.
+
+    `get` matches the query exactly (case and whitespace aside). `lookup` also finds results of an
+    earlier query with the same or nearly the same key terms (see query_rewriter.key_terms), so
+    rephrasings such as "python reverse string" / "reverse a string in python" share results; a
+    different question with similar terms can get them too. Only searches that found URLs are cached.
+
+    `get_urls` itself is not cached. An Agent uses a SearchCache only when given one
+    (see final.Agent, `search_cache`).
+
+    Attributes:
+        max_entries (int): Maximum number of cached queries.
+        ttl (float): Seconds a result stays valid.
+        min_similarity (float): Minimum Jaccard similarity of key terms for an index match.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, min_similarity: float = 0.75):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self._entries = OrderedDict()  # normalized query -> (stored at, key terms, urls)
+        self._index = defaultdict(set)  # key term -> normalized queries
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _drop(self, key: str):
+        _, terms, _ = self._entries.pop(key)
+        for term in terms:
+            self._index[term].discard(key)
+            if not self._index[term]:
+                del self._index[term]
+
+    def _fresh(self, key: str) -> Optional[List[str]]:
+        stored_at, _, urls = self._entries[key]
+        if time.monotonic() - stored_at > self.ttl:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return urls
+
+    def get(self, query: str) -> Optional[List[str]]:
+        key = self._normalize(query)
+        with self._lock:
+            return self._fresh(key) if key in self._entries else None
+
+    def lookup(self, query: str) -> Optional[List[str]]:
+        """
+        Returns cached results for `query` or for an earlier query with similar key terms, or None.
+        """
+        urls = self.get(query)
+        if urls is not None:
+            return urls
+        terms = frozenset(key_terms(query))
+        if not terms:
+            return None
+        with self._lock:
+            candidates = set().union(*(self._index.get(term, ()) for term in terms))
+            best, best_score = None, self.min_similarity
+            for key in candidates:
+                other = self._entries[key][1]
+                score = len(terms & other) / len(terms | other)
+                if score >= best_score:
+                    best, best_score = key, score
+            return self._fresh(best) if best is not None else None
+
+    def put(self, query: str, urls: List[str]):
+        key = self._normalize(query)
+        terms = frozenset(key_terms(query))
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic(), terms, urls)
+            for term in terms:
+                self._index[term].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
 
-# Initialize the Tavily search tool with a maximum of 10 results
-search_tool = TavilySearchResults(max_results=10)
 
 class UrlsInput(BaseModel):
     """
@@ -27,7 +116,8 @@ def get_urls(query: str) -> List[str] | str:
         List[str]: A list of Stack Overflow URLs relevant to the query.
     """
     # Perform a web search prefixed with "stackoverflow.com" to bias results
-    results = search_tool.run("stackoverflow.com " + query)
+    check_deadline()
+    results = (search_tool or get_search_tool()).run("stackoverflow.com " + query)
 
     # Filter results to include only valid Stack Overflow question URLs
     urls = [result['url'] for result in results if "https://stackoverflow.com/questions/" in result['url']]
@@ -0,0 +1,422 @@
+import contextvars
+import inspect
+import json
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# The span and run that are active in the current thread / asyncio task.
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_current_run: contextvars.ContextVar = contextvars.ContextVar("current_run", default=None)
+_current_instrumentation: contextvars.ContextVar = contextvars.ContextVar("current_instrumentation", default=None)
+
+
+@dataclass
+class Span:
+    """
+    A single timed unit of work (graph node, tool call, LLM call or HTTP request).
+
+    Attributes:
+        name (str): Name of the node or tool.
+        kind (str): One of "node", "tool", "llm" or "http".
+        trace_id (str): Identifier of the agent run the span belongs to.
+        span_id (str): Unique identifier of the span.
+        parent_id (str | None): Identifier of the enclosing span, if any.
+        start_time (float): Wall-clock start time (seconds since the epoch).
+        end_time (float | None): Wall-clock end time (seconds since the epoch).
+        duration_ms (float | None): Elapsed time measured with a monotonic clock.
+        status (str): "ok" or "error".
+        error (str | None): Error message when the span failed.
+        attributes (dict): Counters collected while the span was active
+                           (tokens, HTTP bytes, ...).
+    """
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: float = 0.0
+    end_time: Optional[float] = None
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def add(self, key: str, value: float):
+        """
+        Increments a numeric attribute on the span.
+
+        Args:
+            key (str): Attribute name.
+            value (float): Amount to add.
+        """
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RunStats:
+    """
+    Collects every span of one agent run together with the run-wide totals.
+
+    Attributes:
+        run_id (str): Identifier of the run (used as the trace id of its spans).
+        spans (list[Span]): Finished spans in completion order.
+        totals (dict): Aggregated counters (llm_calls, input_tokens, output_tokens,
+                       http_requests, http_bytes) across the whole run.
+        wall_ms (float | None): Total wall time of the run once it has finished.
+    """
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.wall_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, key: str, value: float):
+        with self._lock:
+            self.totals[key] += value
+
+    def finish_span(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"run_id": self.run_id, "wall_ms": self.wall_ms, "totals": dict(self.totals)}
+
+
+class LatencyHistogram:
+    """
+    Keeps a bounded window of recent span durations per span name and reports percentiles.
+
+    Attributes:
+        max_samples (int): Number of most recent samples kept for each name.
+    """
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration_ms: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append(duration_ms)
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], pct: float) -> float:
+        # Nearest-rank percentile, good enough for latency reporting.
+        idx = max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1)
+        return sorted_values[idx]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns count, mean, p50, p90, p95, p99 and max (in milliseconds) for every span name.
+        """
+        with self._lock:
+            snapshot = {name: sorted(values) for name, values in self._samples.items()}
+        result = {}
+        for name, values in snapshot.items():
+            if not values:
+                continue
+            result[name] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": self._percentile(values, 50),
+                "p90": self._percentile(values, 90),
+                "p95": self._percentile(values, 95),
+                "p99": self._percentile(values, 99),
+                "max": values[-1],
+            }
+        return result
+
+    def report(self) -> str:
+        """
+        Formats the summary as a plain-text table sorted by p95 latency.
+        """
+        rows = sorted(self.summary().items(), key=lambda item: item[1]["p95"], reverse=True)
+        lines = [f"{'span':<32}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for name, s in rows:
+            lines.append(
+                f"{name:<32}{s['count']:>7}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans (one JSON object per line) and a per-run summary line to a local file.
+
+    Attributes:
+        path (str): Path of the JSONL file.
+    """
+    def __init__(self, path: str = "spans.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, run: RunStats):
+        lines = [json.dumps({"type": "span", **span.to_dict()}, default=str) for span in run.spans]
+        lines.append(json.dumps({"type": "run", **run.to_dict()}, default=str))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class OTelSpanExporter:
+    """
+    Replays finished spans through the OpenTelemetry API so they reach whatever
+    TracerProvider / exporter (OTLP, Jaeger, console, ...) the process has configured.
+
+    Requires the optional `opentelemetry-api` package.
+    """
+    def __init__(self, tracer_name: str = "complex_sot.agent"):
+        try:
+            from opentelemetry import trace
+            from opentelemetry.trace import Status, StatusCode
+        except ImportError as e:
+            raise ImportError("OTelSpanExporter requires the 'opentelemetry-api' package.") from e
+        self._trace = trace
+        self._status = Status
+        self._status_code = StatusCode
+        self.tracer = trace.get_tracer(tracer_name)
+
+    def export(self, run: RunStats):
+        otel_spans = {}
+        # Parents start before their children, so creating spans in start order
+        # guarantees the parent context exists when a child is created.
+        for span in sorted(run.spans, key=lambda s: s.start_time):
+            parent = otel_spans.get(span.parent_id)
+            context = self._trace.set_span_in_context(parent) if parent is not None else None
+            attributes = {k: v for k, v in span.attributes.items() if isinstance(v, (str, bool, int, float))}
+            attributes.update({"agent.kind": span.kind, "agent.run_id": run.run_id})
+            otel_spans[span.span_id] = self.tracer.start_span(
+                span.name,
+                context=context,
+                attributes=attributes,
+                start_time=int(span.start_time * 1e9),
+            )
+            if span.status == "error":
+                otel_spans[span.span_id].set_status(self._status(self._status_code.ERROR, span.error))
+        for span in run.spans:
+            otel_spans[span.span_id].end(end_time=int((span.end_time or span.start_time) * 1e9))
+
+
+class Instrumentation:
+    """
+    Records spans for graph nodes, tool invocations, LLM calls and HTTP requests,
+    exports them per run and keeps aggregate latency histograms.
+
+    Spans recorded outside `run` (e.g. when the graph is streamed directly) all attach to one
+    ambient run instead of each opening a run of their own, and the first one prints a warning.
+
+    Attributes:
+        exporters (list): Objects with an `export(run: RunStats)` method.
+        histograms (LatencyHistogram): Aggregate latency distribution per span name.
+        runs (deque[RunStats]): The most recently finished runs.
+        ambient (RunStats): Collects the spans recorded outside a run until `flush_ambient`.
+    """
+    AMBIENT_RUN_ID = "ambient"
+
+    def __init__(self, exporters=None, histograms: Optional[LatencyHistogram] = None, keep_runs: int = 100):
+        self.exporters = list(exporters or [])
+        self.histograms = histograms or LatencyHistogram()
+        self.runs: deque = deque(maxlen=keep_runs)
+        self.ambient = RunStats(self.AMBIENT_RUN_ID)
+        self._ambient_lock = threading.Lock()
+        self._warned = False
+
+    @contextmanager
+    def run(self, run_id: Optional[str] = None):
+        """
+        Groups every span recorded inside the block into one run and exports it on exit.
+
+        Args:
+            run_id (str | None): Optional identifier for the run.
+
+        Yields:
+            RunStats: The run being recorded.
+        """
+        stats = RunStats(run_id)
+        run_token = _current_run.set(stats)
+        inst_token = _current_instrumentation.set(self)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.wall_ms = (time.perf_counter() - start) * 1000
+            _current_instrumentation.reset(inst_token)
+            _current_run.reset(run_token)
+            self._export(stats)
+
+    def _export(self, stats: RunStats, record_wall: bool = True):
+        if record_wall:
+            self.histograms.record("run", stats.wall_ms)
+        self.runs.append(stats)
+        for exporter in self.exporters:
+            try:
+                exporter.export(stats)
+            except Exception as e:
+                print("Span export error:", e)
+
+    def flush_ambient(self) -> Optional[RunStats]:
+        """
+        Exports the spans collected outside a run as one run and starts a new ambient run.
+
+        Returns:
+            RunStats | None: The exported ambient run, or None if it had no spans.
+        """
+        with self._ambient_lock:
+            stats, self.ambient = self.ambient, RunStats(self.AMBIENT_RUN_ID)
+        if not stats.spans:
+            return None
+        self._export(stats, record_wall=False)  # Its spans are not one unit of work
+        return stats
+
+    def _ambient_run(self, name: str) -> RunStats:
+        if not self._warned:
+            self._warned = True
+            print(f"Instrumentation: span '{name}' recorded outside a run; spans are collected in the ambient "
+                  f"run until flush_ambient() (wrap each request in Instrumentation.run() to group its spans).")
+        with self._ambient_lock:
+            return self.ambient
+
+    @contextmanager
+    def span(self, name: str, kind: str = "node", **attributes):
+        """
+        Times the enclosed block as a span of the active run, or of the ambient run if none is active.
+
+        Args:
+            name (str): Span name (node or tool name).
+            kind (str): Span kind ("node", "tool", "llm" or "http").
+            **attributes: Initial span attributes.
+
+        Yields:
+            Span: The active span.
+        """
+        run = _current_run.get()
+        run_token = None
+        if run is None:
+            run = self._ambient_run(name)
+            run_token = _current_run.set(run)  # LLM and HTTP counters inside the span count towards it
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=run.run_id,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent is not None else None,
+            start_time=time.time(),
+            attributes=dict(attributes),
+        )
+        span_token = _current_span.set(span)
+        inst_token = _current_instrumentation.set(self)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            span.end_time = span.start_time + span.duration_ms / 1000
+            _current_instrumentation.reset(inst_token)
+            _current_span.reset(span_token)
+            if run_token is not None:
+                _current_run.reset(run_token)
+            run.finish_span(span)
+            self.histograms.record(f"{kind}:{name}", span.duration_ms)
+
+    def wrap_node(self, name: str, fn: Callable) -> Callable:
+        """
+        Wraps a graph node (sync or async) so that every execution is recorded as a span.
+
+        Args:
+            name (str): Node name used in the graph.
+            fn (Callable): Node function taking the graph state.
+
+        Returns:
+            Callable: Wrapped node function with the same calling convention.
+        """
+        if inspect.iscoroutinefunction(fn):
+            async def _async_node(state):
+                with self.span(name, "node"):
+                    return await fn(state)
+            _async_node.__name__ = name
+            return _async_node
+
+        def _node(state):
+            with self.span(name, "node"):
+                return fn(state)
+        _node.__name__ = name
+        return _node
+
+
+@contextmanager
+def tool_span(name: str, **attributes):
+    """
+    Records a tool invocation as a span when instrumentation is active; no-op otherwise.
+
+    Args:
+        name (str): Tool name.
+        **attributes: Initial span attributes.
+
+    Yields:
+        Span | None: The active span, or None when instrumentation is disabled.
+    """
+    instrumentation = _current_instrumentation.get()
+    if instrumentation is None:
+        yield None
+        return
+    with instrumentation.span(name, "tool", **attributes) as span:
+        yield span
+
+
+def current_run() -> Optional[RunStats]:
+    """
+    Returns the run recorded in the current context, or None outside `Instrumentation.run`.
+    """
+    return _current_run.get()
+
+
+def _record(key: str, value: float):
+    span = _current_span.get()
+    if span is not None:
+        span.add(key, value)
+    run = _current_run.get()
+    if run is not None:
+        run.add(key, value)
+
+
+def record_llm_usage(message):
+    """
+    Adds the token usage reported on an LLM response to the active span and run.
+
+    Args:
+        message: The AIMessage returned by a chat model.
+    """
+    if _current_run.get() is None:
+        return
+    usage = getattr(message, "usage_metadata", None) or {}
+    _record("llm_calls", 1)
+    _record("input_tokens", usage.get("input_tokens", 0))
+    _record("output_tokens", usage.get("output_tokens", 0))
+
+
+def record_http(response):
+    """
+    Adds the size of an HTTP response to the active span and run.
+
+    Args:
+        response (requests.Response): A completed response.
+    """
+    if _current_run.get() is None:
+        return
+    _record("http_requests", 1)
+    _record("http_bytes", len(response.content or b""))
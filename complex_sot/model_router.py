@@ -0,0 +1,169 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from deadline import current as current_deadline, invoke_llm
+from instrumentation import record_llm_usage
+import repo_path  # noqa: F401  (clients / llm_cache live at the repository root)
+from clients import get_chat_model
+
+# Groq models used for the two tiers
+SMALL_MODEL = "llama3-8b-8192"
+LARGE_MODEL = "llama-3.3-70b-versatile"
+
+# Which tier serves each LLM step of the pipeline. Cheap classification / rewrite
+# steps go to the small model; steps producing the answer the user reads go to the large one.
+DEFAULT_POLICY = {
+    "route": "small",               # Agent.call_groq: choosing the tool call
+    "refine_question": "small",     # Agent.refine_question: rewriting the query
+    "similarity_filter": "small",   # summarizer.similarity_filter: picking relevant questions
+    "summarize_answers": "large",   # summarizer.summarize_answers: the summary
+    "refine_answer": "large",       # Agent.refine_answer: the final answer
+}
+
+
+class ModelRouter:
+    """
+    Sends each LLM step to a small low-latency model or a large model according to a policy,
+    downgrading large-model steps to the small model under load or when the run's deadline is tight.
+
+    Attributes:
+        policy (dict): Mapping of step name to "small" or "large". Unknown steps use "large".
+        max_large_in_flight (int | None): Route large-tier steps to the small model while this many
+                                          large-model calls are already running.
+        min_large_budget (float | None): Route large-tier steps to the small model when the current
+                                         run has fewer seconds than this left.
+        stats (dict): Number of calls per "step:tier", plus "downgraded" for downgraded calls.
+    """
+    def __init__(self, small=None, large=None, policy: Optional[Dict[str, str]] = None,
+                 max_large_in_flight: Optional[int] = None, min_large_budget: Optional[float] = None,
+                 small_model_name: str = SMALL_MODEL, large_model_name: str = LARGE_MODEL):
+        self._models = {"small": small, "large": large}
+        self._names = {"small": small_model_name, "large": large_model_name}
+        self.policy = {**DEFAULT_POLICY, **(policy or {})}
+        self.max_large_in_flight = max_large_in_flight
+        self.min_large_budget = min_large_budget
+        self.stats: Dict[str, int] = {}
+        self._in_flight = {"small": 0, "large": 0}
+        self._bound = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "ModelRouter":
+        """
+        Builds a router configured from SMALL_MODEL, LARGE_MODEL, ROUTER_MAX_LARGE_IN_FLIGHT
+        and ROUTER_MIN_LARGE_BUDGET environment variables.
+        """
+        max_in_flight = os.getenv("ROUTER_MAX_LARGE_IN_FLIGHT")
+        min_budget = os.getenv("ROUTER_MIN_LARGE_BUDGET")
+        return cls(
+            small_model_name=os.getenv("SMALL_MODEL", SMALL_MODEL),
+            large_model_name=os.getenv("LARGE_MODEL", LARGE_MODEL),
+            max_large_in_flight=int(max_in_flight) if max_in_flight else None,
+            min_large_budget=float(min_budget) if min_budget else None,
+            **kwargs,
+        )
+
+    def model(self, tier: str):
+        """
+        Returns the model for a tier, using the shared ChatGroq client (see clients.py) when none was given.
+        """
+        if self._models[tier] is None:
+            self._models[tier] = get_chat_model(self._names[tier])
+        return self._models[tier]
+
+    def tier_for(self, step: str) -> str:
+        """
+        Chooses the tier for a step from the policy, the current load and the run's deadline.
+
+        Args:
+            step (str): Name of the LLM step (see DEFAULT_POLICY).
+
+        Returns:
+            str: "small" or "large".
+        """
+        tier = self.policy.get(step, "large")
+        if tier != "large":
+            return tier
+        if self.max_large_in_flight is not None and self._in_flight["large"] >= self.max_large_in_flight:
+            self._count("downgraded")
+            return "small"
+        deadline = current_deadline()
+        remaining = deadline.remaining() if deadline is not None else None
+        if self.min_large_budget is not None and remaining is not None and remaining < self.min_large_budget:
+            self._count("downgraded")
+            return "small"
+        return tier
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _with_tools(self, model, tools):
+        key = (id(model), tuple(t.name for t in tools))
+        if key not in self._bound:
+            self._bound[key] = model.bind_tools(tools)
+        return self._bound[key]
+
+    def invoke(self, step: str, messages, tools=None):
+        """
+        Invokes the model chosen for `step`, bounded by the current deadline.
+
+        Args:
+            step (str): Name of the LLM step.
+            messages: Input messages.
+            tools (list | None): Tools to bind for this call.
+
+        Returns:
+            The model's response message.
+        """
+        tier = self.tier_for(step)
+        model = self.model(tier)
+        if tools:
+            model = self._with_tools(model, tools)
+        self._count(f"{step}:{tier}")
+        with self._lock:
+            self._in_flight[tier] += 1
+        try:
+            response = invoke_llm(model, messages)
+        finally:
+            with self._lock:
+                self._in_flight[tier] -= 1
+        record_llm_usage(response)
+        return response
+
+
+# Process-wide router used by the tool modules (see set_router)
+_router: Optional[ModelRouter] = None
+
+
+def set_router(router: Optional[ModelRouter]):
+    """
+    Installs the router used by the tool modules' LLM steps (None restores their own models).
+    """
+    global _router
+    _router = router
+
+
+def get_router() -> Optional[ModelRouter]:
+    return _router
+
+
+def route(step: str, messages, get_default: Callable[[], Any]):
+    """
+    Invokes `step` through the process-wide router, or with the default model when no router is installed.
+
+    Args:
+        step (str): Name of the LLM step.
+        messages: Input messages.
+        get_default (Callable): Returns the model to use when no router is installed; only called then,
+                                so routed setups never create it.
+
+    Returns:
+        The model's response message.
+    """
+    if _router is not None:
+        return _router.invoke(step, messages)
+    response = invoke_llm(get_default(), messages)
+    record_llm_usage(response)
+    return response
@@ -0,0 +1,169 @@
+import contextvars
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from deadline import Deadline, activate as activate_deadline, check as check_deadline, current as current_deadline
+from instrumentation import tool_span
+
+# The prefetcher of the agent run executing in the current thread / asyncio task.
+_current_prefetcher: contextvars.ContextVar = contextvars.ContextVar("current_prefetcher", default=None)
+
+
+class _SpeculativeDeadline(Deadline):
+    # Expires with the run and is cancelled with it, but can also be cancelled on its own
+    def __init__(self, parent: Optional[Deadline]):
+        super().__init__()
+        self.parent = parent
+        if parent is not None:
+            self.expires_at = parent.expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+
+class Prefetcher:
+    """
+    Speculatively fetches Stack Overflow questions as soon as their URLs are known, so the
+    `stack_overflow` step finds them ready instead of starting the requests itself.
+
+    `results_found` already runs the URL search before the graph reaches the tool nodes; the
+    prefetcher starts one background fetch per URL right then. The `stack_overflow` step takes the
+    fetches of the URLs it was asked for (waiting for those still running and starting any missing
+    one) and the rest are cancelled, as they are when the branch is not taken at all. A cancelled
+    fetch that is still queued never starts; one already running stops at its next deadline check.
+
+    A Prefetcher belongs to one run and is passed to the graph through the run config, next to
+    the deadline:
+        graph.stream(inputs, {"configurable": {"deadline": deadline, "prefetcher": prefetcher}})
+    Without one the graph does not prefetch. Whoever creates it cancels it when the run ends.
+
+    Attributes:
+        fetch (Callable[[str], Any]): Fetches one URL (StackOverflow.fetch_question); None results are dropped.
+        tool_name (str): Name of the tool whose calls are served from the prefetched results.
+        max_urls (int): Maximum number of URLs prefetched at once.
+        stats (dict): Counts of speculative fetches "started", "used" (taken by the step) and "cancelled".
+    """
+    def __init__(self, fetch: Callable[[str], Any], tool_name: str, max_workers: int = 8, max_urls: int = 10,
+                 pool: Optional[Executor] = None):
+        self.fetch = fetch
+        self.tool_name = tool_name
+        self.max_urls = max_urls
+        self.stats = {"started": 0, "used": 0, "cancelled": 0}
+        # Runs share their agent's pool; threads start on first use
+        self._pool = pool or ThreadPoolExecutor(max_workers=max_workers)
+        self._inflight: Dict[str, tuple] = {}  # url -> (future, its deadline, started speculatively)
+        self._lock = threading.Lock()
+
+    def _run(self, url: str, deadline: Deadline):
+        with activate_deadline(deadline), tool_span(self.tool_name, url=url, speculative=True):
+            deadline.check()
+            return self.fetch(url)
+
+    def start(self, urls: List[str]):
+        """
+        Starts fetching the first `max_urls` URLs not already in flight, in the current run's context.
+        """
+        self._start(urls[:self.max_urls], speculative=True)
+
+    def _start(self, urls: List[str], speculative: bool):
+        parent = current_deadline()
+        with self._lock:
+            for url in urls:
+                if url in self._inflight:
+                    continue
+                deadline = _SpeculativeDeadline(parent)
+                future = self._pool.submit(contextvars.copy_context().run, self._run, url, deadline)
+                self._inflight[url] = (future, deadline, speculative)
+                if speculative:
+                    self.stats["started"] += 1
+
+    def _take(self, url: str) -> Optional[Future]:
+        with self._lock:
+            entry = self._inflight.pop(url, None)
+            if entry is not None and entry[2]:
+                self.stats["used"] += 1
+            return entry[0] if entry is not None else None
+
+    def cancel(self):
+        """
+        Cancels every fetch not taken yet.
+        """
+        with self._lock:
+            entries, self._inflight = list(self._inflight.values()), {}
+            self.stats["cancelled"] += sum(1 for entry in entries if entry[2])
+        for future, deadline, _ in entries:
+            future.cancel()
+            deadline.cancel()
+
+    def run(self, urls: List[str], cancel_rest: bool = True) -> list:
+        """
+        Returns the questions for `urls`, in order, like StackOverflow.tool_fn, from the prefetched
+        fetches where available; missing URLs are fetched now, concurrently.
+
+        Args:
+            urls (list[str]): Stack Overflow question URLs.
+            cancel_rest (bool): Cancel prefetched URLs not in `urls` (False while other branches may take them).
+
+        Returns:
+            list[dict]: The questions with their top answers.
+        """
+        check_deadline()
+        self._start(urls, speculative=False)
+        futures = [self._take(url) for url in urls]
+        if cancel_rest:
+            self.cancel()
+        results = []
+        for future in futures:
+            if future is None:  # A URL listed twice
+                continue
+            deadline = current_deadline()
+            try:
+                question = future.result(timeout=deadline.timeout() if deadline is not None else None)
+            except FutureTimeoutError:
+                check_deadline()  # Only a deadline sets the timeout, so this raises DeadlineExceeded
+                raise
+            if question is not None:
+                results.append(question)
+        return results
+
+
+def current() -> Optional[Prefetcher]:
+    """
+    Returns the prefetcher of the run executing in the current context, if any.
+    """
+    return _current_prefetcher.get()
+
+
+@contextmanager
+def activate(prefetcher: Optional[Prefetcher]):
+    """
+    Makes `prefetcher` the current prefetcher for the enclosed block.
+    """
+    token = _current_prefetcher.set(prefetcher)
+    try:
+        yield prefetcher
+    finally:
+        _current_prefetcher.reset(token)
+
+
+def from_config(config) -> Optional[Prefetcher]:
+    """
+    Extracts the Prefetcher passed as `configurable.prefetcher` in a run config.
+    """
+    prefetcher = ((config or {}).get("configurable") or {}).get("prefetcher")
+    return prefetcher if isinstance(prefetcher, Prefetcher) else None
+
+
+def with_prefetcher(node):
+    """
+    Wraps a graph node or routing function taking (state, config), such as one returned by
+    deadline.with_deadline, so it runs with the prefetcher from its run config.
+    """
+    def _node(state, config):
+        with activate(from_config(config)):
+            return node(state, config)
+    _node.__name__ = getattr(node, "__name__", "node")
+    return _node
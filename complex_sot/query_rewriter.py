@@ -0,0 +1,189 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from deadline import RunAborted, check as check_deadline
+
+# Conversational filler that does not help a search engine
+FILLER_PATTERN = re.compile(
+    r"\b(?:hi|hello|hey|thanks?(?: you)?(?: in advance)?|please|pls|help(?: me)?|any (?:ideas|help)|"
+    r"can (?:someone|anyone|you)(?: please)?(?: tell me| explain| help)?|"
+    r"how (?:do|can|would|should|to) (?:i|we|you)?|what(?:'s| is) the (?:best|right|correct|easiest) way to|"
+    r"is (?:there|it) (?:a way|possible) to|i(?:'m| am)? (?:want|need|trying|tried|have been trying) to|"
+    r"i (?:get|got|am getting|keep getting)|my|really|just|basically|actually)\b",
+    re.IGNORECASE,
+)
+
+# Exception names, optionally followed by their message, e.g. "TypeError: 'NoneType' object is not subscriptable"
+ERROR_PATTERN = re.compile(r"\b([A-Z]\w*(?:Error|Exception|Warning)|Traceback|Segmentation fault)\b(?::\s*([^\n]+))?")
+QUOTED_PATTERN = re.compile(r"[\"'`]([^\"'`\n]{12,})[\"'`]")
+# Where the user's own words resume after an error message ("... when I run it, please help")
+MESSAGE_END = re.compile(r"\s+(?:when|while|after|whenever|because|but|if|in my|on my|for my)\s|,\s*(?:please|and|but|so|any)\b|[?!]|\.\s",
+                         re.IGNORECASE)
+
+# Words that identify a language or stack, mapped to the tag added to the query
+LANGUAGE_HINTS = {
+    "python": ["python", "pip", "pandas", "numpy", "django", "flask", "pytest", "def", "traceback", "dict",
+               "list comprehension", "importerror", "modulenotfounderror", "indentationerror", "keyerror",
+               "nonetype", "attributeerror", "valueerror", "subscriptable", "self", "virtualenv", "venv"],
+    "javascript": ["javascript", "js", "node", "npm", "react", "typeerror: cannot read", "undefined is not",
+                   "promise", "async/await", "const", "jquery"],
+    "java": ["java", "jvm", "maven", "gradle", "nullpointerexception", "spring", "classnotfoundexception"],
+    "c#": ["c#", ".net", "dotnet", "linq", "nullreferenceexception", "asp.net"],
+    "c++": ["c++", "cpp", "std::", "segmentation fault", "g++", "template"],
+    "sql": ["sql", "select", "join", "postgres", "mysql", "sqlite", "query"],
+    "git": ["git", "commit", "rebase", "merge conflict", "branch"],
+}
+
+STOPWORDS = set("""
+a an the and or but if then else of to in on at by for with from into onto about as is are was were be been being
+do does did doing have has had having i me my we our you your it its this that these those there here what which
+who whom whose why how when where can could should would will shall may might must not no so such than too very
+get got getting some any all each every other same own only also just like want need trying try tried way use
+using used work works working problem issue question error exception
+""".split())
+
+MAX_KEY_TERMS = 8
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip(" ?!.,;:")
+
+
+def key_terms(query: str) -> List[str]:
+    """
+    Returns the distinctive terms of a query, in order: identifiers and words that are not stopwords.
+    """
+    terms = []
+    for word in re.findall(r"[\w#+.:/()\[\]-]+", query.lower()):
+        word = word.strip(".:()[]")
+        if word and word not in STOPWORDS and word not in terms and (len(word) > 1 or word in ("c", "r")):
+            terms.append(word)
+    return terms
+
+
+def detect_language(query: str) -> Optional[str]:
+    """
+    Returns the language / stack tag the query is most likely about, or None.
+    """
+    text = query.lower()
+    scores = {lang: sum(1 for hint in hints if re.search(r"(?<![\w.#+])" + re.escape(hint) + r"(?![\w#+])", text))
+              for lang, hints in LANGUAGE_HINTS.items()}
+    lang, score = max(scores.items(), key=lambda item: item[1])
+    return lang if score else None
+
+
+def error_message(query: str) -> Optional[str]:
+    """
+    Returns the error in a query ("KeyError: 'id'"), or the longest quoted message, or None.
+    """
+    match = ERROR_PATTERN.search(query)
+    if match:
+        message = match.group(0) if match.group(2) else match.group(1)
+        return _squash(MESSAGE_END.split(message, maxsplit=1)[0])
+    quoted = sorted(QUOTED_PATTERN.findall(query), key=len, reverse=True)
+    return _squash(quoted[0]) if quoted else None
+
+
+class QueryRewriter:
+    """
+    Cheap, local rewrites of a question that found no Stack Overflow results, tried before asking
+    the LLM to refine it (see Agent.refine_question).
+
+    Rewrites, in order:
+        error     - the error message alone, with the language tag
+        language  - the question without conversational filler ("how do I", "please", ...), with the
+                    detected language tag added
+        filler    - the question without filler
+        terms     - the key terms only (stopwords removed, at most MAX_KEY_TERMS)
+
+    Each rewrite is checked against the search cache first (when the caller has one) and, up to
+    `max_searches` per retry, with a live search. Rewrites identical to the question or to one already
+    tried are skipped.
+
+    Live searches trade latency for LLM calls: a hit skips the refinement and routing LLM calls, a miss
+    adds its search time and cost before the LLM path. They run inside the run's deadline, which is
+    checked before each one. With `max_searches=0` only cached rewrites are used.
+
+    Attributes:
+        enabled (bool): When False every retry goes to the LLM.
+        max_searches (int): Live searches per retry for rewrites not found in the cache.
+        stats (dict): Counts of "cache_hits", "search_hits", "searches" (live searches made) and
+                      "fallbacks" (retries left to the LLM).
+    """
+    def __init__(self, enabled: bool = True, max_searches: int = 1):
+        self.enabled = enabled
+        self.max_searches = max_searches
+        self.stats = {"cache_hits": 0, "search_hits": 0, "searches": 0, "fallbacks": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def rewrites(self, question: str) -> List[str]:
+        """
+        Returns the distinct rewrites of `question`, most specific first.
+        """
+        lang = detect_language(question)
+        tag = lambda text: text if not lang or lang in text.lower() else f"{lang} {text}"
+        candidates = []
+        error = error_message(question)
+        if error:
+            candidates.append(tag(error))
+        stripped = _squash(FILLER_PATTERN.sub(" ", question))
+        candidates.append(tag(stripped))
+        candidates.append(stripped)
+        terms = key_terms(stripped)[:MAX_KEY_TERMS]
+        if terms:
+            candidates.append(tag(" ".join(terms)))
+        original = _squash(question).lower()
+        unique = []
+        for candidate in candidates:
+            if candidate and candidate.lower() != original and candidate not in unique:
+                unique.append(candidate)
+        return unique
+
+    def find(self, question: str, lookup: Callable[[str], Optional[list]], search: Callable[[str], list],
+             tried: set = frozenset()) -> Optional[Dict]:
+        """
+        Returns the first rewrite with search results, or None when the LLM should refine the question.
+
+        Args:
+            question (str): The question that found nothing.
+            lookup (Callable | None): Returns cached results for a query, or None (no network).
+            search (Callable): Runs a live search for a query.
+            tried (set): Queries already tried in this run.
+
+        Returns:
+            dict | None: {"query": rewrite, "results": results}.
+
+        Raises:
+            RunAborted: If the run is cancelled or out of time before a live search.
+        """
+        if not self.enabled:
+            return None
+        searches = 0
+        for candidate in self.rewrites(question):
+            if candidate in tried:
+                continue
+            results = lookup(candidate) if lookup is not None else None
+            if results:
+                self._count("cache_hits")
+                return {"query": candidate, "results": results}
+            if searches < self.max_searches:
+                check_deadline()
+                searches += 1
+                self._count("searches")
+                try:
+                    results = search(candidate)
+                except RunAborted:
+                    raise
+                except Exception as e:
+                    print("Rewrite search error:", e)
+                    results = None
+                if results:
+                    self._count("search_hits")
+                    return {"query": candidate, "results": results}
+        self._count("fallbacks")
+        return None
@@ -0,0 +1,10 @@
+"""
+Puts the repository root on sys.path, so the complex_sot agent imports the modules it shares with the
+root scripts (clients.py, llm_cache.py) from their one copy there. Import it before them.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)  # After this directory, so its own modules take precedence
@@ -1,11 +1,21 @@
 from typing import List, Dict
 from pydantic import BaseModel, Field
-from langchain_groq import ChatGroq
 from langchain_core.tools import StructuredTool
 from langchain_core.messages import HumanMessage
+from model_router import route
+import repo_path  # noqa: F401  (clients / llm_cache live at the repository root)
+from clients import get_chat_model
+
+# Language model for the summarizer; None uses the shared Groq LLaMA 3 8B client (see clients.py)
+model = None
+
+
+def chat_model():
+    """
+    Returns the summarizer's language model, creating the shared Groq client on first use.
+    """
+    return model if model is not None else get_chat_model()
 
-# Initialize the language model from Groq's LLaMA 3 8B 8192 model
-model = ChatGroq(model="llama3-8b-8192")
 
 class StackOverflowSummaryInput(BaseModel):
     """
@@ -53,7 +63,7 @@ Just return the relevant questions as a new line character separated list.
 If no questions are relevant, return an empty string.
 """
     # Invoke the LLM with the prompt
-    response = model.invoke([HumanMessage(content=prompt)]).content
+    response = route("similarity_filter", [HumanMessage(content=prompt)], get_default=chat_model).content
     
     # Parse the response into a list of question strings
     relevant_questions = response.strip().split('\n')
@@ -84,7 +94,7 @@ def summarize_answers(query: str, stackoverflow_data: List[Dict]) -> str:
     for item in relevant_data:
         context += f"\n\nQuestion: {item['question']}\n"
         for ans in item['answers']:
-            context += f"Upvotes: {ans['Upvotes']}\nAnswer: {ans['Body']}\n"
+            context += f"Upvotes: {ans['Upvotes']}\nLink: {ans['Link']}\nAnswer: {ans['Body']}\n"
 
     # Prepare a prompt to the LLM to summarize the relevant answers
     prompt = f"""
@@ -95,9 +105,10 @@ Here are the relevant Stack Overflow answers:
 {context}
 
 Only include the most insightful and concise information. Mention if multiple solutions exist.
+Cite the links of the answers you use.
 """
     # Call the LLM to get the summary
-    response = model.invoke([HumanMessage(content=prompt)])
+    response = route("summarize_answers", [HumanMessage(content=prompt)], get_default=chat_model)
     return response.content
 
 # Create a StructuredTool instance for integration with LangChain workflows
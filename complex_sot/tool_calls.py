@@ -0,0 +1,52 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Callable, List, Optional, Tuple
+
+
+def run_tool_calls(pool: Executor, calls: List[Callable[[], Any]],
+                   timeout: Optional[float] = None) -> List[Tuple[Any, Optional[BaseException]]]:
+    """
+    Runs the tool calls of one LLM turn concurrently and returns their outcomes in call order.
+
+    At most the pool's worker count run at a time. Each call gets `timeout` seconds from the moment
+    it starts (time spent queued for a worker does not count); a call that overruns is abandoned
+    (its thread cannot be interrupted and finishes in the background) and reported as a TimeoutError.
+    Calls run in a copy of the caller's context, so the run's deadline and spans are visible to them.
+
+    Args:
+        pool (Executor): Thread pool bounding the parallelism.
+        calls (list[Callable]): Zero-argument functions, one per tool call.
+        timeout (float | None): Per-call timeout in seconds.
+
+    Returns:
+        list[tuple[Any, BaseException | None]]: (result, None) or (None, error) per call, in order.
+    """
+    started = {}
+
+    def _run(i: int, call: Callable[[], Any]):
+        started[i] = time.monotonic()
+        return call()
+
+    futures = {pool.submit(contextvars.copy_context().run, _run, i, call): i for i, call in enumerate(calls)}
+    outcomes: list = [None] * len(calls)
+    pending = set(futures)
+    while pending:
+        wait_for = None
+        if timeout is not None:
+            now = time.monotonic()
+            for future in list(pending):
+                i = futures[future]
+                if i in started and now - started[i] >= timeout and not future.done():
+                    pending.discard(future)
+                    outcomes[i] = (None, TimeoutError(f"Tool call timed out after {timeout}s"))
+            # Wake up when the next running call runs out of time (or a queued one may have started)
+            left = [started[futures[f]] + timeout - now for f in pending if futures[f] in started]
+            wait_for = max(0.0, min(left)) if left else timeout
+        if not pending:
+            break
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            outcomes[futures[future]] = (None, error) if error is not None else (future.result(), None)
+    return outcomes
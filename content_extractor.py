@@ -0,0 +1,151 @@
+import re
+
+# Tags whose text is never content, removed before anything else
+JUNK_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "button", "select", "input"]
+# Page furniture, skipped when extracting the article (but kept in the whole-page fallback)
+BOILERPLATE_TAGS = ["nav", "footer", "aside", "header"]
+
+# class / id hints, as in Readability
+NEGATIVE = re.compile(r"nav|menu|footer|header|sidebar|side-bar|cookie|consent|banner|promo|advert|\bads?\b|"
+                      r"social|share|comment|related|breadcrumb|subscribe|newsletter|popup|modal|widget|sponsor",
+                      re.I)
+POSITIVE = re.compile(r"article|content|main|post|entry|story|text|body|blog|paper|abstract", re.I)
+
+# Elements whose text counts towards their ancestors' scores, and the blocks kept in the output
+SCORED_TAGS = ["p", "pre", "td", "blockquote", "li"]
+BLOCK_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6", "p", "pre", "blockquote", "li", "td", "dt", "dd", "figcaption"]
+
+MIN_PARAGRAPH_CHARS = 25
+MIN_ARTICLE_CHARS = 250
+
+
+def _hints(tag) -> str:
+    return " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+
+
+def _class_weight(tag) -> int:
+    hints = _hints(tag)
+    weight = 0
+    if NEGATIVE.search(hints):
+        weight -= 25
+    if POSITIVE.search(hints):
+        weight += 25
+    return weight
+
+
+def _is_boilerplate(tag) -> bool:
+    if tag.name in BOILERPLATE_TAGS:
+        # An <article>'s own <header> holds its title
+        return not (tag.name == "header" and tag.find_parent(["article", "main"]) is not None)
+    hints = _hints(tag)
+    return bool(NEGATIVE.search(hints)) and not POSITIVE.search(hints)
+
+
+def _link_density(tag, text_len: int) -> float:
+    if not text_len:
+        return 1.0
+    link_len = sum(len(a.get_text(" ", strip=True)) for a in tag.find_all("a"))
+    return min(1.0, link_len / text_len)
+
+
+def _inside(tag, ids: set, stop=None) -> bool:
+    # Whether one of tag's ancestors (below `stop`) is in `ids`
+    parent = tag.parent
+    while parent is not None and parent is not stop:
+        if id(parent) in ids:
+            return True
+        parent = parent.parent
+    return False
+
+
+def _block_text(container, skipped: set) -> str:
+    if container.name in BLOCK_TAGS:
+        return container.get_text(" ", strip=True)
+    blocks, seen = [], set()
+    for block in container.find_all(BLOCK_TAGS):
+        if _inside(block, skipped) or _inside(block, seen, stop=container):
+            continue  # boilerplate, or nested in a block already emitted (a <p> in an <li>)
+        seen.add(id(block))
+        text = block.get_text(" ", strip=True)
+        if text and _link_density(block, len(text)) < 0.5:
+            blocks.append(text)
+    return "\n".join(blocks)
+
+
+def full_text(soup) -> str:
+    """
+    Returns all text of a parsed page, one non-empty line per line.
+    """
+    lines = (line.strip() for line in soup.get_text("\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_main_text(html, min_chars: int = MIN_ARTICLE_CHARS) -> str:
+    """
+    Returns the main article text of a page, without menus, headers, footers, cookie banners,
+    sidebars and scripts.
+
+    Readability-style scoring: every paragraph-like block adds to the score of its parent (in full)
+    and grandparent (in half) a base point, one point per comma and up to three for its length.
+    Candidates' scores are adjusted by class/id hints and multiplied by (1 - link density), and the
+    best candidate plus siblings scoring at least a fifth of it are kept. When the result is shorter
+    than `min_chars` the whole page text is returned instead, so nothing is lost on pages the
+    heuristics do not fit.
+
+    Args:
+        html (str | bytes | BeautifulSoup): The page. A BeautifulSoup object is modified in place.
+        min_chars (int): Minimum length of an extracted article.
+
+    Returns:
+        str: One block (paragraph, heading, list item, ...) per line.
+    """
+    from bs4 import BeautifulSoup  # Deferred: only needed once a page is fetched
+    soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, "html.parser")
+
+    for tag in soup.find_all(JUNK_TAGS):
+        tag.decompose()
+    skipped = {id(tag) for tag in soup.find_all(True) if _is_boilerplate(tag)}
+
+    scores = {}
+    for block in soup.find_all(SCORED_TAGS):
+        if id(block) in skipped or _inside(block, skipped):
+            continue
+        text = block.get_text(" ", strip=True)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = block.parent
+        for ancestor, share in ((parent, 1.0), (parent.parent if parent is not None else None, 0.5)):
+            if ancestor is None or ancestor.name == "[document]":
+                continue
+            if id(ancestor) not in scores:
+                scores[id(ancestor)] = [ancestor, 5 + _class_weight(ancestor)]
+            scores[id(ancestor)][1] += score * share
+
+    ranked = sorted(((score * (1 - _link_density(tag, len(tag.get_text(" ", strip=True)))), tag)
+                     for tag, score in scores.values()), key=lambda item: item[0], reverse=True)
+    if not ranked:
+        return full_text(soup)
+    best_score, best = ranked[0]
+    # A wrapper holding only the best candidate is the same block; its siblings are the real neighbours
+    while best.parent is not None and best.parent.name != "[document]" and \
+            len(best.parent.find_all(recursive=False)) == 1:
+        best = best.parent
+
+    # Articles split over sibling containers (one <div> per section or per forum post) are kept
+    # together: a sibling is kept when its best-scoring candidate reaches a fifth of the best score
+    threshold = max(10, best_score * 0.2)
+    sibling_scores = {}
+    for score, tag in ranked:
+        node = tag
+        while node is not None and node.parent is not best.parent:
+            node = node.parent
+        if node is not None:
+            sibling_scores[id(node)] = max(score, sibling_scores.get(id(node), 0))
+    siblings = best.parent.find_all(recursive=False) if best.parent is not None else [best]
+    parts = [_block_text(sibling, skipped) for sibling in siblings
+             if sibling is best or sibling_scores.get(id(sibling), 0) >= threshold]
+    text = "\n".join(part for part in parts if part)
+    if len(text) < min_chars:
+        return full_text(soup)
+    return text
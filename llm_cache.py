@@ -0,0 +1,183 @@
+# Shared LLM response cache, used by the root scripts, complex_sot/ and MCP/server/
+# (those directories put the repository root on sys.path, see their repo_path.py).
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation, GenerationChunk
+
+# loads() is marked beta; the cache only reads back what dumps() wrote itself.
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+# The classes a cached response is made of. Passing them explicitly to loads() restricts what a
+# cache file can instantiate and avoids the pending-deprecation warning of the default on every hit.
+CACHED_OBJECTS = [Generation, GenerationChunk, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk]
+
+# Message fields that differ between otherwise identical prompts (graph-assigned ids, timing metadata)
+VOLATILE_MESSAGE_FIELDS = {"id", "response_metadata", "usage_metadata"}
+
+# Model / call settings that do not change the generated text
+VOLATILE_MODEL_FIELDS = {"groq_api_key", "api_key", "max_retries", "timeout", "request_timeout"}
+
+
+def _canonical_prompt(prompt: str) -> str:
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    for message in messages if isinstance(messages, list) else []:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for name in VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(name, None)
+    return json.dumps(messages, sort_keys=True, separators=(",", ":"))
+
+
+def _canonical_llm_string(llm_string: str) -> str:
+    # Chat models describe themselves as "<serialized model>---<sorted call params>"
+    # or, when not serializable, as the sorted call params alone.
+    model, sep, params = llm_string.rpartition("---")
+    try:
+        model_data = json.loads(model) if model else {}
+        for name in VOLATILE_MODEL_FIELDS:
+            model_data.get("kwargs", {}).pop(name, None)
+        param_items = [(k, v) for k, v in ast.literal_eval(params) if k not in VOLATILE_MODEL_FIELDS]
+    except (ValueError, SyntaxError, TypeError, AttributeError):
+        return llm_string
+    return json.dumps([model_data, param_items], sort_keys=True, separators=(",", ":"), default=str)
+
+
+class SQLiteLRUCache(BaseCache):
+    """
+    Exact-match LLM response cache stored in SQLite with least-recently-used eviction.
+
+    Entries are keyed by the model name and generation parameters plus the canonicalized
+    messages, so prompts that only differ in message ids or response metadata share an entry.
+    The database uses WAL mode, so several processes can share one cache file.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of the cached responses.
+        hits (int): Lookups answered from the cache by this process.
+        misses (int): Lookups not found in the cache by this process.
+    """
+    def __init__(self, path: str = ".llm_cache.sqlite", max_entries: int = 10000, max_bytes: int = 100 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def cache_key(prompt: str, llm_string: str) -> str:
+        """
+        Returns the cache key for a prompt / model pair.
+        """
+        canonical = _canonical_llm_string(llm_string) + "\x00" + _canonical_prompt(prompt)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.cache_key(prompt, llm_string)
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        with conn:
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        with self._stats_lock:
+            self.hits += 1
+        return loads(row[0], allowed_objects=CACHED_OBJECTS, secrets_from_env=False)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        key = self.cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk entries from least to most recently used until both limits are met.
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+
+    def clear(self, **kwargs):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def enable_llm_cache(path: Optional[str] = None, max_entries: Optional[int] = None,
+                     max_bytes: Optional[int] = None) -> Optional[SQLiteLRUCache]:
+    """
+    Installs a SQLiteLRUCache as LangChain's global LLM cache, so every chat model call
+    (sync or async) in the process goes through it.
+
+    Settings default to the LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES and LLM_CACHE_MAX_BYTES
+    environment variables; LLM_CACHE_DISABLED=1 turns the cache off.
+
+    Returns:
+        SQLiteLRUCache | None: The installed cache, or None when disabled.
+    """
+    if os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    existing = get_llm_cache()
+    if isinstance(existing, SQLiteLRUCache):
+        return existing
+    cache = SQLiteLRUCache(
+        path=path or os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite"),
+        max_entries=max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        max_bytes=max_bytes or int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024))),
+    )
+    set_llm_cache(cache)
+    return cache
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Optional
+
+
+def content_hash(text: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def summary_key(kind: str, text: str, model_name: str) -> str:
+    """
+    Returns the key of the `kind` result (e.g. "summary" or "translation:hi") of `text` made by a model.
+    """
+    return f"{kind}\x00{model_name}\x00{content_hash(text)}"
+
+
+class CachedPage:
+    """
+    A page's extracted text and the validators needed to revalidate it.
+
+    Attributes:
+        text (str): Extracted text.
+        etag (str | None): ETag response header.
+        last_modified (str | None): Last-Modified response header.
+        hash (str): content_hash(text).
+    """
+    def __init__(self, text: str, etag: Optional[str], last_modified: Optional[str], hash: str):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.hash = hash
+
+    def conditional_headers(self) -> dict:
+        """
+        Returns the If-None-Match / If-Modified-Since headers revalidating this page.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    SQLite cache of fetched pages and of the summaries made from them.
+
+    Pages are stored with their ETag / Last-Modified validators so a later fetch can be a
+    conditional request: a 304 reply reuses the stored text without downloading the page.
+    Summaries (and translations) are keyed by the hash of the text they were made from, so an
+    unchanged page, or the same text reached through another URL, skips the LLM calls too.
+    Both tables are trimmed to `max_entries` rows, least recently used first. Like the LLM cache,
+    the database uses WAL mode and can be shared by several processes.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        max_entries (int): Maximum number of pages, and of summaries, kept.
+        stats (dict): Counts of "downloaded", "not_modified", "summary_hits" and "summary_misses".
+    """
+    def __init__(self, path: str = ".page_cache.sqlite", max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = {"downloaded": 0, "not_modified": 0, "summary_hits": 0, "summary_misses": 0}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, text TEXT NOT NULL, etag TEXT, "
+                "last_modified TEXT, hash TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[name] += n
+
+    def get_page(self, url: str) -> Optional[CachedPage]:
+        row = self._connect().execute(
+            "SELECT text, etag, last_modified, hash FROM pages WHERE url = ?", (url,)).fetchone()
+        return CachedPage(*row) if row else None
+
+    def put_page(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> CachedPage:
+        page = CachedPage(text, etag, last_modified, content_hash(text))
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO pages (url, text, etag, last_modified, hash, last_access) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (url, text, etag, last_modified, page.hash, time.time()))
+            self._evict(conn, "pages", "url")
+        return page
+
+    def touch_page(self, url: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+
+    def get_summary(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.count("summary_misses")
+            return None
+        with conn:
+            conn.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.count("summary_hits")
+        return row[0]
+
+    def put_summary(self, key: str, value: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO summaries (key, value, last_access) VALUES (?, ?, ?)",
+                         (key, value, time.time()))
+            self._evict(conn, "summaries", "key")
+
+    def cached_summary(self, kind: str, text: str, model_name: str, compute: Callable[[], str]) -> str:
+        """
+        Returns the cached `kind` result (e.g. "summary" or "translation:hi") for `text` and the
+        model, computing and storing it on a miss.
+        """
+        key = summary_key(kind, text, model_name)
+        value = self.get_summary(key)
+        if value is None:
+            value = compute()
+            self.put_summary(key, value)
+        return value
+
+    def _evict(self, conn: sqlite3.Connection, table: str, key: str):
+        (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        if count > self.max_entries:
+            conn.execute(f"DELETE FROM {table} WHERE {key} IN "
+                         f"(SELECT {key} FROM {table} ORDER BY last_access LIMIT ?)", (count - self.max_entries,))
+
+
+@lru_cache(maxsize=None)
+def get_page_cache() -> Optional[PageCache]:
+    """
+    Returns the process-wide PageCache, created on first use.
+
+    PAGE_CACHE_PATH and PAGE_CACHE_MAX_ENTRIES configure it; PAGE_CACHE_DISABLED=1 turns it off.
+
+    Returns:
+        PageCache | None: The cache, or None when disabled.
+    """
+    if os.getenv("PAGE_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    return PageCache(path=os.getenv("PAGE_CACHE_PATH", ".page_cache.sqlite"),
+                     max_entries=int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000")))
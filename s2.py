@@ -1,22 +1,19 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
 import re
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
-from langchain.tools import StructuredTool
+from langchain_core.tools import StructuredTool
 import requests
-from bs4 import BeautifulSoup
 
-from langchain_groq import ChatGroq
-model=ChatGroq(model='llama3-8b-8192')
+from clients import get_chat_model, get_search_tool
+from llm_cache import enable_llm_cache
 
 class StackOverFlowToolInput(BaseModel):
     query: str = Field(..., description="The search query for Stack Overflow")
 
-tavily_tool=TavilySearchResults(max_results=10)
-
 
 # Function to beautify the HTML body
 def beautify_html_body(body):
+    from bs4 import BeautifulSoup  # Deferred: only needed once answers are fetched
     soup = BeautifulSoup(body, "html.parser")
     return soup.get_text()
 
@@ -73,7 +70,7 @@ def answers(query)-> dict:
     """
     urls=[]
     qs=[]
-    response=tavily_tool.invoke(f'stack overflow {query}')
+    response=get_search_tool().invoke(f'stack overflow {query}')
     for result in response:
         if "https://stackoverflow.com" not in result['url']:
             continue
@@ -127,7 +124,7 @@ def answers(query)-> dict:
 #         3. If relevant questions are found, answer the user query using only the information from the associated answers.
 #         4. If there are multiple answers, prioritize those with higher upvotes. In case of contradictory answers, prefer the one with more upvotes.
 #         5. Do not use any external knowledge beyond what is provided in the answers.""".strip()
-#     response = model.invoke([HumanMessage(content=prompt)])
+#     response = get_chat_model().invoke([HumanMessage(content=prompt)])
 #     return {"Answer":response.content}
 
 Stack_overflow_tool = StructuredTool.from_function(
@@ -139,6 +136,7 @@ Stack_overflow_tool = StructuredTool.from_function(
     
         
 if __name__ == "__main__":
+    enable_llm_cache()  # Repeated prompts are answered from the shared on-disk cache
     query = "How to reverse a list in Python?"
     result = tool_fn(query)
     print(result)
@@ -0,0 +1,32 @@
+"""
+Shared fixtures: the complex_sot agent modules wired to the offline stubs of benchmarks/stubs.py.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "complex_sot"))
+
+from stubs import FakeChatModel, FakeTavily, StackExchangeReplayServer  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def agent_modules():
+    # Session-wide: the modules are imported once, so they keep the first server's URL
+    with StackExchangeReplayServer(latency=0.0) as server:
+        os.environ["STACKEXCHANGE_API_URL"] = server.url
+        os.environ.setdefault("GROQ_API_KEY", "offline-test")
+        os.environ.setdefault("TAVILY_API_KEY", "offline-test")
+        import get_urls
+        import summarizer
+        from StackOverflow import Stack_overflow_tool
+        from final import Agent
+        from instrumentation import Instrumentation
+
+        get_urls.search_tool = FakeTavily(latency=0.0)
+        summarizer.model = FakeChatModel(latency=0.0, tokens_per_second=1e6)
+        tools = [get_urls.get_url_tool, Stack_overflow_tool, summarizer.StackOverflowSummarizer]
+        yield Agent, Instrumentation, tools
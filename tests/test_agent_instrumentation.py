@@ -0,0 +1,64 @@
+"""
+Checks that the complex_sot Agent records one instrumentation run per question, offline
+(stub LLM, search and Stack Exchange from benchmarks/stubs.py).
+
+Run from the repository root: python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from stubs import FakeChatModel  # benchmarks/ is on sys.path (see conftest.py)
+
+
+def make_agent(agent_modules, **kwargs):
+    Agent, Instrumentation, tools = agent_modules
+    instrumentation = Instrumentation()
+    agent = Agent(FakeChatModel(latency=0.0, tokens_per_second=1e6), tools, system="You are a helpful assistant",
+                  instrumentation=instrumentation, **kwargs)
+    return agent, instrumentation
+
+
+def assert_one_run(agent, instrumentation):
+    assert len(instrumentation.runs) == 1
+    run = instrumentation.runs[0]
+    node_spans = [span for span in run.spans if span.kind == "node"]
+    assert {span.name for span in node_spans} >= {"llm", *agent.tool_names}
+    assert all(span.trace_id == run.run_id for span in run.spans)
+    assert run.totals["llm_calls"] >= 2
+    assert instrumentation.ambient.spans == []
+
+
+@pytest.mark.parametrize("fan_out", [False, True])
+def test_run_records_one_run(agent_modules, fan_out):
+    agent, instrumentation = make_agent(agent_modules, fan_out=fan_out)
+    result = agent.run("How to reverse a string in Python?", timeout=30)
+    assert result["complete"] and result["answer"]
+    assert_one_run(agent, instrumentation)
+
+
+def test_arun_records_one_run(agent_modules):
+    agent, instrumentation = make_agent(agent_modules)
+    result = asyncio.run(agent.arun("How to reverse a string in Python?", timeout=30))
+    assert result["complete"] and result["answer"]
+    assert_one_run(agent, instrumentation)
+
+
+def test_run_joins_the_callers_run(agent_modules):
+    agent, instrumentation = make_agent(agent_modules)
+    with instrumentation.run() as run:
+        agent.run("How to reverse a string in Python?", timeout=30)
+    assert list(instrumentation.runs) == [run]
+    assert any(span.name == "llm" for span in run.spans)
+
+
+def test_direct_graph_use_collects_spans_in_the_ambient_run(agent_modules):
+    from langchain_core.messages import HumanMessage
+    agent, instrumentation = make_agent(agent_modules)
+    agent.graph.invoke({"messages": [HumanMessage(content="How to reverse a string in Python?")]})
+    assert len(instrumentation.runs) == 0
+    assert {span.trace_id for span in instrumentation.ambient.spans} == {instrumentation.AMBIENT_RUN_ID}
+    assert instrumentation.ambient.totals["llm_calls"] >= 2
+    flushed = instrumentation.flush_ambient()
+    assert list(instrumentation.runs) == [flushed]
+    assert instrumentation.ambient.spans == []
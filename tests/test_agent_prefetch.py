@@ -0,0 +1,95 @@
+"""
+Checks that concurrent runs of one complex_sot Agent are independent: each has its own speculative
+Stack Overflow fetches, cancelled when it leaves the Stack Overflow branch, and its own retry budget.
+Offline (see conftest.py).
+
+Run from the repository root: python -m pytest tests
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import StructuredTool
+
+from stubs import FakeChatModel  # benchmarks/ is on sys.path (see conftest.py)
+
+QUESTION = "How to reverse a string in Python?"
+UNANSWERED = "How to frobnicate a quux in Python?"
+
+
+class NoToolCallModel(FakeChatModel):
+    # Answers directly instead of calling the first tool
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def make_agent(agent_modules, model=None, **kwargs):
+    Agent, _, tools = agent_modules
+    model = model or FakeChatModel(latency=0.0, tokens_per_second=1e6)
+    agent = Agent(model, tools, system="You are a helpful assistant", **kwargs)
+    created = []
+    new_prefetcher = agent.new_prefetcher
+
+    def _recording():
+        prefetcher = new_prefetcher()
+        created.append(prefetcher)
+        return prefetcher
+
+    agent.new_prefetcher = _recording
+    return agent, created
+
+
+def assert_settled(prefetcher):
+    stats = prefetcher.stats
+    assert stats["started"] > 0
+    assert stats["used"] + stats["cancelled"] == stats["started"]
+    assert prefetcher._inflight == {}
+
+
+def test_each_run_gets_its_own_prefetcher(agent_modules):
+    agent, created = make_agent(agent_modules)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda _: agent.run(QUESTION, timeout=30), range(2)))
+    assert all(result["answer"] for result in results)
+    assert len(created) == 2 and created[0] is not created[1]
+    for prefetcher in created:
+        assert_settled(prefetcher)
+
+
+def test_concurrent_runs_keep_their_own_retry_budget(agent_modules):
+    from query_rewriter import QueryRewriter
+    Agent, _, tools = agent_modules
+    search = tools[0]
+    # Finds nothing for UNANSWERED, so those runs refine the question until they hit max_tries
+    finds_nothing = StructuredTool.from_function(
+        func=lambda query: [] if "frobnicate" in query else search.invoke({"query": query}),
+        name=search.name, description=search.description, args_schema=search.args_schema)
+    agent = Agent(FakeChatModel(latency=0.0, tokens_per_second=1e6), [finds_nothing, *tools[1:]],
+                  system="You are a helpful assistant", query_rewriter=QueryRewriter(enabled=False))
+    questions = [UNANSWERED, QUESTION] * 3
+    with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+        states = list(pool.map(lambda q: agent.graph.invoke({"messages": [HumanMessage(content=q)]}), questions))
+    for question, state in zip(questions, states):
+        refinements = sum(isinstance(m, HumanMessage) for m in state["messages"]) - 1
+        assert refinements == (agent.max_tries if question == UNANSWERED else 0)
+
+
+def test_direct_graph_use_does_not_prefetch(agent_modules):
+    agent, created = make_agent(agent_modules)
+    agent.graph.invoke({"messages": [HumanMessage(content=QUESTION)]})
+    assert created == []
+
+
+def test_graph_settles_a_prefetcher_from_its_config(agent_modules):
+    agent, _ = make_agent(agent_modules)
+    prefetcher = agent.new_prefetcher()
+    agent.graph.invoke({"messages": [HumanMessage(content=QUESTION)]}, {"configurable": {"prefetcher": prefetcher}})
+    assert_settled(prefetcher)
+    assert prefetcher.stats["used"] > 0
+
+
+def test_llm_turn_without_tool_call_cancels_the_prefetch(agent_modules):
+    agent, _ = make_agent(agent_modules, model=NoToolCallModel(latency=0.0, tokens_per_second=1e6))
+    prefetcher = agent.new_prefetcher()
+    agent.graph.invoke({"messages": [HumanMessage(content=QUESTION)]}, {"configurable": {"prefetcher": prefetcher}})
+    assert_settled(prefetcher)
+    assert prefetcher.stats["used"] == 0
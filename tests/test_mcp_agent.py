@@ -0,0 +1,57 @@
+"""
+Checks the MCP client Agent (MCP/final.py) in pipeline mode with a stub model and an in-process
+`answer_query` tool, without a server.
+
+Run from the repository root: python -m pytest tests
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+
+import pytest
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+from conftest import ROOT
+from stubs import FakeChatModel  # benchmarks/ is on sys.path (see conftest.py)
+
+QUESTION = "How to reverse a string in Python?"
+
+
+class NoToolCallModel(FakeChatModel):
+    # Answers directly instead of calling the pipeline tool
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture(scope="module")
+def mcp_final():
+    os.environ.setdefault("GROQ_API_KEY", "offline-test")  # The module creates its Groq model on import
+    sys.path.insert(0, os.path.join(ROOT, "MCP"))  # For its flat imports (codec, session_pool)
+    # Loaded by path: complex_sot has a final.py too
+    spec = importlib.util.spec_from_file_location("mcp_final", os.path.join(ROOT, "MCP", "final.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def answer_query(query: str) -> dict:
+    """Answers a coding question from Stack Overflow."""
+    return {"summary": "Use s[::-1].", "sources": [{"link": "https://stackoverflow.com/a/931095"}]}
+
+
+def test_pipeline_answer_without_tool_call(mcp_final):
+    tool = StructuredTool.from_function(func=answer_query, name=mcp_final.PIPELINE_TOOL)
+    agent = mcp_final.Agent(NoToolCallModel(latency=0.0, tokens_per_second=1e6), [tool])
+    assert agent.pipeline
+    result = asyncio.run(agent.graph.ainvoke({"messages": [HumanMessage(content=QUESTION)]}))
+    assert result["messages"][-1].content
+
+
+def test_pipeline_result_without_sources_is_not_relevant(mcp_final):
+    tool = StructuredTool.from_function(func=answer_query, name=mcp_final.PIPELINE_TOOL)
+    agent = mcp_final.Agent(NoToolCallModel(latency=0.0, tokens_per_second=1e6), [tool])
+    empty = ToolMessage(tool_call_id="call", name=mcp_final.PIPELINE_TOOL, content="Nothing found.",
+                        artifact={"summary": "Nothing found.", "sources": []})
+    assert agent.relevent_answer({"messages": [HumanMessage(content=QUESTION), empty]}) == "no"
@@ -0,0 +1,25 @@
+"""
+Checks that the tool modules' LLM steps only create their default model when no router is installed.
+
+Run from the repository root: python -m pytest tests
+"""
+from stubs import FakeChatModel  # benchmarks/ is on sys.path (see conftest.py)
+
+QUESTIONS = [{"question": "Question 1", "link": "https://stackoverflow.com/questions/1",
+              "answers": [{"Upvotes": 3, "Link": "https://stackoverflow.com/a/2", "Body": "Use s[::-1]."}]}]
+
+
+def test_routed_steps_do_not_create_the_default_model(monkeypatch):
+    import summarizer
+    from model_router import ModelRouter, set_router
+
+    def no_default():
+        raise AssertionError("default model created although a router is installed")
+
+    monkeypatch.setattr(summarizer, "chat_model", no_default)
+    model = FakeChatModel(latency=0.0, tokens_per_second=1e6)
+    set_router(ModelRouter(small=model, large=model))
+    try:
+        assert summarizer.summarize_answers("How to reverse a string in Python?", QUESTIONS)
+    finally:
+        set_router(None)
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# Segment boundaries: line breaks, and the spaces after a sentence's final punctuation
+SEGMENT_BREAK = re.compile(r"(\s*\n\s*|(?<=[.!?。！？])[ \t]+)")
+# Segments without a letter (numbers, code punctuation, list markers) are kept as they are
+LETTER = re.compile(r"[^\W\d_]")
+
+
+def split_segments(text: str) -> List[str]:
+    """
+    Splits text into sentence / line segments and the whitespace between them.
+
+    Returns:
+        list[str]: Segments at even positions and separators at odd positions, so that
+                   "".join() of the list is `text`.
+    """
+    return SEGMENT_BREAK.split(text)
+
+
+def is_translatable(segment: str) -> bool:
+    return bool(LETTER.search(segment))
+
+
+def segment_hash(segment: str) -> str:
+    return hashlib.sha256(segment.strip().encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    SQLite store of translated segments, keyed by (language, hash of the source segment).
+
+    A text is translated segment by segment (sentences and lines, see split_segments), so repeated
+    sentences (boilerplate, recurring topics) are translated once per language and looked up
+    afterwards. The table is trimmed to `max_entries` rows, least recently used first. Like the
+    other caches, the database uses WAL mode and can be shared by several processes.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        max_entries (int): Maximum number of segments kept.
+        stats (dict): Counts of segment "hits" and "misses".
+    """
+    # SQLite's default limit on host parameters is 999
+    LOOKUP_BATCH = 500
+
+    def __init__(self, path: str = ".translation_memory.sqlite", max_entries: int = 100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments (lang TEXT NOT NULL, hash TEXT NOT NULL, "
+                "translation TEXT NOT NULL, last_access REAL NOT NULL, PRIMARY KEY (lang, hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS segments_last_access ON segments (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, lang: str, segments: Iterable[str]) -> Dict[str, str]:
+        """
+        Returns the stored translations into `lang` of those `segments` that have one.
+        """
+        by_hash = {segment_hash(segment): segment for segment in segments}
+        hashes = list(by_hash)
+        found = {}
+        conn = self._connect()
+        for start in range(0, len(hashes), self.LOOKUP_BATCH):
+            batch = hashes[start:start + self.LOOKUP_BATCH]
+            rows = conn.execute(f"SELECT hash, translation FROM segments WHERE lang = ? AND hash IN "
+                                f"({', '.join('?' * len(batch))})", (lang, *batch)).fetchall()
+            found.update((by_hash[hash], translation) for hash, translation in rows)
+        if found:
+            with conn:
+                conn.executemany("UPDATE segments SET last_access = ? WHERE lang = ? AND hash = ?",
+                                 [(time.time(), lang, segment_hash(segment)) for segment in found])
+        with self._stats_lock:
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(hashes) - len(found)
+        return found
+
+    def store(self, lang: str, translations: Dict[str, str]):
+        """
+        Stores translations into `lang`, keyed by their source segments.
+        """
+        if not translations:
+            return
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO segments (lang, hash, translation, last_access) VALUES (?, ?, ?, ?)",
+                             [(lang, segment_hash(source), translation, now) for source, translation in translations.items()])
+            (count,) = conn.execute("SELECT COUNT(*) FROM segments").fetchone()
+            if count > self.max_entries:
+                conn.execute("DELETE FROM segments WHERE rowid IN "
+                             "(SELECT rowid FROM segments ORDER BY last_access LIMIT ?)", (count - self.max_entries,))
+
+
+@lru_cache(maxsize=None)
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """
+    Returns the process-wide TranslationMemory, created on first use.
+
+    TRANSLATION_MEMORY_PATH and TRANSLATION_MEMORY_MAX_ENTRIES configure it;
+    TRANSLATION_MEMORY_DISABLED=1 turns it off.
+
+    Returns:
+        TranslationMemory | None: The store, or None when disabled.
+    """
+    if os.getenv("TRANSLATION_MEMORY_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    return TranslationMemory(path=os.getenv("TRANSLATION_MEMORY_PATH", ".translation_memory.sqlite"),
+                             max_entries=int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "100000")))